@@ -1,16 +1,48 @@
 #!/usr/bin/env python3
+"""
+mars_hub.py
+Einstieg für Report & Hub (Bibliothek + Skript):
+- run_pipeline(): prices/volumes (EUR, aus dem Historien-Speicher), scores + score_factors,
+  var (1d 95% je Buch), macro (Benchmarks/FX), depot_map
+- macro lädt MACRO_SYMBOLS selbst über tools/md_cache (das Universe-Panel enthält sie nicht),
+  ohne Netz bleibt es bei dem, was im Historien-Speicher liegt
+- MARS_TICKERS/VENUS_TICKERS, MARS_DCA/VENUS_DCA aus data/portfolios.json
+- correlation_matrix(prices)
+- jede Komponente wird unter data/state/hub/ memoisiert; Schlüssel = Hash der Eingaben
+  (Dateiinhalte, Universum, Gewichte) + As-of-Datum → wiederholte Läufe in derselben
+  Session laden nur, veraltete Komponenten werden neu gerechnet
+
+    python mars_hub.py            # alerts_today (rotiertes Universum, Faktor-Scores) als JSON
+"""
 import os
 import json
+import hashlib
+import pickle
 import random
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
+from tools.dca_sim import load_plans
+from tools.history_store import PANEL_FILE, build_panel, load_panel, merge_panels
+from tools.scoring import score_panel, weights_from_config
+
 # === Konfiguration ===
-DATA_DIR = Path("data")
+ROOT = Path(__file__).resolve().parent
+DATA_DIR = ROOT / "data"
 TOPPRIOR_FILE = DATA_DIR / "universe_topprior.txt"
 CORE_FILE = DATA_DIR / "universe_core.txt"
 WATCH_FILE = DATA_DIR / "universe_watch.txt"
 IGNORE_FILE = DATA_DIR / "universe_ignore.txt"
+PORTF_FILE = DATA_DIR / "portfolios.json"
+FX_FILE = DATA_DIR / "fx_snapshot.csv"
+CACHE_DIR = DATA_DIR / "state" / "hub"
+
+MACRO_SYMBOLS = ("^GSPC", "^NDX", "^GDAXI", "^STOXX50E", "SMH", "EURUSD=X")
+MACRO_PERIOD = "6mo"
+VAR_LOOKBACK = 250
 
 # === Hilfsfunktion: Universen laden ===
 def load_universe(file_path):
@@ -34,30 +66,214 @@ def rotate_universe(universe, slots=4, max_n=200):
     chosen = universe[:slots * slot_size]
     return chosen[:max_n]
 
-# === Umgebungsvariablen laden ===
-SLOTS = int(os.getenv("ROTATION_SLOTS", "6"))
-MAX_N = int(os.getenv("MAX_UNIVERSE", "200"))
-
-# === Universe laden ===
-tickers_top = load_universe(TOPPRIOR_FILE)
-tickers_core = load_universe(CORE_FILE)
-tickers_watch = load_universe(WATCH_FILE)
-tickers_ignore = load_universe(IGNORE_FILE)
-
-# Merge + Dedupe, aber Ignorierte raus
-universe = list(set(tickers_top + tickers_core + tickers_watch) - set(tickers_ignore))
-
-# === Rotation anwenden ===
-selected = rotate_universe(universe, slots=SLOTS, max_n=MAX_N)
-
-# === Dummy-Scores (Platzhalter für echte Analyse) ===
-alerts = []
-for t in selected:
-    alerts.append({
-        "ticker": t,
-        "score": round(random.uniform(0.2, 0.9), 4),
-        "as_of": datetime.utcnow().isoformat() + "Z"
-    })
-
-# === Output als JSON ===
-print(json.dumps({"alerts_today": alerts}, indent=2))
+# === Bücher & Sparpläne (portfolios.json) ===
+def _portfolios() -> dict:
+    try:
+        return json.loads(PORTF_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+def _book_tickers(book: dict) -> list:
+    """Alle Ticker eines Buchs: Listen, {ticker: €}-Sparpläne und die NVDA-Position."""
+    out = []
+    for k, v in book.items():
+        if isinstance(v, list):
+            out += v
+        elif isinstance(v, dict) and v and all(isinstance(x, (int, float)) for x in v.values()):
+            out += list(v)
+        elif k == "nvda_position":
+            out.append("NVDA")
+    return list(dict.fromkeys(str(t).upper() for t in out))
+
+_PF = _portfolios()
+_PLANS = load_plans(_PF)
+MARS_TICKERS = _book_tickers(_PF.get("mars") or {})
+VENUS_TICKERS = _book_tickers(_PF.get("venus") or {})
+MARS_DCA = {p.ticker: p.monthly_eur for p in _PLANS if p.book == "mars"}
+VENUS_DCA = {p.ticker: p.monthly_eur for p in _PLANS if p.book == "venus"}
+
+def depot_map_for(universe) -> dict:
+    """Ticker → "Mars"/"Venus"; in beiden Büchern zählt Mars, sonst Mars als Default."""
+    out = {t: "Venus" for t in VENUS_TICKERS}
+    out.update({t: "Mars" for t in MARS_TICKERS})
+    return {t: out.get(t, "Mars") for t in universe}
+
+def report_universe() -> list:
+    """Bücher + Core/Watch/Top-Prior, ohne Ignorierte; stabile Reihenfolge."""
+    names = MARS_TICKERS + VENUS_TICKERS + load_universe(CORE_FILE) + load_universe(WATCH_FILE) \
+        + load_universe(TOPPRIOR_FILE)
+    ignore = set(load_universe(IGNORE_FILE))
+    return [t for t in dict.fromkeys(t.upper() for t in names) if t not in ignore]
+
+# === Memo auf Platte ===
+def _file_digest(path: Path) -> str:
+    if not path.exists():
+        return "-"
+    h = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _key(*parts) -> str:
+    raw = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+class _Memo:
+    """Komponente → (Schlüssel, Wert) als Pickle; Treffer nur bei identischem Schlüssel."""
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, enabled: bool = True):
+        self.dir = cache_dir
+        self.enabled = enabled
+        self.hits, self.misses = [], []
+
+    def get(self, name: str, key: str, build):
+        path = self.dir / f"{name}.pkl"
+        if self.enabled and path.exists():
+            try:
+                with path.open("rb") as f:
+                    k, v = pickle.load(f)
+                if k == key:
+                    self.hits.append(name)
+                    return v
+            except Exception:
+                pass
+        v = build()
+        self.misses.append(name)
+        if self.enabled:
+            try:
+                self.dir.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                with tmp.open("wb") as f:
+                    pickle.dump((key, v), f, protocol=pickle.HIGHEST_PROTOCOL)
+                tmp.replace(path)
+            except OSError:
+                pass
+        return v
+
+# === Komponenten ===
+def _prices_volumes(panel, universe):
+    sel = panel.select([t for t in universe if t in panel.index])
+    prices = sel.to_frame("close", eur=True).astype(np.float64)
+    volumes = sel.to_frame("volume").astype(np.float64)
+    return prices.dropna(how="all"), volumes.reindex(prices.dropna(how="all").index)
+
+def _scores(panel, universe, weights):
+    res = score_panel(panel.select([t for t in universe if t in panel.index]), weights)
+    return res.to_series(), res.factor_map()
+
+def _book_var(prices: pd.DataFrame, tickers, q: float = 0.05) -> float:
+    """Historischer 1d-VaR (95%) eines gleichgewichteten Buchs, als positive Verlustquote."""
+    cols = [t for t in tickers if t in prices.columns]
+    if not cols or len(prices) < 2:
+        return 0.0
+    rets = prices[cols].tail(VAR_LOOKBACK + 1).pct_change().iloc[1:]
+    book = rets.mean(axis=1, skipna=True).dropna()
+    if book.empty:
+        return 0.0
+    return max(0.0, -float(np.quantile(book.to_numpy(), q)))
+
+def _macro_panel(panel):
+    """MACRO_SYMBOLS frisch über md_cache; was nicht kommt, aus dem Hub-Panel."""
+    fresh = build_panel(MACRO_SYMBOLS, period=MACRO_PERIOD)
+    return merge_panels(panel.select([s for s in MACRO_SYMBOLS if s not in fresh]), fresh)
+
+def _macro(panel) -> dict:
+    out = {"benchmarks": {}, "fx": {}}
+    for s in MACRO_SYMBOLS:
+        i = panel.index.get(s)
+        if i is None:
+            continue
+        c = panel.fields["close"][:, i].astype(np.float64)
+        c = c[np.isfinite(c)]
+        if len(c) < 2:
+            continue
+        row = {"last": round(float(c[-1]), 4), "ret_1d": round(float(c[-1] / c[-2] - 1), 6)}
+        if len(c) > 20:
+            row["ret_20d"] = round(float(c[-1] / c[-21] - 1), 6)
+        if len(c) >= 50:
+            row["above_dma50"] = bool(c[-1] > c[-50:].mean())
+        out["benchmarks"][s] = row
+    if FX_FILE.exists():
+        try:
+            fx = pd.read_csv(FX_FILE)
+            if {"pair", "rate"} <= set(fx.columns):
+                out["fx"] = {str(p): float(r) for p, r in zip(fx["pair"], fx["rate"])}
+            elif {"source", "rate"} <= set(fx.columns):
+                # EURUSD-Quotes je Quelle → Median
+                out["fx"] = {"EURUSD": float(fx["rate"].median()),
+                             "sources": {str(q): float(r) for q, r in zip(fx["source"], fx["rate"])}}
+        except Exception:
+            pass
+    return out
+
+def correlation_matrix(prices: pd.DataFrame, window: int = 60) -> pd.DataFrame:
+    """Korrelation der Tagesrenditen über die letzten `window` Sessions."""
+    if prices is None or prices.empty:
+        return pd.DataFrame()
+    rets = prices.tail(window + 1).pct_change().iloc[1:]
+    return rets.corr(min_periods=max(10, window // 3))
+
+# === Pipeline ===
+def run_pipeline(universe=None, use_cache: bool = True, as_of: str | None = None) -> dict:
+    """
+    Payload für run_report_json: prices, volumes (DataFrames Datum × Ticker, EUR),
+    scores (Series, absteigend), score_factors, var {"mars","venus"}, macro, depot_map.
+    """
+    universe = [t.upper() for t in (universe or report_universe())]
+    as_of = as_of or datetime.now(timezone.utc).date().isoformat()
+    memo = _Memo(enabled=use_cache)
+    panel_h = _file_digest(PANEL_FILE)
+    weights = weights_from_config()
+
+    _panel = []
+    def panel():
+        if not _panel:
+            _panel.append(load_panel())
+        return _panel[0]
+
+    base = (as_of, panel_h, universe)
+    prices, volumes = memo.get("prices", _key("prices", *base), lambda: _prices_volumes(panel(), universe))
+    scores, factors = memo.get("scores", _key("scores", *base, weights), lambda: _scores(panel(), universe, weights))
+    depot_map = depot_map_for(list(prices.columns))
+    var = memo.get("var", _key("var", *base, MARS_TICKERS, VENUS_TICKERS),
+                   lambda: {"mars": _book_var(prices, MARS_TICKERS), "venus": _book_var(prices, VENUS_TICKERS)})
+    macro = memo.get("macro", _key("macro", as_of, panel_h, _file_digest(FX_FILE)), lambda: _macro(_macro_panel(panel())))
+    return {
+        "prices": prices, "volumes": volumes,
+        "scores": scores, "score_factors": factors,
+        "var": var, "macro": macro, "depot_map": depot_map,
+        "cache": {"hits": memo.hits, "misses": memo.misses},
+    }
+
+# === Skript: alerts_today ===
+def main():
+    # === Umgebungsvariablen laden ===
+    slots = int(os.getenv("ROTATION_SLOTS", "6"))
+    max_n = int(os.getenv("MAX_UNIVERSE", "200"))
+
+    # === Universe laden ===
+    tickers_top = load_universe(TOPPRIOR_FILE)
+    tickers_core = load_universe(CORE_FILE)
+    tickers_watch = load_universe(WATCH_FILE)
+    tickers_ignore = load_universe(IGNORE_FILE)
+
+    # Merge + Dedupe, aber Ignorierte raus
+    universe = list(set(tickers_top + tickers_core + tickers_watch) - set(tickers_ignore))
+
+    # === Rotation anwenden ===
+    selected = rotate_universe(universe, slots=slots, max_n=max_n)
+
+    # === Scores (Faktor-Modell über den lokalen Historien-Speicher) ===
+    panel = load_panel()
+    scored = score_panel(panel.select(selected))
+    as_of = datetime.utcnow().isoformat() + "Z"
+    alerts = []
+    for row in scored.top(len(scored.tickers)):
+        alerts.append({**row, "as_of": as_of})
+
+    # === Output als JSON ===
+    print(json.dumps({"alerts_today": alerts}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
-import json, os, pathlib
+import json, os, pathlib, time
 from datetime import datetime
 import numpy as np
 import pandas as pd
+from tools import metrics as om
 from mars_hub import run_pipeline, MARS_TICKERS, MARS_DCA, VENUS_TICKERS, VENUS_DCA, correlation_matrix
 
 def pack_dca_flags_only(dca_dict: dict):
@@ -78,16 +79,26 @@ def compute_alerts(prices: pd.DataFrame, volumes: pd.DataFrame | None, universe:
             pass
     return alerts[:20]
 
+STAGE_SECONDS = om.gauge("mars_report_stage_seconds", "Dauer je Report-Schritt", ("stage",))
+REPORT_ALERTS = om.gauge("mars_report_alerts", "alerts_today je Regel", ("rule",))
+
 def main():
+    t0 = time.perf_counter()
     payload = run_pipeline()
+    STAGE_SECONDS.labels("pipeline").set(time.perf_counter() - t0)
     prices  = payload["prices"]; volumes = payload["volumes"]
     scores  = payload["scores"]; var = payload["var"]
+    factors = payload.get("score_factors", {})
     macro   = payload.get("macro", {}); depot_map=payload.get("depot_map",{})
     corr    = correlation_matrix(prices)
 
     universe = list(prices.columns)
     cfg = load_alerts_config()
+    t1 = time.perf_counter()
     alerts = compute_alerts(prices, volumes, universe, depot_map, cfg)
+    STAGE_SECONDS.labels("alerts").set(time.perf_counter() - t1)
+    for a in alerts:
+        REPORT_ALERTS.labels(a["type"]).inc()
 
     summary = {
       "as_of": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
@@ -96,11 +107,12 @@ def main():
         "Mars":  pack_dca_flags_only(MARS_DCA),
         "Venus": pack_dca_flags_only(VENUS_DCA)
       },
-      "scores_top15":[{"ticker":t,"score":round(float(s),4)} for t,s in scores.head(15).items()],
+      "scores_top15":[{"ticker":t,"score":round(float(s),4),"factors":factors.get(t,{})} for t,s in scores.head(15).items()],
       "risk": {"var_1d_95":{"Mars":round(float(var["mars"]),6), "Venus":round(float(var["venus"]),6)}},
       "macro": macro,
       "alerts_today": alerts
     }
     print(json.dumps(summary, ensure_ascii=False, indent=2))
+    om.export("run_report_json")
 
 if __name__=="__main__": main()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Alert-Archiv: Identität inkl. Geltungsbereich (scope) und Migration alter Archive."""
+
+import json
+import sqlite3
+
+from tools.alerts_history import append_run, query
+
+RUN = {"as_of_utc": "2026-10-19T10:00:00Z", "family": {"alerts": [
+    {"topic": "family_risk", "type": "dd_sub", "book": "mars", "score": 70},
+    {"topic": "family_risk", "type": "dd_sub", "book": "venus", "score": 70},
+]}}
+
+
+def test_family_breaches_per_scope_are_kept(tmp_path):
+    db = tmp_path / "h.sqlite"
+    assert append_run(RUN, db) == 2
+    assert append_run(RUN, db) == 0          # idempotent
+    rows = query(book="family", db_path=db)
+    assert sorted(r["scope"] for r in rows) == ["mars", "venus"]
+    assert {r["ticker"] for r in rows} == {""}
+
+
+def test_old_schema_is_migrated(tmp_path):
+    db = tmp_path / "h.sqlite"
+    con = sqlite3.connect(str(db))
+    con.executescript("""
+        CREATE TABLE alerts (id INTEGER PRIMARY KEY, ts INTEGER NOT NULL, day TEXT NOT NULL,
+            book TEXT NOT NULL, ticker TEXT NOT NULL DEFAULT '', rule TEXT NOT NULL DEFAULT '',
+            score REAL, confidence INTEGER, p_eur REAL, payload TEXT NOT NULL,
+            UNIQUE (ts, book, ticker, rule));""")
+    a = {"topic": "family_risk", "type": "dd_sub", "book": "mars", "ticker": "MARS"}
+    con.execute("INSERT INTO alerts (ts, day, book, ticker, rule, payload) VALUES (1, '1970-01-01', "
+                "'family', 'MARS', 'dd_sub', ?)", (json.dumps(a),))
+    con.commit()
+    con.close()
+    rows = query(db_path=db)
+    assert [(r["ticker"], r["scope"]) for r in rows] == [("", "mars")]
+    assert append_run(RUN, db) == 2
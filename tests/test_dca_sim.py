@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""DCA-Simulation: Drawdown auf dem Anteilswert, keine still gekürzten Zeitpläne."""
+
+import numpy as np
+import pandas as pd
+
+from tools.dca_sim import Schedule, history_period, simulate
+
+
+def _dates(n: int = 260):
+    return pd.bdate_range("2025-10-20", periods=n).values
+
+
+def test_rising_price_has_no_drawdown():
+    prices = np.linspace(100, 150, 260)[:, None]
+    res = simulate(prices, _dates(), [Schedule(years=1.0)])
+    assert res["max_drawdown"][0, 0] == 0.0
+
+
+def test_drawdown_matches_price_path_after_first_buy():
+    prices = np.r_[np.linspace(100, 120, 130), np.linspace(120, 90, 130)][:, None]
+    res = simulate(prices, _dates(), [Schedule(years=1.0)])
+    assert np.isclose(res["max_drawdown"][0, 0], 90 / 120 - 1)
+
+
+def test_schedule_longer_than_history_is_not_covered():
+    prices = np.linspace(100, 150, 260)[:, None]
+    res = simulate(prices, _dates(), [Schedule(years=1.0), Schedule(years=3.0)])
+    assert res["covered"][:, 0].tolist() == [True, False]
+    assert history_period([Schedule(years=3.0), Schedule(years=1.0)]) == "4y"
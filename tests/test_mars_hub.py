@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""Makro-Block: MACRO_SYMBOLS kommen über md_cache, das Hub-Panel ist nur Rückfall."""
+
+import numpy as np
+
+import mars_hub
+from tools.history_store import HistoryPanel
+
+
+def _panel(tickers, n=60, start="2026-01-01"):
+    dates = np.arange(np.datetime64(start), np.datetime64(start) + n)
+    close = np.linspace(100, 110, n)[:, None] * np.arange(1, len(tickers) + 1)
+    fields = {k: close for k in ("open", "high", "low", "close")}
+    fields["volume"] = np.ones_like(close)
+    return HistoryPanel(dates, tickers, ["USD"] * len(tickers), fields)
+
+
+def test_macro_loads_symbols_missing_from_hub_panel(monkeypatch):
+    monkeypatch.setattr(mars_hub, "build_panel",
+                        lambda syms, period: _panel(["^GSPC", "^STOXX50E", "EURUSD=X"]))
+    hub = _panel(["MSFT", "^NDX"])
+    bench = mars_hub._macro(mars_hub._macro_panel(hub))["benchmarks"]
+    assert {"^GSPC", "^STOXX50E", "EURUSD=X", "^NDX"} <= set(bench)
+    assert bench["^GSPC"]["ret_20d"] > 0 and "MSFT" not in bench
+
+
+def test_macro_falls_back_to_hub_panel_offline(monkeypatch):
+    monkeypatch.setattr(mars_hub, "build_panel", lambda syms, period: HistoryPanel.empty())
+    bench = mars_hub._macro(mars_hub._macro_panel(_panel(["^NDX", "SMH"])))["benchmarks"]
+    assert set(bench) == {"^NDX", "SMH"}
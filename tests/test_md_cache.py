@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Marktdaten-Cache: Zeitzone des Index übersteht den HTTP-Umweg (Börsen-Sessiondatum)."""
+
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools import md_cache
+
+
+def _frame(tz):
+    idx = pd.date_range("2026-10-12", periods=5, freq="B", tz=tz)
+    return pd.DataFrame({"Close": np.arange(5.0) + 100, "Volume": np.arange(5) * 10}, index=idx)
+
+
+class _Provider:
+    def history(self, symbol, period, interval):
+        return _frame("Europe/Berlin")
+
+    def bulk_history(self, symbols, period, interval):
+        return {s: _frame("Europe/Berlin") for s in symbols}
+
+    def currency(self, symbol):
+        return "EUR"
+
+
+@pytest.mark.parametrize("tz", ["Europe/Berlin", "America/New_York", None])
+def test_json_roundtrip_keeps_tz(tz):
+    df = _frame(tz)
+    back = md_cache._df_from_json(md_cache._df_to_json(df))
+    assert back.index.equals(df.index)
+    assert (back.index.normalize() == df.index.normalize()).all()
+
+
+def test_remote_history_keeps_session_dates(monkeypatch):
+    srv = md_cache.serve("127.0.0.1", 0, md_cache.MarketDataCache(_Provider()))
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    try:
+        monkeypatch.setenv("MARS_MD_CACHE_URL", f"http://127.0.0.1:{srv.server_address[1]}")
+        monkeypatch.setattr(md_cache, "_REMOTE_DOWN_UNTIL", 0.0)
+        got = md_cache.history("SAP.DE", period="5d")
+        days = got.index.tz_localize(None).normalize()
+        assert list(days.dayofweek) == [0, 1, 2, 3, 4]   # Montag bleibt Montag
+        assert str(got.index.tz) == "Europe/Berlin"
+    finally:
+        srv.shutdown()
+        srv.server_close()
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""Faktor-Scores: ein Symbol ohne Umsatz darf den Querschnitt nicht auslöschen."""
+
+import numpy as np
+
+from tools.scoring import raw_factors, zscore
+
+
+def test_zscore_ignores_non_finite_in_moments():
+    z = zscore(np.array([1.0, 2.0, 3.0, -np.inf, np.nan]))
+    assert np.allclose(z[:3], [-1.224744871, 0.0, 1.224744871])
+    assert z[4] == 0.0
+
+
+def test_zero_volume_ticker_keeps_volume_factor():
+    rng = np.random.default_rng(0)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, (80, 4)), axis=0)
+    volume = rng.uniform(1e5, 2e5, (80, 4))
+    volume[:, 3] = 0.0
+    vexp = raw_factors(close, volume)["volume_expansion"]
+    assert np.isnan(vexp[3]) and np.isfinite(vexp[:3]).all()
+    assert np.abs(zscore(vexp)[:3]).sum() > 0
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""Indikatoren der Schwellen-Optimierung: spät gelistete Ticker (führende NaN)."""
+
+import numpy as np
+
+from tools.threshold_sweep import _rolling_mean, indicators
+
+
+def _panel(T: int = 120, late: int = 40):
+    rng = np.random.default_rng(0)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.02, (T, 2)), axis=0)
+    volume = rng.uniform(1e5, 2e5, (T, 2))
+    close[:late, 1] = np.nan
+    volume[:late, 1] = np.nan
+    return close, volume
+
+
+def test_rolling_mean_matches_window_mean():
+    a = np.random.default_rng(1).normal(size=(50, 3))
+    ref = np.lib.stride_tricks.sliding_window_view(a, 5, axis=0).mean(axis=-1)
+    assert np.allclose(_rolling_mean(a, 5)[4:], ref)
+
+
+def test_rolling_mean_late_listed_column():
+    a = np.arange(30, dtype=float).reshape(15, 2)
+    a[:6, 1] = np.nan
+    out = _rolling_mean(a, 5)
+    assert np.isnan(out[:10, 1]).all()
+    assert np.allclose(out[10:, 1], [a[t - 4:t + 1, 1].mean() for t in range(10, 15)])
+
+
+def test_indicators_late_listed_ticker():
+    close, volume = _panel()
+    ind = indicators(close, volume)
+    # SMA60 braucht 60 Kerzen ab Listung (Zeile 40) → ab Zeile 99 gesetzt
+    assert np.isfinite(ind["stretch"][:, 1]).sum() > 0
+    assert ind["ma_up"][99:, 1].sum() > 0
+    assert np.isfinite(ind["vol_x"][60:, 1]).all()
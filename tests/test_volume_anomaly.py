@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Volumen-Anomalien: Streaming-Median/MAD und Live-Baseline gegen den vektorisierten Pfad."""
+
+import numpy as np
+import pandas as pd
+
+from tools.volume_anomaly import LiveBaselines, RollingMedianMAD, daily_scores
+
+
+def test_streaming_median_mad_matches_brute_force():
+    xs = np.random.default_rng(0).normal(size=200)
+    r = RollingMedianMAD(7)
+    for i, x in enumerate(xs):
+        r.update(float(x))
+        w = xs[max(0, i - 6):i + 1]
+        m = np.median(w)
+        assert np.isclose(r.median(), m)
+        assert np.isclose(r.mad(), np.median(np.abs(w - m)))
+
+
+def test_live_baselines_incremental_equals_batch():
+    v = np.random.default_rng(1).lognormal(13, 0.5, 80)
+    days = pd.bdate_range("2026-06-01", periods=80)
+    lb = LiveBaselines()
+    for t in range(30, 80):
+        vx, z = lb.score("X", days[:t + 1], v[:t + 1])
+        bx, bz = daily_scores(v[:t + 1, None])
+        assert np.isclose(vx, bx[0]) and np.isclose(z, bz[0])
+
+
+def test_live_baselines_scores_projection_without_inserting_it():
+    v = np.full(25, 100.0)
+    v[::2] = 120.0
+    days = pd.bdate_range("2026-06-01", periods=25)
+    lb = LiveBaselines()
+    first = lb.score("X", days, v, today=500.0)
+    assert lb.score("X", days, v, today=500.0) == first
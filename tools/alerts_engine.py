@@ -6,8 +6,14 @@ tools/alerts_engine.py
 Regel-Engine für Alerts:
 - liest Kontexte/Parameter aus run_alerts(name, cfg)
 - nutzt optionale Snapshots (EUR/Preis, USD-Ref, Volumen) aus data/*.csv
-- dual-layer Logik: USD reference, EUR action
-- QA-Gates: FX-Toleranz, Debounce, Volume, Min-Move
+- dual-layer Logik: USD reference, EUR action – Signale in Notierungswährung und EUR
+  parallel (tools/dual_layer.py); nur EUR löst aus, fx_only markiert reine FX-Trigger
+- QA-Gates: FX-Gegenprobe über die Feeds (Median/Ausreißer), Debounce, Volume (robustes vol_x ≥ volume_min_x,
+  Bonus ab volume_spike_x; tools/volume_anomaly.py), Min-Move
+- Relative Stärke (rs_weak/rs_rank) aus data/state/relative_strength.npz
+- NVDA: Fail-Safe (Mars) und Tranchen t1/t2 (Venus) über LOW5/Swing-Pivots aus tools/pivots.py
+- session_only: nur Ticker, deren Börse offen ist bzw. gerade geschlossen hat
+- Family-Limits (Drawdown, Investitionsquote, Cash, Cluster) über tools/exposure.py
 - Score (0..100), Confidence (1..5), Varianten A/B Text
 """
 
@@ -15,7 +21,16 @@ from __future__ import annotations
 from pathlib import Path
 from datetime import datetime, timezone
 import time
-import csv
+
+import numpy as np
+
+from tools import dual_layer
+from tools import exposure
+from tools import metrics as om
+from tools.market_calendar import filter_universe
+from tools.market_state import MarketState
+from tools.relative_strength import load_latest as _load_rs
+from tools.volume_anomaly import volume_flags
 
 # ------------------------------------------------------------
 # Pfade für optionale Snapshots
@@ -25,6 +40,10 @@ DATA_DIR = ROOT / "data"
 PRICES_EUR_SNAP = DATA_DIR / "prices_eur_snapshot.csv"
 FX_SNAP         = DATA_DIR / "fx_snapshot.csv"
 
+RULE_SECONDS = om.histogram("mars_rule_eval_seconds", "Regel-Auswertung je Buch", ("book",),
+                            buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+ALERTS = om.counter("mars_alerts", "ausgelöste Alerts je Buch und Regel", ("book", "rule"))
+
 # In-Memory Debounce-Store
 _DEBOUNCE = {}  # key: (portfolio, ticker, rule_key) -> last_ts
 
@@ -41,58 +60,40 @@ def _debounced(key: tuple, debounce_s: int) -> bool:
     _DEBOUNCE[key] = _now_ts()
     return False
 
-def _load_prices_eur() -> dict:
-    out = {}
-    if not PRICES_EUR_SNAP.exists():
-        return out
-    with PRICES_EUR_SNAP.open("r", encoding="utf-8") as f:
-        rd = csv.DictReader(f)
-        for r in rd:
-            try:
-                t = r["ticker"].strip().upper()
-                out[t] = {
-                    "last_eur": float(r.get("last_eur", "0") or 0),
-                    "chg_intraday": float(r.get("change_intraday_pct", "0") or 0),
-                    "vs5d": float(r.get("vs5d_pct", "0") or 0),
-                    "vol_x": float(r.get("vol_x", "0") or 0)
-                }
-            except Exception:
-                continue
-    return out
+def _load_prices_eur() -> MarketState:
+    return MarketState.from_snapshot_csv(PRICES_EUR_SNAP)
 
-def _load_fx() -> dict:
-    fx = {}
-    if not FX_SNAP.exists():
-        fx["USDEUR"] = 1.0
-        fx["EURUSD"] = 1.0
-        return fx
-    with FX_SNAP.open("r", encoding="utf-8") as f:
-        rd = csv.DictReader(f)
-        for r in rd:
-            try:
-                pair = r["pair"].strip().upper()
-                rate = float(r["rate"])
-                fx[pair] = rate
-            except Exception:
-                continue
-    if "USDEUR" not in fx and "EURUSD" in fx and fx["EURUSD"] != 0:
+def _load_fx(px: MarketState | None = None, meta: dict | None = None) -> dict:
+    """
+    Paare (pair,rate) und Feed-Quotes (source,rate) aus fx_snapshot.csv; EURUSD = Feed-Median.
+    Mit px zusätzlich "live": der EURUSD=X-Kurs, mit dem der Snapshot umgerechnet wurde –
+    nur bei aktuellen Feeds (dual_layer.live_reference), sonst bleibt es beim Feed-Vergleich.
+    """
+    snap = dual_layer.load_fx_snapshot(FX_SNAP)
+    fx = dict(snap["pairs"])
+    fx["feeds"] = snap["feeds"]
+    if px is not None:
+        max_age = (meta or {}).get("fx_check", {}).get("max_age_minutes", dual_layer.DEFAULT_MAX_AGE_MIN)
+        fx["live"] = dual_layer.live_reference(px, snap["as_of"], max_age)
+    if "EURUSD" not in fx and snap["feeds"]:
+        fx["EURUSD"] = float(np.median(list(snap["feeds"].values())))
+    if "USDEUR" not in fx and fx.get("EURUSD"):
         fx["USDEUR"] = 1.0 / fx["EURUSD"]
-    if "EURUSD" not in fx and "USDEUR" in fx and fx["USDEUR"] != 0:
+    if "EURUSD" not in fx and fx.get("USDEUR"):
         fx["EURUSD"] = 1.0 / fx["USDEUR"]
     return fx
 
-def _qa_fx_ok(fx: dict, tol: float) -> bool:
-    if "EURUSD" in fx and "USDEUR" in fx and fx["USDEUR"] != 0:
-        back = 1.0 / fx["USDEUR"]
-        if abs(back - fx["EURUSD"]) / max(1e-6, fx["EURUSD"]) <= tol:
-            return True
-        return False
-    return True
+def _qa_fx_ok(fx: dict, tol: float, expected=None) -> bool:
+    """Mehrheit der FX-Feeds innerhalb tol um den Median, live benutzter Kurs ebenso;
+    ohne Feeds nicht verifiziert."""
+    return dual_layer.fx_crosscheck(fx.get("feeds") or {}, tol, expected, fx.get("live"))["ok"]
 
 def _score_confidence(passed: dict) -> tuple[int, int]:
     base = 60
     if passed.get("fx"): base += 10
     if passed.get("volume"): base += 10
+    if passed.get("volume_spike"): base += 5
+    if passed.get("fx_only"): base -= 15
     if passed.get("debounce"): base -= 10
     if passed.get("min_move"): base += 5
     sc = max(0, min(100, base))
@@ -110,6 +111,9 @@ def _variant_text(kind: str) -> tuple[str, str]:
     if kind == "trim":
         return ("A: 10–15% trim, Stops enger",
                 "B: 15–20% trim, Hedge erwägen")
+    if kind == "derisk":
+        return ("A: im bevorzugten Buch trimmen, Cash-Quote auffüllen",
+                "B: Neukäufe pausieren, Hedge erwägen")
     if kind == "add":
         return ("A: Starter ⅓, stop-orientiert",
                 "B: ½ jetzt, ½ tiefer – strikte Stops")
@@ -118,78 +122,151 @@ def _variant_text(kind: str) -> tuple[str, str]:
 # ------------------------------------------------------------
 # Mars-Logik
 # ------------------------------------------------------------
-def _run_for_mars(cfg: dict) -> list:
+def _run_for_mars(cfg: dict, px: MarketState | None = None) -> list:
     out = []
-    px = _load_prices_eur()
-    fx = _load_fx()
+    px = px if px is not None else _load_prices_eur()
+    fx = _load_fx(px, cfg.get("meta", {}))
+    rs = _load_rs()
     tol = cfg.get("meta", {}).get("fx_check", {}).get("tolerance", 0.002)
+    fx_feeds = cfg.get("meta", {}).get("fx_check", {}).get("feeds")
     debounce_s = cfg.get("meta", {}).get("debounce_seconds", 120)
+    meta = cfg.get("meta", {})
+    vol_min_x = meta.get("volume_min_x", 1.3)
 
     # Beispiel: Core/Growth-Logik
     cg = cfg.get("core_growth", {})
-    tickers = [t.upper() for t in cg.get("tickers", [])]
+    tickers = filter_universe([t.upper() for t in cg.get("tickers", [])], cfg)
     drop5d = cg.get("trim_drop_5d", -0.12)
     tp_intraday = cg.get("tp_gain_intraday", 0.12)
+    momentum_break = bool(cg.get("momentum_break"))
 
-    for t in tickers:
-        d = px.get(t)
-        if not d:
-            continue
-        passed = {"fx": _qa_fx_ok(fx, tol)}
+    fx_ok = _qa_fx_ok(fx, tol, fx_feeds)
+    idx = np.array([px.index[t] for t in tickers if t in px], dtype=np.intp)
+    lay = dual_layer.layers(px, idx)
+    tp_hit, tp_fx = dual_layer.trigger(lay, "chg", ">=", tp_intraday)
+    trim_hit, trim_fx = dual_layer.trigger(lay, "vs5d", "<=", drop5d)
+    rules = (("tp", tp_hit, tp_fx, "chg", "Take-Profit Kandidat", "tp"),
+             ("trim", trim_hit, trim_fx, "vs5d", "Schutz-Trim", "trim"))
+
+    for j, i in enumerate(idx):
+        t = px.tickers[i]
+        d = px[t]
+        passed = {"fx": fx_ok, **volume_flags(d.vol_x, meta, d.vol_z)}
 
-        # Take-Profit
-        if d["chg_intraday"] >= tp_intraday:
-            key = ("mars", t, "tp")
+        # Take-Profit (Intraday) / Schutz-Trim (5 Tage) – EUR löst aus, Notierungswährung als Referenz
+        for kind, hit, fx_only, sig, what, variant in rules:
+            if not hit[j]:
+                continue
+            key = ("mars", t, kind)
             passed["debounce"] = _debounced(key, debounce_s)
-            passed["volume"] = True
             passed["min_move"] = True
-            sc, cf = _score_confidence(passed)
+            sc, cf = _score_confidence({**passed, "fx_only": bool(fx_only[j])})
             if not passed["debounce"]:
-                a, b = _variant_text("tp")
+                a, b = _variant_text(variant)
                 out.append({
-                    "ticker": t, "type": "tp", "p_eur": d["last_eur"],
-                    "what": "Take-Profit Kandidat",
+                    "ticker": t, "type": kind, "p_eur": d.last_eur,
+                    "what": what + (" (nur durch FX)" if fx_only[j] else ""),
+                    "ref": {"ccy": d.currency, "move": round(float(lay["loc"][sig][j]), 6),
+                            "move_eur": round(float(lay["eur"][sig][j]), 6)},
+                    "fx_only": bool(fx_only[j]),
                     "score": sc, "confidence": cf,
                     "variant_A": a, "variant_B": b
                 })
 
-        # Schutz-Trim
-        if d["vs5d"] <= drop5d:
-            key = ("mars", t, "trim")
+        # Momentum-Bruch: close<dma50 AND rs_weak AND vol_up
+        r = rs.get(t)
+        if momentum_break and r and r["rs_weak"] and lay["eur"]["below_dma50"][j] \
+                and d.vol_x >= vol_min_x:
+            key = ("mars", t, "momentum_break")
             passed["debounce"] = _debounced(key, debounce_s)
-            passed["volume"] = True
             passed["min_move"] = True
             sc, cf = _score_confidence(passed)
             if not passed["debounce"]:
                 a, b = _variant_text("trim")
                 out.append({
-                    "ticker": t, "type": "trim", "p_eur": d["last_eur"],
-                    "what": "Schutz-Trim",
+                    "ticker": t, "type": "momentum_break", "p_eur": d.last_eur,
+                    "what": f"Momentum-Bruch (< DMA50, RS-Rang {r['rs_rank']:.2f} vs {r['benchmark']})",
                     "score": sc, "confidence": cf,
                     "variant_A": a, "variant_B": b
                 })
+
+    # NVDA fail-safe: ein Trigger reicht (Intraday-Einbruch oder Close unter LOW5)
+    nv = cfg.get("nvda", {}).get("triggers") or {}
+    d = px.get("NVDA") if nv and filter_universe(["NVDA"], cfg) else None
+    if d:
+        hits = []
+        if "intraday" in nv and d.change_intraday_pct <= float(nv["intraday"]):
+            hits.append(f"intraday {d.change_intraday_pct:+.1%}")
+        if nv.get("close_low5") and d.last_eur < d.low5_eur:
+            hits.append(f"Close < LOW5 {d.low5_eur:.2f}")
+        if hits and not _debounced(("mars", "NVDA", "failsafe"), debounce_s):
+            sc, cf = _score_confidence({"fx": fx_ok, **volume_flags(d.vol_x, meta, d.vol_z), "min_move": True})
+            a, b = _variant_text("trim")
+            out.append({
+                "ticker": "NVDA", "type": "nvda_failsafe", "p_eur": d.last_eur,
+                "what": f"NVDA Fail-Safe ({'; '.join(hits)})",
+                "score": sc, "confidence": cf,
+                "variant_A": a, "variant_B": b
+            })
     return out
 
 # ------------------------------------------------------------
 # Venus-Logik
 # ------------------------------------------------------------
-def _run_for_venus(cfg: dict) -> list:
+def _tranche_conditions(d, spec: dict, meta: dict) -> dict:
+    """Bedingungen aus *_if (venus.nvda_tranches) → erfüllt ja/nein; Levels aus tools/pivots.py."""
+    got = {}
+    for k, want in spec.items():
+        if k == "close_below_low5":
+            ok = d.last_eur < d.low5_eur
+        elif k == "close_below_dma50":
+            ok = d.last_eur < d.dma50_eur
+        elif k == "pivot_break":
+            ok = d.last_eur < d.pivot_low_eur
+        elif k == "vol_up":
+            ok = volume_flags(d.vol_x, meta, d.vol_z)["volume"]
+        elif k == "intraday_drop":
+            ok = d.change_intraday_pct <= float(want)
+            want = True
+        else:
+            continue
+        got[k] = bool(ok) == bool(want)
+    return got
+
+def _run_for_venus(cfg: dict, px: MarketState | None = None) -> list:
     out = []
-    px = _load_prices_eur()
-    fx = _load_fx()
+    px = px if px is not None else _load_prices_eur()
+    fx = _load_fx(px, cfg.get("meta", {}))
+    meta = cfg.get("meta", {})
     debounce_s = 120
+    tr = cfg.get("nvda_tranches") or {"t1_pct": 0.25, "t1_if": {"intraday_drop": -0.06}}
 
-    if "NVDA" in px:
+    if "NVDA" in px and filter_universe(["NVDA"], cfg):
         d = px["NVDA"]
-        if d["chg_intraday"] <= -0.06:
-            key = ("venus", "NVDA", "t1")
+        fc = meta.get("fx_check", {})
+        passed = {"fx": _qa_fx_ok(fx, fc.get("tolerance", 0.002), fc.get("feeds")),
+                  **volume_flags(d.vol_x, meta, d.vol_z), "min_move": True}
+        chg_loc = float(dual_layer.layers(px, np.array([px.index["NVDA"]]))["loc"]["chg"][0])
+        lo, hi = (tr.get("t2_pct_range") or [0.10, 0.15])[:2]
+        tranches = (
+            ("t1", tr.get("t1_if"), f"Tranche 1 ({tr.get('t1_pct', 0.25):.0%})", f"A: {tr.get('t1_pct', 0.25):.0%} trim"),
+            ("t2", tr.get("t2_if"), f"Tranche 2 ({lo:.0%}–{hi:.0%})", f"A: {lo:.0%}–{hi:.0%} trim"),
+        )
+        for name, spec, what, var_a in tranches:
+            cond = _tranche_conditions(d, spec or {}, meta)
+            if not cond or not all(cond.values()):
+                continue
+            # Intraday-Einbruch nur in EUR, nicht in USD → reine FX-Bewegung
+            fx_only = "intraday_drop" in cond and not chg_loc <= float(spec["intraday_drop"])
+            key = ("venus", "NVDA", name)
             if not _debounced(key, debounce_s):
-                sc, cf = _score_confidence({"fx": _qa_fx_ok(fx, 0.002)})
+                sc, cf = _score_confidence({**passed, "fx_only": fx_only})
                 out.append({
-                    "ticker": "NVDA", "type": "trim_t1",
-                    "what": "Tranche 1 (25%)",
+                    "ticker": "NVDA", "type": f"trim_{name}", "p_eur": d.last_eur,
+                    "what": f"{what}: {', '.join(cond)}" + (" (nur durch FX)" if fx_only else ""),
+                    "fx_only": fx_only,
                     "score": sc, "confidence": cf,
-                    "variant_A": "A: 25% trim",
+                    "variant_A": var_a,
                     "variant_B": "B: Hedge erwägen"
                 })
     return out
@@ -197,27 +274,66 @@ def _run_for_venus(cfg: dict) -> list:
 # ------------------------------------------------------------
 # Family-Logik
 # ------------------------------------------------------------
-def _run_for_family(cfg: dict) -> list:
-    return [{
-        "topic": "family_risk",
-        "what": "Family P&L-Wächter aktiv",
-        "score": 50, "confidence": 2,
-        "variant_A": "A: beobachten",
-        "variant_B": "B: Re-Check bei Indexbewegung"
-    }]
+_FAMILY_TEXT = {
+    "dd_family": "Family-Drawdown",
+    "dd_sub": "Sub-Depot-Drawdown",
+    "max_invested": "Investitionsquote über Limit",
+    "min_cash": "Cash-Quote unter Minimum",
+}
+
+def _run_for_family(cfg: dict, px: MarketState | None = None) -> list:
+    got = exposure.from_positions(cfg)
+    if got is None:
+        # ohne data/positions.json gibt es nichts zu aggregieren
+        return [{
+            "topic": "family_risk",
+            "what": "Family P&L-Wächter aktiv",
+            "score": 50, "confidence": 2,
+            "variant_A": "A: beobachten",
+            "variant_B": "B: Re-Check bei Indexbewegung"
+        }]
+    agg, limits = got
+    px = px if px is not None else _load_prices_eur()
+    agg.apply(px)
+    agg.save_peaks()
+
+    out = []
+    fx = _load_fx(px, cfg.get("meta", {}))
+    tol = cfg.get("meta", {}).get("fx_check", {}).get("tolerance", 0.002)
+    debounce_s = cfg.get("meta", {}).get("debounce_seconds", 120)
+    prefer = limits.get("prefer_trim") or "venus"
+    for b in agg.breaches(limits):
+        key = ("family", b["scope"], b["kind"])
+        if _debounced(key, debounce_s):
+            continue
+        sc, cf = _score_confidence({"fx": _qa_fx_ok(fx, tol, cfg.get("meta", {}).get("fx_check", {}).get("feeds")),
+                                    "min_move": True})
+        label = _FAMILY_TEXT.get(b["kind"], f"Cluster {b['kind'].split('_')[0].upper()} über Limit")
+        scope = "" if b["scope"] == "family" else f" {b['scope'].capitalize()}"
+        a, v = _variant_text("derisk")
+        out.append({
+            "topic": "family_risk", "type": b["kind"], "book": b["scope"],
+            "what": f"{label}{scope}: {b['value']:.1%} (Limit {b['limit']:.1%}), Trim bevorzugt in {prefer.capitalize()}",
+            "value": b["value"], "limit": b["limit"],
+            "score": sc, "confidence": cf,
+            "variant_A": a, "variant_B": v
+        })
+    return out
 
 # ------------------------------------------------------------
 # Public API
 # ------------------------------------------------------------
 __all__ = ["run_alerts"]
 
-def run_alerts(name: str, cfg: dict | None = None) -> list:
+def run_alerts(name: str, cfg: dict | None = None, px: MarketState | None = None) -> list:
+    """px: optionaler MarketState statt data/prices_eur_snapshot.csv (z.B. Screening)."""
     cfg = cfg or {}
     nm = (name or "").strip().lower()
-    if nm == "mars":
-        return _run_for_mars(cfg)
-    if nm == "venus":
-        return _run_for_venus(cfg)
-    if nm == "family":
-        return _run_for_family(cfg)
-    return []
+    run = {"mars": _run_for_mars, "venus": _run_for_venus, "family": _run_for_family}.get(nm)
+    if run is None:
+        return []
+    with RULE_SECONDS.labels(nm).time():
+        out = run(cfg, px)
+    for a in out:
+        ALERTS.labels(nm, a.get("type") or a.get("topic") or "").inc()
+    return out
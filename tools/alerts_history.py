@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/alerts_history.py
+Indiziertes Archiv aller ausgegebenen Alerts (SQLite, nur Standardbibliothek):
+- run_alerts.py hängt jeden Lauf an (append_run)
+- Indizes auf Ticker, Buch, Regeltyp und Zeitstempel
+- Identität eines Alerts wie in tools/publish.py: Sektion, Ticker/Topic, Regel und
+  Geltungsbereich (scope = eigenes "book" des Alerts, z.B. Family-Breach je mars/venus)
+- Backfill aus alten docs/alerts.json / data/alerts_out.json (ingest)
+- CLI für Filter-/Aggregat-Abfragen:
+
+    python -m tools.alerts_history query --ticker NVDA --rule trim --since 90d --count
+    python -m tools.alerts_history query --group-by rule --since 365d
+    python -m tools.alerts_history ingest data/alerts_out.json
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ROOT / "data"
+HISTORY_DB = DATA_DIR / "alerts_history.sqlite"
+
+BOOKS = ("mars", "venus", "family")
+GROUP_COLS = {"ticker": "ticker", "book": "book", "rule": "rule", "day": "day"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id         INTEGER PRIMARY KEY,
+    ts         INTEGER NOT NULL,          -- Lauf-Zeitpunkt, Epoch-Sekunden UTC
+    day        TEXT    NOT NULL,          -- YYYY-MM-DD (UTC) für Tages-Aggregate
+    book       TEXT    NOT NULL,
+    ticker     TEXT    NOT NULL DEFAULT '',
+    rule       TEXT    NOT NULL DEFAULT '',
+    scope      TEXT    NOT NULL DEFAULT '',
+    score      REAL,
+    confidence INTEGER,
+    p_eur      REAL,
+    payload    TEXT    NOT NULL,
+    UNIQUE (ts, book, ticker, rule, scope)
+);
+CREATE INDEX IF NOT EXISTS ix_alerts_ticker ON alerts (ticker, ts);
+CREATE INDEX IF NOT EXISTS ix_alerts_book   ON alerts (book, ts);
+CREATE INDEX IF NOT EXISTS ix_alerts_rule   ON alerts (rule, ts);
+CREATE INDEX IF NOT EXISTS ix_alerts_ts     ON alerts (ts);
+"""
+
+_INSERT = ("INSERT OR IGNORE INTO alerts "
+           "(ts, day, book, ticker, rule, scope, score, confidence, p_eur, payload) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+# ------------------------------------------------------------
+# Hilfsfunktionen
+# ------------------------------------------------------------
+def _migrate(con: sqlite3.Connection) -> None:
+    """Archive ohne scope-Spalte: Tabelle neu anlegen (UNIQUE lässt sich nicht ändern), scope
+    aus dem Payload übernehmen und die früheren Ersatz-Ticker (FAMILY/MARS/VENUS) leeren."""
+    cols = [r[1] for r in con.execute("PRAGMA table_info(alerts)")]
+    if not cols or "scope" in cols:
+        return
+    rows = con.execute("SELECT ts, day, book, ticker, rule, score, confidence, p_eur, payload "
+                       "FROM alerts ORDER BY id").fetchall()
+    out = []
+    for ts, day, book, ticker, rule, score, conf, p_eur, payload in rows:
+        try:
+            scope = str(json.loads(payload).get("book") or "").lower()
+        except (TypeError, ValueError, AttributeError):
+            scope = ""
+        if book == "family" and scope and ticker == scope.upper():
+            ticker = ""
+        out.append((ts, day, book, ticker, rule, scope, score, conf, p_eur, payload))
+    with con:
+        con.execute("DROP TABLE alerts")
+        con.executescript(_SCHEMA)
+        con.executemany(_INSERT, out)
+
+def connect(db_path: Path = HISTORY_DB) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(str(db_path))
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    _migrate(con)
+    con.executescript(_SCHEMA)
+    return con
+
+def _parse_ts(s: str | None) -> datetime:
+    if not s:
+        return datetime.now(timezone.utc)
+    dt = datetime.fromisoformat(str(s).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def _parse_since(s: str) -> int:
+    """'90d', '12h', '2w' (relativ) oder ISO-Datum/-Zeit (absolut) -> Epoch-Sekunden."""
+    m = re.fullmatch(r"(\d+)([hdw])", s.strip().lower())
+    if m:
+        n, unit = int(m.group(1)), m.group(2)
+        delta = {"h": timedelta(hours=n), "d": timedelta(days=n), "w": timedelta(weeks=n)}[unit]
+        return int((datetime.now(timezone.utc) - delta).timestamp())
+    return int(_parse_ts(s).timestamp())
+
+def _float_or_none(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+def _rows_from_result(result: dict):
+    dt = _parse_ts(result.get("as_of_utc") or result.get("as_of"))
+    ts, day = int(dt.timestamp()), dt.strftime("%Y-%m-%d")
+    for key, sec in result.items():
+        book = str(key).lower()
+        if book not in BOOKS or not isinstance(sec, dict):
+            continue
+        for a in sec.get("alerts") or []:
+            if not isinstance(a, dict):
+                continue
+            yield (
+                ts, day, book,
+                str(a.get("ticker") or "").upper(),
+                str(a.get("type") or a.get("topic") or ""),
+                str(a.get("book") or "").lower(),
+                _float_or_none(a.get("score")),
+                a.get("confidence"),
+                _float_or_none(a.get("p_eur")),
+                json.dumps(a, ensure_ascii=False, separators=(",", ":")),
+            )
+
+# ------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------
+__all__ = ["append_run", "ingest_file", "query", "HISTORY_DB"]
+
+def append_run(result: dict, db_path: Path = HISTORY_DB) -> int:
+    """Hängt einen run_alerts-Lauf an; doppelte (ts, book, ticker, rule, scope) werden ignoriert."""
+    rows = list(_rows_from_result(result))
+    if not rows:
+        return 0
+    con = connect(db_path)
+    try:
+        with con:
+            before = con.total_changes
+            con.executemany(_INSERT, rows)
+            return con.total_changes - before
+    finally:
+        con.close()
+
+def ingest_file(path: Path, db_path: Path = HISTORY_DB) -> int:
+    path = Path(path)
+    result = json.loads(path.read_text(encoding="utf-8"))
+    if not (result.get("as_of_utc") or result.get("as_of")):
+        # ältere Dumps ohne Zeitstempel: Datei-mtime, damit Re-Ingest idempotent bleibt
+        result["as_of_utc"] = datetime.fromtimestamp(path.stat().st_mtime, timezone.utc).isoformat()
+    return append_run(result, db_path)
+
+def query(ticker: str | None = None, book: str | None = None, rule: str | None = None,
+          since: str | None = None, until: str | None = None,
+          group_by: str | None = None, limit: int | None = None,
+          db_path: Path = HISTORY_DB) -> list[dict]:
+    """
+    Filtert das Archiv. Ohne group_by: einzelne Alerts (neueste zuerst),
+    mit group_by (ticker|book|rule|day): Anzahl, Ø-Score, erster/letzter Zeitpunkt.
+    """
+    where, args = [], []
+    if ticker:
+        where.append("ticker = ?"); args.append(ticker.upper())
+    if book:
+        where.append("book = ?"); args.append(book.lower())
+    if rule:
+        where.append("rule = ?"); args.append(rule)
+    if since:
+        where.append("ts >= ?"); args.append(_parse_since(since))
+    if until:
+        where.append("ts < ?"); args.append(_parse_since(until))
+    cond = (" WHERE " + " AND ".join(where)) if where else ""
+
+    if group_by:
+        col = GROUP_COLS.get(group_by)
+        if not col:
+            raise ValueError(f"group_by muss eines von {sorted(GROUP_COLS)} sein: {group_by}")
+        sql = (f"SELECT {col} AS key, COUNT(*) AS n, AVG(score) AS avg_score, "
+               f"MIN(ts) AS first_ts, MAX(ts) AS last_ts FROM alerts{cond} "
+               f"GROUP BY {col} ORDER BY n DESC, key")
+    else:
+        sql = (f"SELECT ts, book, ticker, rule, scope, score, confidence, p_eur, payload "
+               f"FROM alerts{cond} ORDER BY ts DESC, id")
+    if limit:
+        sql += " LIMIT ?"; args.append(int(limit))
+
+    if not db_path.exists():
+        return []
+    con = connect(db_path)
+    con.row_factory = sqlite3.Row
+    try:
+        return [dict(r) for r in con.execute(sql, args)]
+    finally:
+        con.close()
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def _fmt_ts(ts) -> str:
+    return datetime.fromtimestamp(int(ts), timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+def _print_rows(rows: list[dict], grouped: bool) -> None:
+    if grouped:
+        for r in rows:
+            avg = "—" if r["avg_score"] is None else f"{r['avg_score']:.1f}"
+            print(f"{r['key'] or '-':<16} {r['n']:>7}  Ø-Score {avg:>5}  "
+                  f"{_fmt_ts(r['first_ts'])} … {_fmt_ts(r['last_ts'])}")
+        return
+    for r in rows:
+        p = "" if r["p_eur"] is None else f"  {r['p_eur']:.2f} €"
+        print(f"{_fmt_ts(r['ts'])}  {r['book']:<6} {r['ticker'] or r['scope'] or '-':<10} "
+              f"{r['rule']:<18} Score {r['score']} | Conf {r['confidence']}{p}")
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="alerts_history", description="Alert-Archiv abfragen")
+    ap.add_argument("--db", type=Path, default=HISTORY_DB)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    q = sub.add_parser("query", help="Alerts filtern/aggregieren")
+    q.add_argument("--ticker")
+    q.add_argument("--book", choices=BOOKS)
+    q.add_argument("--rule", help="Alert-Typ bzw. Topic, z.B. trim, tp, trim_t1")
+    q.add_argument("--since", help="z.B. 90d, 12h, 2w oder ISO-Datum")
+    q.add_argument("--until")
+    q.add_argument("--group-by", choices=sorted(GROUP_COLS))
+    q.add_argument("--limit", type=int)
+    q.add_argument("--count", action="store_true", help="nur Anzahl ausgeben")
+    q.add_argument("--json", action="store_true")
+
+    ing = sub.add_parser("ingest", help="alte alerts.json-Dateien nachtragen")
+    ing.add_argument("files", nargs="+", type=Path)
+
+    args = ap.parse_args(argv)
+
+    if args.cmd == "ingest":
+        for p in args.files:
+            print(f"[alerts-history] {p}: +{ingest_file(p, args.db)}")
+        return 0
+
+    t0 = time.perf_counter()
+    if args.count:
+        rows = query(args.ticker, args.book, args.rule, args.since, args.until,
+                     group_by="book", db_path=args.db)
+        n = sum(r["n"] for r in rows)
+        print(json.dumps({"count": n}) if args.json else n)
+    else:
+        rows = query(args.ticker, args.book, args.rule, args.since, args.until,
+                     args.group_by, args.limit, args.db)
+        if args.json:
+            for r in rows:
+                r.pop("payload", None)
+            print(json.dumps(rows, ensure_ascii=False, indent=2))
+        else:
+            _print_rows(rows, grouped=bool(args.group_by))
+    print(f"[alerts-history] {(time.perf_counter() - t0) * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,9 +5,10 @@ ROOT = pathlib.Path(__file__).resolve().parents[1]
 DATA = ROOT / "data"
 
 def read_lines(p):
+    # Inline-Kommentare ("SU.PA  # Schneider") abschneiden, nur den Ticker nehmen
     try:
-        return [ln.strip().upper() for ln in p.read_text(encoding="utf-8").splitlines()
-                if ln.strip() and not ln.strip().startswith("#")]
+        return [ln.split("#", 1)[0].split()[0].upper() for ln in p.read_text(encoding="utf-8").splitlines()
+                if ln.split("#", 1)[0].strip()]
     except Exception:
         return []
 
@@ -20,7 +21,8 @@ def main(max_n=5000):
                 venus.get("active",[]) + venus.get("inactive",[]))
 
     # Seeds & Radarlisten (NEU: ex130.txt)
-    for fname in ["universe_core.txt","universe_watch.txt","universe_all.txt","extended_universe.txt, "ex130.txt"    # <--- Ex-130 wird automatisch gemerged"]:
+    for fname in ["universe_core.txt","universe_watch.txt","universe_all.txt","extended_universe.txt",
+                  "ex130.txt"]:    # <--- Ex-130 wird automatisch gemerged
         ticks.update(read_lines(DATA/fname))
 
     # Ignore
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/bench.py
+Kleine Benchmark-Suite mit synthetischen Daten (kein Netzwerk):
+
+    python -m tools.bench              # alle Benchmarks
+    python -m tools.bench scoring      # nur ausgewählte
+    python -m tools.bench --n 10000    # Universumsgröße
+"""
+
+from __future__ import annotations
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+
+BENCHES = {}
+
+def bench(fn):
+    BENCHES[fn.__name__.removeprefix("bench_")] = fn
+    return fn
+
+def synthetic_panel(n: int, t: int = 260, seed: int = 7):
+    """(tickers, close, volume) mit Random-Walk-Kursen, float32 wie im Historien-Speicher."""
+    rng = np.random.default_rng(seed)
+    close = (100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (t, n)), axis=0))).astype(np.float32)
+    volume = rng.lognormal(13, 0.5, (t, n)).astype(np.float32)
+    tickers = np.array([f"T{i:05d}" for i in range(n)])
+    return tickers, close, volume
+
+def _timeit(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def _traced_bytes(build) -> tuple[int, object]:
+    """Speicher, den build() netto belegt (tracemalloc, nach GC)."""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, obj
+
+# ------------------------------------------------------------
+# Benchmarks
+# ------------------------------------------------------------
+@bench
+def bench_scoring(n: int) -> dict:
+    from tools.scoring import score_arrays
+    tickers, close, volume = synthetic_panel(n, t=130)
+    dt = _timeit(lambda: score_arrays(tickers, close, volume).top(15))
+    return {"tickers": n, "seconds": round(dt, 4)}
+
+@bench
+def bench_market_state(n: int) -> dict:
+    """Bytes je Ticker: Dict-pro-Zeile (alter Snapshot-Loader) vs. spaltenorientierter MarketState."""
+    from tools.market_state import COLUMNS, MarketState
+    # wie beim CSV-Lesen: Strings rein, neue Ticker-Strings und Floats entstehen beim Parsen
+    rng = np.random.default_rng(1)
+    rows = [(f"t{i:05d}", [f"{v:.6f}" for v in r])
+            for i, r in enumerate(rng.normal(100, 20, (n, len(COLUMNS))))]
+    keys = list(COLUMNS)
+
+    def as_dicts():
+        return {t.upper(): {**{k: float(v) for k, v in zip(keys, vals)}, "currency": "USD"}
+                for t, vals in rows}
+
+    def as_state():
+        st = MarketState(capacity=n)
+        for t, vals in rows:
+            st.put(t, currency="USD", as_of=0.0, **{k: float(v) for k, v in zip(keys, vals)})
+        return st
+
+    dict_b, _ = _traced_bytes(as_dicts)
+    state_b, st = _traced_bytes(as_state)
+    col = st.column("last_eur")
+    scan = _timeit(lambda: float((col > 100).sum()))
+    return {"tickers": n, "dict_bytes_per_ticker": round(dict_b / n),
+            "state_bytes_per_ticker": round(state_b / n), "vector_scan_s": round(scan, 6)}
+
+@bench
+def bench_dca(n: int) -> dict:
+    """Szenarien/s: alle Ticker × 12 Zeitplan-Varianten über 5 Jahre Tageskurse."""
+    import pandas as pd
+    from tools.dca_sim import schedule_grid, simulate_grid
+    n = min(n, 2000)
+    _, close, _ = synthetic_panel(n, t=1300)
+    dates = pd.bdate_range("2020-01-01", periods=1300).values
+    scheds = schedule_grid()
+    dt = _timeit(lambda: simulate_grid(close, dates, scheds), repeat=1)
+    return {"scenarios": n * len(scheds), "seconds": round(dt, 3)}
+
+@bench
+def bench_metrics(n: int) -> dict:
+    """ns je Ereignis im Hot-Path (Ziel: < 1 µs)."""
+    from tools.metrics import Registry, Counter, Histogram
+    reg = Registry()
+    c = reg._get(Counter, "bench_events", "", ("rule",)).labels("tp")
+    h = reg._get(Histogram, "bench_seconds", "", ())
+    obs = h._default
+
+    def timed():
+        with h.time():
+            pass
+
+    def per_event(fn, k: int = 200_000) -> float:
+        return round(_timeit(lambda: [fn() for _ in range(k)], repeat=3) / k * 1e9, 1)
+
+    return {"counter_ns": per_event(c.inc), "observe_ns": per_event(lambda: obs.observe(0.02)),
+            "timer_ns": per_event(timed)}
+
+@bench
+def bench_volume(n: int) -> dict:
+    """Robuste Volumen-Scores: Universum vektorisiert (ms) vs. Streaming je Update (µs)."""
+    from tools.volume_anomaly import RollingMedianMAD, daily_scores, rolling_median_mad
+    _, _, volume = synthetic_panel(n, t=60)
+    dt_last = _timeit(lambda: daily_scores(volume))
+    dt_full = _timeit(lambda: rolling_median_mad(volume), repeat=3)
+    r, xs = RollingMedianMAD(), [float(v) for v in volume[:, 0]] * 500
+    dt_stream = _timeit(lambda: [(r.update(x), r.mad()) for x in xs], repeat=3)
+    return {"last_ms": round(dt_last * 1e3, 1), "rolling_ms": round(dt_full * 1e3, 1),
+            "update_us": round(dt_stream / len(xs) * 1e6, 2)}
+
+@bench
+def bench_pivots(n: int) -> dict:
+    """Rolling-Min/Max + Swing-Pivots: van Herk/Gil-Werman über (T, N) vs. Deque je Kerze."""
+    from tools.pivots import RollingExtreme, levels, rolling_min
+    _, close, _ = synthetic_panel(n)
+    high, low = close * 1.01, close * 0.99
+    dt_levels = _timeit(lambda: levels(high, low, close), repeat=3)
+    dt_vhgw = _timeit(lambda: rolling_min(low, 20), repeat=3)
+    xs = [float(v) for v in low[:, 0]] * 200
+    re = RollingExtreme(20)
+    dt_dq = _timeit(lambda: [re.push(x) for x in xs], repeat=3)
+    return {"levels_ms": round(dt_levels * 1e3, 1), "rolling_min20_ms": round(dt_vhgw * 1e3, 1),
+            "deque_push_us": round(dt_dq / len(xs) * 1e6, 3)}
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="bench")
+    ap.add_argument("names", nargs="*", help=f"Auswahl aus {sorted(BENCHES)}")
+    ap.add_argument("--n", type=int, default=5000, help="Anzahl Ticker")
+    args = ap.parse_args(argv)
+
+    for name in args.names or sorted(BENCHES):
+        res = BENCHES[name](args.n)
+        print(f"[bench] {name:<16} " + " ".join(f"{k}={v}" for k, v in res.items()))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
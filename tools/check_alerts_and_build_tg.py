@@ -1,44 +1,73 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import json, pathlib, argparse, os
+import json, pathlib, argparse, hashlib
 
 ALERTS_JSON = pathlib.Path("docs/alerts.json")
+DELTA_JSON  = pathlib.Path("docs/alerts/delta.json")   # nur neue Alerts (tools/publish.py)
 OUT_TXT     = pathlib.Path("/tmp/tg_msg.txt")
+SENT_JSON   = pathlib.Path("data/tg_last_delta.json")   # zuletzt gesendeter Stand (committet)
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--run-url", default="", help="Link zum CI-Run")
-    args = ap.parse_args()
-
+def _load(p: pathlib.Path):
     try:
-        d = json.loads(ALERTS_JSON.read_text(encoding="utf-8"))
+        return json.loads(p.read_text(encoding="utf-8"))
     except Exception:
-        d = {}
+        return None
+
+def _batch_id(alerts) -> str:
+    """Kennung eines Stands: as_of des Deltas (bzw. alerts.json) + Hash der Alert-Schlüssel."""
+    src = _load(DELTA_JSON) if DELTA_JSON.exists() else _load(ALERTS_JSON)
+    as_of = (src or {}).get("as_of_utc", "") if isinstance(src, dict) else ""
+    keys = sorted(str(a.get("key") or (a.get("book"), a.get("ticker") or a.get("topic"), a.get("type")))
+                  for a in alerts)
+    return f"{as_of}|{hashlib.sha256(json.dumps(keys).encode('utf-8')).hexdigest()[:16]}"
 
-    found = False
+def _new_alerts():
+    """Neue Alerts aus dem Delta (wenige hundert Bytes); Fallback: Gesamtdokument."""
+    delta = _load(DELTA_JSON)
+    if isinstance(delta, dict):
+        return delta.get("new") or []
+    d = _load(ALERTS_JSON) or {}
+    out = []
     for k in ("mars","venus","family"):
         sec = d.get(k)
-        if isinstance(sec, dict) and sec.get("alerts"):
-            if len(sec["alerts"]) > 0:
-                found = True
-                break
+        if isinstance(sec, dict):
+            out += [{"book": k, **a} for a in sec.get("alerts") or [] if isinstance(a, dict)]
+    return out
 
-    if not found:
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--run-url", default="", help="Link zum CI-Run")
+    ap.add_argument("--mark-sent", action="store_true",
+                    help="aktuellen Stand als gesendet merken (nach erfolgreichem sendMessage)")
+    args = ap.parse_args()
+
+    alerts = _new_alerts()
+    batch = _batch_id(alerts)
+    if args.mark_sent:
+        SENT_JSON.parent.mkdir(parents=True, exist_ok=True)
+        SENT_JSON.write_text(json.dumps({"batch": batch}, indent=2) + "\n", encoding="utf-8")
+        return 0
+    if not alerts:
         return 0  # kein /tmp/tg_msg.txt => Step sendet nichts
+    # Producer schreiben delta.json nur, wenn sie laufen – derselbe Stand wird nicht erneut gesendet
+    if (_load(SENT_JSON) or {}).get("batch") == batch:
+        print(f"Delta {batch} bereits gesendet.")
+        return 0
 
     lines = []
     lines.append("🚨 Alerts-Run (Mars/Venus)")
     if args.run_url:
         lines.append(args.run_url)
     lines.append("")
-    lines.append("--- Erste Zeilen aus docs/alerts.json ---")
+    lines.append(f"--- {len(alerts)} neue Alerts ---")
 
-    # präge Kurzvorschau
-    try:
-        preview = ALERTS_JSON.read_text(encoding="utf-8").splitlines()[:10]
-        lines.extend(preview)
-    except Exception:
-        pass
+    # Kurzvorschau: eine Zeile je Alert
+    for a in alerts[:10]:
+        who = a.get("ticker") or a.get("topic") or "?"
+        lines.append(f"{str(a.get('book', '')).capitalize()} {who} [{a.get('type') or a.get('topic', '')}] "
+                     f"Score {a.get('score', '–')} | Conf {a.get('confidence', '–')} — {a.get('what', '')}")
+    if len(alerts) > 10:
+        lines.append(f"… +{len(alerts) - 10} weitere")
 
     OUT_TXT.write_text("\n".join(lines), encoding="utf-8")
     return 0
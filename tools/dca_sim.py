@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/dca_sim.py
+Sparplan-/DCA-Simulation über die gespeicherte EUR-Historie:
+- alle Sparplan-Ticker (portfolios.json) und alle Zeitplan-Varianten auf einmal:
+  Preise (T, N) × Beitragsvektoren (V, T) → Anteile per cumsum, vollständig vektorisiert
+- Varianten: monatlich / zweiwöchentlich, Ausführungstag, Startzeitpunkt
+- Kennzahlen je Plan: Endwert, eingezahlt, IRR (money-weighted, p.a.) und
+  max. Drawdown des zeitgewichteten Anteilswerts (Depotwert/Anteile) – das Verhältnis
+  Depotwert/Einzahlungen fällt bei jeder Einzahlung und taugt dafür nicht
+- Zeitpläne, deren Start vor dem ersten Kurs des Tickers liegt, werden nicht still auf
+  die vorhandene Historie gekürzt, sondern ausgelassen (--refresh lädt die nötige Spanne)
+- große Gitter werden über Ticker-Blöcke auf mehrere Prozesse verteilt
+- Simulation mit 1 € je Monat; Endwerte skalieren linear mit der Sparrate
+
+    python -m tools.dca_sim                       # Sparpläne aus portfolios.json
+    python -m tools.dca_sim --grid --years 3 5    # Varianten-Gitter
+    python -m tools.dca_sim --years 5 --refresh   # Historie vorher auf 6y erweitern
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from tools.history_store import HistoryPanel, load_panel
+from tools.relative_strength import ffill
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+PORTF = DATA / "portfolios.json"
+OUT = DATA / "dca_sim_out.json"
+
+DEFAULT_MONTHLY_EUR = 100.0
+PARALLEL_MIN_CELLS = 5_000_000   # ab V×T×N Zellen lohnt der Prozess-Pool
+START_GRACE_DAYS = 7             # erster Kurs darf so viel nach dem Soll-Start liegen (Wochenende/Feiertage)
+
+@dataclass(frozen=True)
+class Schedule:
+    freq: str = "monthly"        # monthly | biweekly
+    day: int = 1                 # Kalendertag (monthly) bzw. Tages-Offset (biweekly)
+    years: float = 3.0           # Start = Ende − years
+
+    @property
+    def name(self) -> str:
+        return f"{self.freq}/d{self.day}/{self.years:g}y"
+
+@dataclass(frozen=True)
+class Plan:
+    book: str
+    ticker: str
+    monthly_eur: float
+
+# ------------------------------------------------------------
+# Pläne & Zeitpläne
+# ------------------------------------------------------------
+def load_plans(portfolios: dict | None = None, default_eur: float = DEFAULT_MONTHLY_EUR) -> list[Plan]:
+    """
+    Sparpläne aus portfolios.json: Listen (Betrag = default_eur) oder {ticker: €/Monat}.
+    Notgroschen-Einträge sind Namen (z.B. "S&P500_ETF"); sie werden nur simuliert,
+    wenn notgroschen.symbols sie auf einen Ticker abbildet.
+    """
+    if portfolios is None:
+        portfolios = json.loads(PORTF.read_text(encoding="utf-8")) if PORTF.exists() else {}
+    plans = []
+    for book in ("mars", "venus"):
+        sp = (portfolios.get(book) or {}).get("sparplan") or []
+        items = sp.items() if isinstance(sp, dict) else ((t, default_eur) for t in sp)
+        plans += [Plan(book, str(t).upper(), float(a)) for t, a in items if float(a) > 0]
+    ng = portfolios.get("notgroschen") or {}
+    symbols = ng.get("symbols") or {}
+    for name, eur in (ng.get("sparplan") or {}).items():
+        if name in symbols and float(eur) > 0:
+            plans.append(Plan("notgroschen", symbols[name].upper(), float(eur)))
+    return plans
+
+def schedule_grid(freqs=("monthly", "biweekly"), days=(1, 15), years=(1.0, 3.0, 5.0)) -> list[Schedule]:
+    return [Schedule(f, d, y) for f in freqs for d in days for y in years]
+
+def requested_start(end, sched: Schedule) -> pd.Timestamp:
+    return pd.Timestamp(end) - pd.DateOffset(days=int(round(sched.years * 365.25)))
+
+def history_period(schedules: list[Schedule]) -> str:
+    """yfinance-Periode, die alle Zeitpläne abdeckt (für history_store refresh)."""
+    return f"{math.ceil(max(s.years for s in schedules)) + 1}y"
+
+def contributions(dates: np.ndarray, sched: Schedule) -> np.ndarray:
+    """(T,) Beitrag je Session in €, normiert auf 1 € pro Monat."""
+    idx = pd.DatetimeIndex(dates)
+    out = np.zeros(len(idx))
+    if not len(idx):
+        return out
+    end = idx[-1]
+    start = max(idx[0], requested_start(end, sched))
+    if sched.freq == "monthly":
+        anchors = pd.date_range(start.to_period("M").to_timestamp(), end, freq="MS") + pd.Timedelta(days=sched.day - 1)
+        amount = 1.0
+    elif sched.freq == "biweekly":
+        anchors = pd.date_range(start + pd.Timedelta(days=sched.day - 1), end, freq="14D")
+        amount = 12.0 / 26.0
+    else:
+        raise ValueError(f"unbekannte Frequenz: {sched.freq}")
+    anchors = anchors[(anchors >= start) & (anchors <= end)]
+    pos = np.unique(np.searchsorted(idx.values, anchors.values))  # erste Session am/nach dem Anker
+    pos = pos[pos < len(idx)]
+    out[pos] = amount
+    return out
+
+# ------------------------------------------------------------
+# Kern (vektorisiert über Varianten × Ticker)
+# ------------------------------------------------------------
+def _irr(paid: np.ndarray, final: np.ndarray, tau: np.ndarray, iters: int = 50) -> np.ndarray:
+    """
+    Money-weighted IRR p.a. für alle (V, N) gleichzeitig (Newton):
+    Σ_t c[v,t,n] · (1+r)^τ_t = FV[v,n], τ_t = Jahre bis zum Ende.
+    """
+    c = np.moveaxis(paid, 1, 2)                                        # (V, N, T)
+    ct = c * tau
+    r = np.full(final.shape, 0.05)
+    for _ in range(iters):
+        growth = np.exp(np.log1p(r)[:, :, None] * tau)                 # (V, N, T)
+        f = np.einsum("vnt,vnt->vn", c, growth) - final
+        df = np.einsum("vnt,vnt->vn", ct, growth) / (1.0 + r)
+        step = np.where(np.abs(df) > 1e-12, f / np.where(np.abs(df) > 1e-12, df, 1.0), 0.0)
+        r = np.clip(r - step, -0.99, 10.0)
+        if not np.isfinite(step).any() or np.nanmax(np.abs(step)) < 1e-8:
+            break
+    return r
+
+def simulate(prices: np.ndarray, dates: np.ndarray, schedules: list[Schedule]) -> dict[str, np.ndarray]:
+    """
+    prices: (T, N) EUR-Schlusskurse. Rückgabe je Kennzahl ein Array (V, N)
+    bei 1 €/Monat: final_value, invested, irr, max_drawdown, n_contrib, covered
+    (False, wenn der erste Kurs des Tickers nach dem Soll-Start des Zeitplans liegt).
+    """
+    P = ffill(prices.astype(np.float64))
+    T, N = P.shape
+    C = np.vstack([contributions(dates, s) for s in schedules])        # (V, T)
+    # vor dem ersten Kurs eines Tickers wird nichts gekauft und nichts eingezahlt
+    valid = np.isfinite(P) & (P > 0)                                   # (T, N)
+    buy = np.where(valid[None], C[:, :, None] / np.where(valid, P, 1.0)[None], 0.0)  # (V, T, N)
+    paid = np.where(valid[None], C[:, :, None], 0.0)
+    units = np.cumsum(buy, axis=1)
+    invested = np.cumsum(paid, axis=1)
+    value = units * np.where(valid, P, 0.0)[None]
+
+    # zeitgewichteter Anteilswert (NAV je Anteil) ab dem ersten Kauf; Einzahlungen ändern ihn nicht
+    with np.errstate(invalid="ignore", divide="ignore"):
+        nav = np.where(units > 0, value / units, np.nan)
+    peak = np.fmax.accumulate(nav, axis=1)
+    with np.errstate(invalid="ignore"):
+        dd = np.nanmin(np.where(np.isfinite(nav), nav / peak - 1.0, 0.0), axis=1)
+
+    idx = pd.DatetimeIndex(dates)
+    first = np.where(valid.any(axis=0), valid.argmax(axis=0), T - 1)                 # (N,)
+    grace = pd.Timedelta(days=START_GRACE_DAYS)
+    covered = np.array([[idx[f] <= requested_start(idx[-1], s) + grace for f in first] for s in schedules]) \
+        if T else np.zeros((len(schedules), N), dtype=bool)
+
+    tau = (pd.DatetimeIndex(dates)[-1] - pd.DatetimeIndex(dates)).days.to_numpy() / 365.25
+    final = value[:, -1, :]
+    irr = _irr(paid, final, tau)
+    return {
+        "final_value": final,
+        "invested": invested[:, -1, :],
+        "irr": np.where(invested[:, -1, :] > 0, irr, np.nan),
+        "max_drawdown": dd,
+        "n_contrib": (paid > 0).sum(axis=1),
+        "covered": covered,
+    }
+
+def _simulate_chunk(args):
+    prices, dates, schedules = args
+    return simulate(prices, dates, schedules)
+
+def simulate_grid(prices: np.ndarray, dates: np.ndarray, schedules: list[Schedule],
+                  workers: int | None = None) -> dict[str, np.ndarray]:
+    """Wie simulate(); große Gitter werden in Ticker-Blöcken parallel gerechnet."""
+    T, N = prices.shape
+    cells = len(schedules) * T * N
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or cells < PARALLEL_MIN_CELLS or N < 2 * workers:
+        return simulate(prices, dates, schedules)
+    blocks = np.array_split(np.arange(N), workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(_simulate_chunk, [(prices[:, b], dates, schedules) for b in blocks]))
+    return {k: np.concatenate([p[k] for p in parts], axis=1) for k in parts[0]}
+
+# ------------------------------------------------------------
+# Report
+# ------------------------------------------------------------
+def run_plans(panel: HistoryPanel, plans: list[Plan], schedules: list[Schedule],
+              workers: int | None = None) -> list[dict]:
+    tickers = sorted({p.ticker for p in plans if p.ticker in panel})
+    if not tickers:
+        return []
+    sub = panel.select(tickers)
+    res = simulate_grid(sub.field("close", eur=True), sub.dates, schedules, workers)
+    col = {t: i for i, t in enumerate(sub.tickers.tolist())}
+    rows = []
+    for p in plans:
+        i = col.get(p.ticker)
+        if i is None:
+            continue
+        for v, s in enumerate(schedules):
+            if not res["covered"][v, i]:
+                continue
+            rows.append({
+                "book": p.book, "ticker": p.ticker, "schedule": s.name, "monthly_eur": p.monthly_eur,
+                "invested_eur": round(float(res["invested"][v, i]) * p.monthly_eur, 2),
+                "final_value_eur": round(float(res["final_value"][v, i]) * p.monthly_eur, 2),
+                "irr": _r(res["irr"][v, i]),
+                "max_drawdown": _r(res["max_drawdown"][v, i]),
+                "contributions": int(res["n_contrib"][v, i]),
+            })
+    return rows
+
+def _r(x, nd: int = 4):
+    return round(float(x), nd) if np.isfinite(x) else None
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="dca_sim")
+    ap.add_argument("--grid", action="store_true", help="alle Varianten (Frequenz × Tag × Jahre)")
+    ap.add_argument("--years", type=float, nargs="*", default=[3.0])
+    ap.add_argument("--amount", type=float, default=DEFAULT_MONTHLY_EUR,
+                    help="€/Monat für Sparpläne ohne hinterlegten Betrag")
+    ap.add_argument("--workers", type=int)
+    ap.add_argument("--refresh", action="store_true",
+                    help="Historie der Sparplan-Ticker vorher auf die nötige Spanne erweitern")
+    args = ap.parse_args(argv)
+
+    scheds = schedule_grid(years=tuple(args.years)) if args.grid else [Schedule(years=y) for y in args.years]
+    plans = load_plans(default_eur=args.amount)
+    if args.refresh:
+        from tools.history_store import refresh
+        refresh(sorted({p.ticker for p in plans}), history_period(scheds))
+    t0 = time.perf_counter()
+    panel = load_panel()
+    rows = run_plans(panel, plans, scheds, args.workers)
+    dt = time.perf_counter() - t0
+    done = {(r["ticker"], r["schedule"]) for r in rows}
+    skipped = sorted({f"{p.ticker} {s.name}" for p in plans if p.ticker in panel for s in scheds
+                      if (p.ticker, s.name) not in done})
+    OUT.write_text(json.dumps({"schedules": [s.name for s in scheds], "plans": rows, "skipped": skipped},
+                              ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[dca] {len(plans)} plans × {len(scheds)} schedules → {len(rows)} scenarios in {dt:.2f}s")
+    if skipped:
+        print(f"[dca] {len(skipped)} Szenarien ohne ausreichende Historie ausgelassen "
+              f"(`python -m tools.dca_sim --refresh` bzw. history_store refresh --period {history_period(scheds)})")
+    for r in rows[:20]:
+        irr = "—" if r["irr"] is None else f"{r['irr'] * 100:+.1f}%"
+        mdd = "—" if r["max_drawdown"] is None else f"{r['max_drawdown'] * 100:.1f}%"
+        print(f"  {r['book']:<6} {r['ticker']:<9} {r['schedule']:<18} "
+              f"{r['invested_eur']:>9.0f} € → {r['final_value_eur']:>9.0f} €  IRR {irr}  MaxDD {mdd}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
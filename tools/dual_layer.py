@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/dual_layer.py
+Dual-Layer-Auswertung (meta.dual_layer: "USD reference, EUR action"):
+- FX-Gegenprobe über mehrere Feeds (data/fx_snapshot.csv): Median, Ausreißer
+  jenseits meta.fx_check.tolerance, ok nur bei Mehrheit gültiger Feeds; sind die Feeds
+  aktuell (Spalte as_of, höchstens meta.fx_check.max_age_minutes älter als der
+  Preis-Snapshot), muss auch der live zur Umrechnung benutzte EURUSD=X-Kurs innerhalb
+  der Toleranz liegen – undatierte/veraltete Feeds werden nicht gegen live verglichen
+- Signale je Ticker parallel in Notierungswährung (loc) und EUR als Arrays,
+  in einem Durchlauf über das ganze Universum (MarketState-Spalten)
+- nur EUR darf auslösen; fx_only markiert Trigger, die allein durch die
+  Währungsbewegung entstehen (EUR ja, Notierungswährung nein)
+
+    python -m tools.dual_layer                # FX-Gegenprobe + FX-only-Divergenzen im Snapshot
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import csv
+import json
+import re
+
+import numpy as np
+
+from tools.market_state import MarketState, _parse_ts
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+FX_SNAP = DATA / "fx_snapshot.csv"
+CFG_FILE = DATA / "alerts_config.json"
+
+DEFAULT_TOL = 0.002
+DEFAULT_MAX_AGE_MIN = 60
+
+# ------------------------------------------------------------
+# FX-Feeds
+# ------------------------------------------------------------
+def _feed_key(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+def load_fx_snapshot(path: Path = FX_SNAP) -> dict:
+    """
+    {"pairs": {PAIR: rate}, "feeds": {Quelle: EURUSD}, "as_of": Epoch} aus fx_snapshot.csv;
+    versteht beide Formate (pair,rate bzw. source,rate – Letzteres sind EURUSD-Quotes);
+    as_of = jüngster Zeitstempel der optionalen Spalte as_of (NaN ohne).
+    """
+    out = {"pairs": {}, "feeds": {}, "as_of": float("nan")}
+    if not path.exists():
+        return out
+    with path.open("r", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            try:
+                rate = float(r["rate"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            try:
+                out["as_of"] = float(np.fmax(out["as_of"], _parse_ts((r.get("as_of") or "").strip())))
+            except ValueError:
+                pass
+            if r.get("pair"):
+                out["pairs"][r["pair"].strip().upper()] = rate
+            elif r.get("source"):
+                out["feeds"][r["source"].strip()] = rate
+    return out
+
+def live_eurusd(state: MarketState) -> float:
+    """EURUSD, mit dem der Snapshot umgerechnet wurde: Median 1/fx_eur der USD-Ticker (NaN ohne)."""
+    if not len(state):
+        return float("nan")
+    fx = state.column("fx_eur")[state.currency_of() == "USD"]
+    fx = fx[np.isfinite(fx) & (fx > 0)]
+    return float(1.0 / np.median(fx)) if len(fx) else float("nan")
+
+def live_reference(state: MarketState, feeds_as_of: float,
+                   max_age_min: float = DEFAULT_MAX_AGE_MIN) -> float | None:
+    """
+    live_eurusd() für die Gegenprobe – nur, wenn die Feed-Quotes höchstens max_age_min
+    älter sind als der Preis-Snapshot; sonst None (ein veralteter Feed-Stand würde jeden
+    Lauf an der Kursbewegung seit damals scheitern lassen).
+    """
+    if not len(state) or not np.isfinite(feeds_as_of):
+        return None
+    ts = state.as_of[:len(state)]
+    ts = ts[np.isfinite(ts)]
+    if len(ts) and feeds_as_of < ts.max() - 60.0 * max_age_min:
+        return None
+    return live_eurusd(state)
+
+def fx_crosscheck(feeds: dict[str, float], tol: float = DEFAULT_TOL, expected=None,
+                  live: float | None = None) -> dict:
+    """
+    Median der Feeds, Ausreißer (|rate/median − 1| > tol), ok = Mehrheit der
+    erwarteten Feeds vorhanden und innerhalb der Toleranz; mit `live` (der tatsächlich
+    zur Umrechnung benutzte Kurs) zusätzlich |live/median − 1| ≤ tol – sonst sind die
+    Feeds veraltet oder die Umrechnung falsch.
+    """
+    names = list(feeds)
+    rates = np.array([feeds[n] for n in names], dtype=np.float64)
+    valid = np.isfinite(rates) & (rates > 0)
+    res = {"median": float("nan"), "n": int(valid.sum()), "outliers": [], "missing": [],
+           "max_dev": float("nan"), "live_dev": float("nan"), "ok": False}
+    if expected:
+        have = {_feed_key(n) for n, v in zip(names, valid) if v}
+        res["missing"] = [e for e in expected if _feed_key(e) not in have]
+    if not valid.any():
+        return res
+    med = float(np.median(rates[valid]))
+    dev = np.abs(rates / med - 1.0)
+    bad = valid & (dev > tol)
+    good = int((valid & ~bad).sum())
+    need = (len(expected) if expected else int(valid.sum())) // 2 + 1
+    res.update(median=med, outliers=[n for n, b in zip(names, bad) if b],
+               max_dev=float(dev[valid].max()), ok=good >= max(2, need))
+    if live is not None and np.isfinite(live) and live > 0:
+        res["live_dev"] = abs(live / med - 1.0)
+        res["ok"] = res["ok"] and res["live_dev"] <= tol
+    return res
+
+# ------------------------------------------------------------
+# Signale in beiden Layern
+# ------------------------------------------------------------
+def layers(state: MarketState, idx: np.ndarray | None = None) -> dict[str, dict[str, np.ndarray]]:
+    """
+    {"eur": {...}, "loc": {...}} mit chg (intraday), vs5d, below_dma50, below_low5,
+    pivot_break je Ticker. Niveaus (DMA50, LOW5, Pivots) werden zum aktuellen Kurs
+    umgerechnet – Vergleiche damit sind in beiden Layern gleich; die Renditen
+    unterscheiden sich um die Wechselkursbewegung.
+    """
+    n = len(state)
+    idx = np.arange(n) if idx is None else np.asarray(idx, dtype=np.intp)
+    col = lambda k: state.column(k)[idx].astype(np.float64)   # noqa: E731
+    last, prev = col("last_eur"), col("prevClose_eur")
+    fx, fx_prev, fx_5d = col("fx_eur"), col("fx_eur_prev"), col("fx_eur_5d")
+    # ohne FX-Spalten (alter Snapshot): neutral, beide Layer identisch
+    fx = np.where(np.isfinite(fx) & (fx > 0), fx, 1.0)
+    fx_prev = np.where(np.isfinite(fx_prev) & (fx_prev > 0), fx_prev, fx)
+    fx_5d = np.where(np.isfinite(fx_5d) & (fx_5d > 0), fx_5d, fx)
+
+    chg_eur = col("change_intraday_pct")
+    vs5d_eur = col("vs5d_pct")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # EUR-Rendite = (1 + r_loc) · fx/fx_alt − 1  →  r_loc zurückrechnen
+        chg_loc = (1.0 + chg_eur) * fx_prev / fx - 1.0
+        vs5d_loc = (1.0 + vs5d_eur) * fx_5d / fx - 1.0
+        below = {k: last < col(c) for k, c in (("below_dma50", "dma50_eur"), ("below_low5", "low5_eur"),
+                                               ("pivot_break", "pivot_low_eur"))}
+    eur = {"chg": chg_eur, "vs5d": vs5d_eur, "last": last, "prev": prev, **below}
+    loc = {"chg": chg_loc, "vs5d": vs5d_loc, "last": last / fx, "prev": prev / fx_prev, **below}
+    return {"eur": eur, "loc": loc}
+
+def trigger(lay: dict, signal: str, op: str, threshold: float) -> tuple[np.ndarray, np.ndarray]:
+    """(Trigger EUR, nur-FX) für signal op threshold; op ∈ {'<=', '>='}."""
+    cmp = np.less_equal if op == "<=" else np.greater_equal
+    with np.errstate(invalid="ignore"):
+        eur = cmp(lay["eur"][signal], threshold)
+        loc = cmp(lay["loc"][signal], threshold)
+    return eur, eur & ~loc
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="dual_layer")
+    ap.add_argument("--snapshot", type=Path, default=DATA / "prices_eur_snapshot.csv")
+    args = ap.parse_args(argv)
+
+    try:
+        meta = json.loads(CFG_FILE.read_text(encoding="utf-8")).get("meta", {})
+    except Exception:
+        meta = {}
+    fc = meta.get("fx_check", {})
+    st = MarketState.from_snapshot_csv(args.snapshot)
+    snap = load_fx_snapshot()
+    live = live_reference(st, snap["as_of"], fc.get("max_age_minutes", DEFAULT_MAX_AGE_MIN))
+    chk = fx_crosscheck(snap["feeds"], fc.get("tolerance", DEFAULT_TOL), fc.get("feeds"), live)
+    print(f"[fx] median={chk['median']:.5f} n={chk['n']} max_dev={chk['max_dev']:.4%} "
+          f"live={'– (Feeds undatiert/veraltet)' if live is None else f'{live:.5f}'} "
+          f"live_dev={chk['live_dev']:.4%} ok={chk['ok']} "
+          f"outliers={chk['outliers']} missing={chk['missing']}")
+
+    if not len(st):
+        return 0
+    lay = layers(st)
+    d_chg = lay["eur"]["chg"] - lay["loc"]["chg"]
+    order = np.argsort(-np.abs(np.nan_to_num(d_chg)))[:10]
+    print(f"[dual] {len(st)} tickers; größte FX-Anteile an der Tagesbewegung:")
+    for i in order:
+        if np.isfinite(d_chg[i]) and d_chg[i] != 0:
+            print(f"  {st.tickers[i]:<10} eur={lay['eur']['chg'][i]:+.2%} loc={lay['loc']['chg'][i]:+.2%}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
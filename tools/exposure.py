@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/exposure.py
+Exposure-Aggregator für Buch (Mars/Venus) und Family:
+- hält Positionen je Buch (Stückzahl, Einstand in EUR) plus Cash
+- pflegt Depotwert, P&L, Drawdown vom Hoch, Investitionsquote und Cluster-Gewichte
+- ein Preis-Tick aktualisiert nur die betroffenen Positionen, ihr Buch und ihre
+  Cluster (O(geänderte Positionen)); kein Neu-Summieren des ganzen Depots
+- Limits aus alerts_config.json (family.risk/exposure/cluster) mit Fallback auf
+  portfolios.json (family.risk_limits/exposure_limits/clusters)
+- Hochs (Peaks) überleben Läufe in data/exposure_peaks.json (versioniert und von den
+  CI-Workflows mitcommittet; data/state/ ist dort bei jedem Lauf leer)
+
+Positionen (optional) in data/positions.json:
+    {"mars":  {"cash_eur": 2500, "positions": {"MSFT": {"qty": 12, "cost_eur": 3900}}},
+     "venus": {"cash_eur": 1800, "positions": {"NVDA": {"qty": 40, "cost_eur": 2100}}}}
+
+    python -m tools.exposure            # Kennzahlen aus dem aktuellen Snapshot
+"""
+
+from __future__ import annotations
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import json
+
+import numpy as np
+
+from tools.market_state import MarketState
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+POSITIONS = DATA / "positions.json"
+PORTF = DATA / "portfolios.json"
+STATE_FILE = DATA / "exposure_peaks.json"
+
+BOOKS = ("mars", "venus")
+DEFAULT_CLUSTERS = {"nvda": ["NVDA"]}
+
+class Exposure:
+    """
+    Flache Positions-Slots (ein Slot je Buch × Ticker) plus Aggregate je Buch.
+    Family-Werte sind Summen über die (wenigen) Bücher.
+    """
+    __slots__ = ("books", "tickers", "book_id", "qty", "cost", "price", "holders",
+                 "value", "cash", "cost_sum", "unpriced", "peak", "family_peak",
+                 "cluster_of", "cluster_value")
+
+    def __init__(self, positions: dict, clusters: dict[str, list[str]] | None = None):
+        self.books = [b for b in BOOKS if b in positions] + [b for b in positions if b not in BOOKS]
+        slots = [(bi, str(t).upper(), p) for bi, b in enumerate(self.books)
+                 for t, p in ((positions[b] or {}).get("positions") or {}).items()]
+        self.tickers = [t for _, t, _ in slots]
+        self.book_id = np.array([bi for bi, _, _ in slots], dtype=np.intp)
+        self.qty = np.array([float(p.get("qty", 0.0)) if isinstance(p, dict) else float(p)
+                             for _, _, p in slots])
+        self.cost = np.array([float(p.get("cost_eur", 0.0)) if isinstance(p, dict) else 0.0
+                              for _, _, p in slots])
+        self.price = np.full(len(slots), np.nan)
+        self.holders: dict[str, np.ndarray] = {}
+        for i, t in enumerate(self.tickers):
+            self.holders.setdefault(t, []).append(i)
+        self.holders = {t: np.array(ix, dtype=np.intp) for t, ix in self.holders.items()}
+
+        nb = len(self.books)
+        self.value = np.zeros(nb)
+        self.cash = np.array([float((positions[b] or {}).get("cash_eur", 0.0)) for b in self.books])
+        self.cost_sum = np.bincount(self.book_id, weights=self.cost, minlength=nb)
+        self.unpriced = np.bincount(self.book_id, minlength=nb).astype(np.intp)
+        self.peak = np.full(nb, np.nan)
+        self.family_peak = float("nan")
+
+        clusters = DEFAULT_CLUSTERS if clusters is None else clusters
+        self.cluster_of: dict[str, list[str]] = {}
+        for c, members in clusters.items():
+            for t in members:
+                self.cluster_of.setdefault(str(t).upper(), []).append(c)
+        self.cluster_value = {c: 0.0 for c in clusters}
+
+    # --- Updates --------------------------------------------------------------
+    def update(self, ticker: str, price_eur: float) -> bool:
+        """Ein Preis-Tick; True, wenn sich etwas geändert hat."""
+        ix = self.holders.get(ticker)
+        if ix is None or not np.isfinite(price_eur):
+            return False
+        old = self.price[ix]
+        if np.all(old == price_eur):
+            return False
+        fresh = ~np.isfinite(old)
+        delta = self.qty[ix] * (price_eur - np.where(fresh, 0.0, old))
+        books = self.book_id[ix]
+        np.add.at(self.value, books, delta)
+        if fresh.any():
+            np.subtract.at(self.unpriced, books[fresh], 1)
+        for c in self.cluster_of.get(ticker, ()):
+            self.cluster_value[c] += float(delta.sum())
+        self.price[ix] = price_eur
+        self._touch_peaks(np.unique(books))
+        return True
+
+    def apply(self, state: MarketState) -> int:
+        """Alle gehaltenen Ticker aus einem MarketState; Rückgabe: Anzahl geänderter Ticker."""
+        n = 0
+        for t in self.holders:
+            d = state.get(t)
+            if d is not None and self.update(t, d.last_eur):
+                n += 1
+        return n
+
+    def _touch_peaks(self, books: np.ndarray) -> None:
+        eq = self.value[books] + self.cash[books]
+        ok = self.unpriced[books] == 0
+        self.peak[books] = np.where(ok, np.fmax(self.peak[books], eq), self.peak[books])
+        if not self.unpriced.any():
+            self.family_peak = float(np.fmax(self.family_peak, self.value.sum() + self.cash.sum()))
+
+    def resync(self) -> None:
+        """Exakte Neuberechnung (gegen Rundungsdrift nach sehr vielen Ticks)."""
+        v = np.where(np.isfinite(self.price), self.qty * self.price, 0.0)
+        self.value = np.bincount(self.book_id, weights=v, minlength=len(self.books))
+        self.cluster_value = dict.fromkeys(self.cluster_value, 0.0)
+        for t, cs in self.cluster_of.items():
+            if t in self.holders:
+                s = float(v[self.holders[t]].sum())
+                for c in cs:
+                    self.cluster_value[c] += s
+
+    # --- Kennzahlen -----------------------------------------------------------
+    def _figures(self, value: float, cash: float, cost: float, peak: float, complete: bool) -> dict:
+        equity = value + cash
+        return {
+            "value_eur": round(value, 2), "cash_eur": round(cash, 2), "equity_eur": round(equity, 2),
+            "pnl_eur": round(value - cost, 2),
+            "pnl_pct": round((value - cost) / cost, 4) if cost > 0 else None,
+            "drawdown": round(equity / peak - 1.0, 4) if complete and peak > 0 else None,
+            "invested": round(value / equity, 4) if equity > 0 else None,
+            "cash_ratio": round(cash / equity, 4) if equity > 0 else None,
+            "complete": complete,
+        }
+
+    def metrics(self) -> dict:
+        books = {b: self._figures(float(self.value[i]), float(self.cash[i]), float(self.cost_sum[i]),
+                                  float(self.peak[i]), bool(self.unpriced[i] == 0))
+                 for i, b in enumerate(self.books)}
+        fam = self._figures(float(self.value.sum()), float(self.cash.sum()), float(self.cost_sum.sum()),
+                            self.family_peak, not self.unpriced.any())
+        eq = fam["equity_eur"]
+        fam["clusters"] = {c: round(v / eq, 4) if eq > 0 else None for c, v in self.cluster_value.items()}
+        return {"books": books, "family": fam}
+
+    def breaches(self, limits: dict) -> list[dict]:
+        """Limit-Verletzungen als {kind, scope, value, limit}."""
+        m = self.metrics()
+        out = []
+
+        def check(kind, scope, val, lim, below: bool):
+            if val is None or lim is None:
+                return
+            if (val < lim) if below else (val > lim):
+                out.append({"kind": kind, "scope": scope, "value": val, "limit": lim})
+
+        fam = m["family"]
+        check("dd_family", "family", fam["drawdown"], limits.get("dd_family"), below=True)
+        check("max_invested", "family", fam["invested"], limits.get("max_invested"), below=False)
+        check("min_cash", "family", fam["cash_ratio"], limits.get("min_cash"), below=True)
+        for b, f in m["books"].items():
+            check("dd_sub", b, f["drawdown"], limits.get("dd_sub"), below=True)
+        for c, w in fam["clusters"].items():
+            check(f"{c}_family_max", "family", w, (limits.get("cluster_max") or {}).get(c), below=False)
+        return out
+
+    # --- Peaks persistieren ---------------------------------------------------
+    def load_peaks(self, path: Path = STATE_FILE) -> None:
+        try:
+            saved = json.loads(path.read_text(encoding="utf-8")).get("peaks", {})
+        except Exception:
+            return
+        for i, b in enumerate(self.books):
+            if b in saved:
+                self.peak[i] = np.fmax(self.peak[i], float(saved[b]))
+        if "family" in saved:
+            self.family_peak = float(np.fmax(self.family_peak, float(saved["family"])))
+
+    def save_peaks(self, path: Path = STATE_FILE) -> None:
+        """Schreibt nur bei neuen Hochs – unveränderte Peaks erzeugen keinen CI-Commit."""
+        peaks = {b: float(self.peak[i]) for i, b in enumerate(self.books) if np.isfinite(self.peak[i])}
+        if np.isfinite(self.family_peak):
+            peaks["family"] = self.family_peak
+        try:
+            if json.loads(path.read_text(encoding="utf-8")).get("peaks") == peaks:
+                return
+        except Exception:
+            pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "as_of_utc": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "peaks": peaks}, indent=2), encoding="utf-8")
+
+# ------------------------------------------------------------
+# Konfiguration
+# ------------------------------------------------------------
+def _read_json(p: Path) -> dict:
+    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
+
+def limits_from_config(cfg: dict, portfolios: dict | None = None) -> dict:
+    """alerts_config.family hat Vorrang, portfolios.json.family ergänzt (z.B. min_cash)."""
+    fam = (portfolios if portfolios is not None else _read_json(PORTF)).get("family", {})
+    rl, el, cl = fam.get("risk_limits", {}), fam.get("exposure_limits", {}), fam.get("clusters", {})
+    risk, exp, clu = cfg.get("risk", {}), cfg.get("exposure", {}), cfg.get("cluster", {})
+    caps = {k[:-len("_family_max")]: float(v) for src in (cl, clu) for k, v in src.items()
+            if k.endswith("_family_max")}
+    return {
+        "dd_family": risk.get("pnl_family_dd", rl.get("dd_family")),
+        "dd_sub": risk.get("pnl_sub_dd", rl.get("dd_sub")),
+        "max_invested": exp.get("max_invested", el.get("max_invested")),
+        "min_cash": exp.get("min_cash", el.get("min_cash")),
+        "cluster_max": caps,
+        "prefer_trim": clu.get("prefer_trim_portfolio", cl.get("prefer_trim")),
+    }
+
+def clusters_from_config(cfg: dict, limits: dict) -> dict[str, list[str]]:
+    members = (cfg.get("cluster") or {}).get("members") or {}
+    return {c: [t.upper() for t in members.get(c, [c.upper()])] for c in limits["cluster_max"]} \
+        or dict(DEFAULT_CLUSTERS)
+
+_LIVE: dict[Path, tuple[float, Exposure]] = {}   # Pfad -> (mtime, Aggregator) je Prozess
+
+def from_positions(cfg: dict, path: Path = POSITIONS) -> tuple[Exposure, dict] | None:
+    """
+    Aggregator + Limits, oder None ohne Positionsdatei. Innerhalb eines Prozesses
+    wird derselbe Aggregator weiterverwendet, solange die Datei unverändert ist;
+    Folge-Läufe kosten dann nur die geänderten Kurse.
+    """
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    limits = limits_from_config(cfg)
+    live = _LIVE.get(path)
+    if live and live[0] == mtime:
+        return live[1], limits
+    positions = _read_json(path)
+    if not any((positions.get(b) or {}).get("positions") for b in positions):
+        return None
+    agg = Exposure(positions, clusters_from_config(cfg, limits))
+    agg.load_peaks()
+    _LIVE[path] = (mtime, agg)
+    return agg, limits
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="exposure")
+    ap.add_argument("--save", action="store_true", help="Peaks nach data/exposure_peaks.json schreiben")
+    args = ap.parse_args(argv)
+
+    cfg = _read_json(DATA / "alerts_config.json").get("family", {})
+    got = from_positions(cfg)
+    if got is None:
+        print(f"[exposure] keine Positionen in {POSITIONS}")
+        return 1
+    agg, limits = got
+    agg.apply(MarketState.from_snapshot_csv(DATA / "prices_eur_snapshot.csv"))
+    print(json.dumps({**agg.metrics(), "breaches": agg.breaches(limits)}, ensure_ascii=False, indent=2))
+    if args.save:
+        agg.save_peaks()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
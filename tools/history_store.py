@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/history_store.py
+Lokaler Historien-Speicher (Tageskerzen) als Panel Datum × Ticker:
+- OHLCV als float32-Arrays, ein Array je Feld (data/history/panel.npz)
+- Listing-Währung je Ticker + EUR-Multiplikator je Währung und Datum
+- refresh() lädt über tools/md_cache und mischt neue Kerzen in den Bestand
+- Grundlage für Relative Stärke, Scores, Pivots, Simulationen
+
+    python -m tools.history_store refresh            # Universe aus data/universe_*.txt
+    python -m tools.history_store refresh --period 2y MSFT NVDA
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from tools import md_cache
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+HIST_DIR = DATA / "history"
+PANEL_FILE = HIST_DIR / "panel.npz"
+
+FIELDS = ("open", "high", "low", "close", "volume")
+_YF_COLS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+# ------------------------------------------------------------
+# Panel
+# ------------------------------------------------------------
+class HistoryPanel:
+    """
+    dates:    datetime64[D] (T,)
+    tickers:  str (N,)
+    currency: str (N,)  Listing-Währung
+    fields:   {feld: float32 (T, N)}, fehlende Kerzen = NaN
+    fx:       {währung: float64 (T,)}  Multiplikator Währung -> EUR
+    """
+
+    def __init__(self, dates, tickers, currency, fields: dict, fx: dict | None = None):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.tickers = np.asarray(tickers, dtype=str)
+        self.currency = np.asarray(currency, dtype=str)
+        self.fields = {k: np.asarray(v, dtype=np.float32) for k, v in fields.items()}
+        self.fx = {k: np.asarray(v, dtype=np.float64) for k, v in (fx or {}).items()}
+        self.index = {t: i for i, t in enumerate(self.tickers.tolist())}
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.index
+
+    def eur_multiplier(self) -> np.ndarray:
+        """(T, N) Multiplikator je Datum und Ticker; unbekannte Währungen → 1.0 (neutral)."""
+        out = np.ones((len(self.dates), len(self.tickers)), dtype=np.float64)
+        for ccy, mult in self.fx.items():
+            cols = np.flatnonzero(self.currency == ccy)
+            if cols.size:
+                out[:, cols] = mult[:, None]
+        return out
+
+    def field(self, name: str, eur: bool = False) -> np.ndarray:
+        a = self.fields[name]
+        if eur and name != "volume":
+            return a * self.eur_multiplier()
+        return a
+
+    def to_frame(self, name: str, eur: bool = False) -> pd.DataFrame:
+        return pd.DataFrame(self.field(name, eur), index=pd.DatetimeIndex(self.dates), columns=self.tickers)
+
+    def select(self, tickers) -> "HistoryPanel":
+        cols = np.array([self.index[t] for t in tickers if t in self.index], dtype=np.intp)
+        return HistoryPanel(self.dates, self.tickers[cols], self.currency[cols],
+                            {k: v[:, cols] for k, v in self.fields.items()}, self.fx)
+
+    def save(self, path: Path = PANEL_FILE) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {f"f_{k}": v for k, v in self.fields.items()}
+        arrays.update({f"fx_{k}": v for k, v in self.fx.items()})
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez(tmp, dates=self.dates, tickers=self.tickers, currency=self.currency, **arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path = PANEL_FILE) -> "HistoryPanel":
+        with np.load(path, allow_pickle=False) as z:
+            fields = {k[2:]: z[k] for k in z.files if k.startswith("f_")}
+            fx = {k[3:]: z[k] for k in z.files if k.startswith("fx_")}
+            return cls(z["dates"], z["tickers"], z["currency"], fields, fx)
+
+    @classmethod
+    def empty(cls) -> "HistoryPanel":
+        return cls(np.array([], "datetime64[D]"), [], [], {k: np.empty((0, 0)) for k in FIELDS}, {})
+
+def load_panel(path: Path = PANEL_FILE) -> HistoryPanel:
+    return HistoryPanel.load(path) if path.exists() else HistoryPanel.empty()
+
+# ------------------------------------------------------------
+# Aufbau / Refresh
+# ------------------------------------------------------------
+def _session_index(idx: pd.Index) -> pd.DatetimeIndex:
+    idx = pd.DatetimeIndex(idx)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)  # lokale Börsenzeit behalten → richtiges Handelsdatum
+    return idx.normalize()
+
+def _fx_multipliers(currencies: set[str], dates: pd.DatetimeIndex, period: str) -> dict:
+    fx = {"EUR": np.ones(len(dates))}
+    for ccy in sorted(currencies - {"EUR"}):
+        try:
+            df = md_cache.fx_history(f"EUR{ccy}=X", period=period, interval="1d")
+            s = df["Close"].astype(float)
+            s.index = _session_index(s.index)
+            s = s[~s.index.duplicated(keep="last")]
+            rate = s.reindex(dates).ffill().bfill()
+            if rate.notna().all() and (rate > 0).all():
+                fx[ccy] = (1.0 / rate).to_numpy()
+        except Exception:
+            continue  # fehlt → eur_multiplier() nimmt 1.0
+    return fx
+
+def build_panel(tickers, period: str = "1y") -> HistoryPanel:
+    frames, ccys = {}, {}
+    for sym in tickers:
+        try:
+            df = md_cache.history(sym, period=period, interval="1d")
+        except Exception:
+            continue
+        if df is None or df.empty:
+            continue
+        df = df.copy()
+        df.index = _session_index(df.index)
+        frames[sym] = df[~df.index.duplicated(keep="last")]
+        try:
+            ccys[sym] = (md_cache.currency(sym) or "USD").upper()
+        except Exception:
+            ccys[sym] = "USD"
+    if not frames:
+        return HistoryPanel.empty()
+
+    dates = pd.DatetimeIndex(sorted(set().union(*(f.index for f in frames.values()))))
+    syms = sorted(frames)
+    fields = {}
+    for name in FIELDS:
+        col = _YF_COLS[name]
+        wide = pd.DataFrame({s: frames[s][col] if col in frames[s] else np.nan for s in syms})
+        fields[name] = wide.reindex(index=dates, columns=syms).to_numpy(dtype=np.float32)
+    fx = _fx_multipliers(set(ccys.values()), dates, period)
+    return HistoryPanel(dates.values, syms, [ccys[s] for s in syms], fields, fx)
+
+def merge_panels(old: HistoryPanel, new: HistoryPanel) -> HistoryPanel:
+    """Vereinigung von Datum und Ticker; neue Werte haben Vorrang, alte füllen Lücken."""
+    if not len(old):
+        return new
+    if not len(new):
+        return old
+    dates = pd.DatetimeIndex(np.union1d(old.dates, new.dates))
+    syms = sorted(set(old.tickers.tolist()) | set(new.tickers.tolist()))
+    fields = {}
+    for name in FIELDS:
+        a = new.to_frame(name).reindex(index=dates, columns=syms)
+        b = old.to_frame(name).reindex(index=dates, columns=syms)
+        fields[name] = a.combine_first(b).to_numpy(dtype=np.float32)
+    cur = dict(zip(old.tickers.tolist(), old.currency.tolist()))
+    cur.update(zip(new.tickers.tolist(), new.currency.tolist()))
+    fx = {}
+    for ccy in set(old.fx) | set(new.fx):
+        a = pd.Series(new.fx.get(ccy, np.full(len(new.dates), np.nan)), index=pd.DatetimeIndex(new.dates))
+        b = pd.Series(old.fx.get(ccy, np.full(len(old.dates), np.nan)), index=pd.DatetimeIndex(old.dates))
+        fx[ccy] = a.reindex(dates).combine_first(b.reindex(dates)).ffill().bfill().to_numpy()
+    return HistoryPanel(dates.values, syms, [cur[s] for s in syms], fields, fx)
+
+def refresh(tickers, period: str = "1y", path: Path = PANEL_FILE) -> HistoryPanel:
+    panel = merge_panels(load_panel(path), build_panel(tickers, period))
+    panel.save(path)
+    return panel
+
+def default_universe() -> list[str]:
+    from tools.live_data import load_universe
+    return load_universe()
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="history_store")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("refresh")
+    r.add_argument("--period", default="1y")
+    r.add_argument("tickers", nargs="*")
+    sub.add_parser("info")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "info":
+        p = load_panel()
+        span = f"{p.dates[0]} … {p.dates[-1]}" if len(p.dates) else "—"
+        print(f"[history] tickers={len(p)} sessions={len(p.dates)} span={span} fx={sorted(p.fx)}")
+        return 0
+
+    t0 = time.perf_counter()
+    tickers = [t.upper() for t in args.tickers] or default_universe()
+    p = refresh(tickers, args.period)
+    print(f"[history] {len(p)} tickers × {len(p.dates)} sessions → {PANEL_FILE} "
+          f"({time.perf_counter() - t0:.1f}s)")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,17 +1,32 @@
 # tools/live_data.py
 #!/usr/bin/env python3
 import math
+import os
 import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List
+from zoneinfo import ZoneInfo
 
+import numpy as np
 import pandas as pd
-import yfinance as yf
+
+from tools import md_cache
+from tools import metrics as om
+from tools.market_calendar import EXCHANGES, any_open, exchange_for, filter_universe, grace_minutes, session_only, status
+from tools.market_state import MarketState
+from tools.pivots import levels as pivot_levels, stack_tail
+from tools.volume_anomaly import LiveBaselines, projected_day_volume, session_grid
 
 ROOT = Path(__file__).resolve().parents[1]
 DATA = ROOT / "data"
 OUT  = DATA / "prices_eur_snapshot.csv"
+PAUSE_S = float(os.getenv("MARS_FETCH_PAUSE", "0.25"))  # Pause je Symbol (API freundlich behandeln)
+
+FETCH_SECONDS = om.histogram("mars_fetch_seconds", "Abruf + Kennzahlen je Symbol")
+FETCH_SYMBOLS = om.counter("mars_fetch_symbols", "verarbeitete Symbole", ("result",))
+FETCH_FAILURES = om.counter("mars_fetch_failures", "Fehlschläge je Symbol", ("symbol",))
+UPSTREAM_CALLS = om.gauge("mars_fetch_upstream_calls", "Upstream-Calls laut Cache (als Dienst: kumuliert)")
 
 # --- Universum: Depot + Watch ------------------------------------------------
 def load_universe() -> List[str]:
@@ -34,15 +49,41 @@ def now_utc() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
 # --- FX: baue Multiplikatoren -> EUR -----------------------------------------
-def _safe_close(symbol: str) -> float | None:
-    try:
-        s = yf.Ticker(symbol).history(period="1d")["Close"]
-        if not s.empty:
-            v = float(s.iloc[-1])
-            return v if v > 0 else None
-    except Exception:
-        pass
-    return None
+FX_PAIRS = {"USD": "EURUSD=X", "CHF": "EURCHF=X", "GBP": "EURGBP=X", "JPY": "EURJPY=X"}
+# Fallbacks (konservativ) – werden nur genutzt, wenn API ausfällt
+FX_FALLBACK = {"USD": 0.93, "CHF": 1.05, "GBP": 1.17, "JPY": 0.0062}
+
+def _day_index(idx) -> pd.DatetimeIndex:
+    idx = pd.DatetimeIndex(idx)
+    return (idx.tz_localize(None) if idx.tz is not None else idx).normalize()
+
+def build_fx_history(period: str = "1mo") -> Dict[str, pd.Series]:
+    """
+    Multiplikator-Zeitreihen Währung -> EUR (Index: Kalendertag), z.B. USD: 1/EURUSD=X.
+    Für den Dual-Layer: Kurs- und FX-Bewegung lassen sich so je Session trennen.
+    """
+    out: Dict[str, pd.Series] = {"EUR": pd.Series(dtype=float)}
+    for ccy, pair in FX_PAIRS.items():
+        try:
+            c = md_cache.fx_history(pair, period=period)["Close"].astype(float)
+            c = c[c > 0]
+            s = pd.Series(1.0 / c.to_numpy(), index=_day_index(c.index))
+            out[ccy] = s[~s.index.duplicated(keep="last")].sort_index()
+        except Exception:
+            out[ccy] = pd.Series(dtype=float)
+    return out
+
+def fx_at(hist: Dict[str, pd.Series], ccy: str, day) -> float:
+    """Multiplikator zum Tag (letzter bekannter Wert davor); EUR 1.0, unbekannt → 1.0 (neutral)."""
+    if ccy == "EUR":
+        return 1.0
+    s = hist.get(ccy)
+    if s is None:
+        return 1.0
+    if s.empty:
+        return FX_FALLBACK.get(ccy, 1.0)
+    v = s.asof(_day_index([day])[0]) if day is not None else float("nan")
+    return float(v) if pd.notna(v) else float(s.iloc[-1])
 
 def build_fx_to_eur() -> Dict[str, float]:
     """
@@ -53,122 +94,165 @@ def build_fx_to_eur() -> Dict[str, float]:
     GBP: 1/EURGBP=X
     JPY: 1/EURJPY=X
     """
-    pairs = {
-        "EUR": None,          # Baseline
-        "USD": "EURUSD=X",
-        "CHF": "EURCHF=X",
-        "GBP": "EURGBP=X",
-        "JPY": "EURJPY=X",
-    }
+    hist = build_fx_history()
     mult: Dict[str, float] = {"EUR": 1.0}
+    for ccy in FX_PAIRS:
+        s = hist[ccy]
+        mult[ccy] = float(s.iloc[-1]) if not s.empty else FX_FALLBACK[ccy]
+    return mult  # z.B. {"EUR":1.0, "USD":0.93, "CHF":1.05, ...}
 
-    # Fallbacks (konservativ) – werden nur genutzt, wenn API ausfällt
-    fallback = {"USD": 0.93, "CHF": 1.05, "GBP": 1.17, "JPY": 0.0062}
-
-    for ccy, pair in pairs.items():
-        if ccy == "EUR":
+# --- Volumen: Tageszeit-Hochrechnung ----------------------------------------
+def intraday_volume(tickers: List[str], bucket_min: int = 30) -> Dict[str, float]:
+    """
+    Für Ticker, deren Börse gerade handelt: heutiges Volumen hochgerechnet auf den
+    ganzen Tag (Tageszeit-Profil der letzten 10 Sessions). Ein Bulk-Abruf je Börse.
+    """
+    out: Dict[str, float] = {}
+    now = datetime.now(timezone.utc)
+    by_ex: Dict[str, List[str]] = {}
+    for t in tickers:
+        ex = exchange_for(t)
+        if ex and status(ex, now) == "open":
+            by_ex.setdefault(ex, []).append(t)
+    for ex, syms in by_ex.items():
+        try:
+            tz = EXCHANGES[ex].tz
+            bars = md_cache.bulk_history(syms, period="10d", interval=f"{bucket_min}m")
+            bars = {s: bars.get(s) for s in syms}
+            days, buckets, V = session_grid(bars, tz, bucket_min)
+            local = now.astimezone(ZoneInfo(tz))
+            if not len(days) or pd.Timestamp(days[-1]).date() != local.date():
+                continue
+            b = int(np.searchsorted(buckets, local.hour * 60 + local.minute, side="right")) - 1
+            if b < 0:
+                continue
+            proj = projected_day_volume(V, b)
+            out.update({s: float(v) for s, v in zip(syms, proj) if np.isfinite(v)})
+        except Exception:
             continue
-        rate = _safe_close(pair)  # z.B. EURUSD=X = USD pro 1 EUR
-        if rate and rate > 0:
-            mult[ccy] = 1.0 / rate
-        else:
-            mult[ccy] = fallback[ccy]
-
-    return mult  # z.B. {"EUR":1.0, "USD":0.93, "CHF":1.05, ...}
+    return out
 
 # --- Download & Kennzahlen ---------------------------------------------------
-def fetch_batch(tickers: List[str]) -> pd.DataFrame:
-    rows = []
-    to_eur = build_fx_to_eur()  # Multiplikatoren
+_VOL_BASE = LiveBaselines()   # Volumen-Baselines je Symbol, leben so lange wie der Prozess
+
+def fetch_state(tickers: List[str], state: MarketState | None = None) -> MarketState:
+    """state: vorhandener Snapshot, in den die Ticker geschrieben werden (Rest bleibt)."""
+    state = state if state is not None else MarketState(capacity=len(tickers))
+    fx_hist = build_fx_history()  # Multiplikator-Zeitreihen je Währung
+    vol_today = intraday_volume(tickers)
 
+    ok, empty, failed = FETCH_SYMBOLS.labels("ok"), FETCH_SYMBOLS.labels("empty"), FETCH_SYMBOLS.labels("error")
+    rows: list[tuple[str, str, float, dict]] = []
+    frames: list[pd.DataFrame] = []
     for sym in tickers:
+        t0 = time.perf_counter()
         try:
-            t = yf.Ticker(sym)
-
-            # 30d/1d für Close/Vol; 90d/1d für DMA50
-            hist = t.history(period="30d", interval="1d", auto_adjust=False)
-            if hist.empty:
+            # ein 90d/1d-Abruf (über den Cache) für DMA50; das 30d-Fenster für Close/Vol daraus
+            hist_long = md_cache.history(sym, period="90d", interval="1d")
+            if hist_long.empty:
+                empty.inc()
                 continue
+            hist = hist_long[hist_long.index > hist_long.index[-1] - pd.Timedelta(days=30)]
 
             close = hist["Close"].astype(float)
             last = float(close.iloc[-1])
             prev = float(close.iloc[-2]) if len(close) >= 2 else float("nan")
 
-            # „5-Tage“ Proxy: Close vor 5 Handelstagen, sonst erstverfügbarer Close
+            # vs5d: Close vor 5 Handelstagen, sonst erstverfügbarer Close (LOW5 siehe tools/pivots.py)
             if len(close) >= 6:
                 prev5 = float(close.iloc[-6])
             else:
                 prev5 = float(close.iloc[0])
 
-            # Volumen
-            vol = float(hist["Volume"].iloc[-1]) if "Volume" in hist.columns else 0.0
-            vol20 = float(hist["Volume"].tail(20).mean()) if "Volume" in hist.columns else 0.0
+            # Volumen: vol_x/robuster z-Wert gegen Median/MAD der 20 Sessions davor (Streaming-
+            # Baseline je Symbol); während der Session zählt das auf den Tag hochgerechnete Volumen
+            if "Volume" in hist_long.columns:
+                vol_x, vol_z = _VOL_BASE.score(sym, _day_index(hist_long.index),
+                                               hist_long["Volume"].astype(float).to_numpy(), vol_today.get(sym))
+                vol_x = vol_x if math.isfinite(vol_x) else 0.0
+            else:
+                vol_x, vol_z = 0.0, float("nan")
 
             # DMA50
-            hist_long = t.history(period="90d", interval="1d", auto_adjust=False)
-            dma50 = float(hist_long["Close"].tail(50).mean()) if not hist_long.empty and len(hist_long) >= 50 else float("nan")
-
-            # Währung ermitteln
-            currency = None
-            try:
-                currency = t.fast_info.currency
-            except Exception:
-                pass
-            if not currency:
-                try:
-                    currency = t.info.get("currency")
-                except Exception:
-                    currency = "USD"
-            currency = (currency or "USD").upper()
-
-            # EUR-Konvertierung
-            mult = to_eur.get(currency, 1.0)  # unbekannte Währungen → 1.0 (neutral)
-            def x(v: float) -> float:
-                return v * mult if not math.isnan(v) else v
+            dma50 = float(hist_long["Close"].tail(50).mean()) if len(hist_long) >= 50 else float("nan")
+
+            # Währung ermitteln (Stammdaten, lange TTL im Cache)
+            currency = (md_cache.currency(sym) or "USD").upper()
+
+            # EUR-Konvertierung je Zeitpunkt (Dual-Layer): Vortag/5d mit dem damaligen Kurs,
+            # sonst stecken FX-Bewegungen nicht in den EUR-Renditen
+            days = close.index
+            mult = fx_at(fx_hist, currency, days[-1])
+            mult_prev = fx_at(fx_hist, currency, days[-2]) if len(days) >= 2 else mult
+            mult_5d = fx_at(fx_hist, currency, days[-6] if len(days) >= 6 else days[0])
+            def x(v: float, m: float = mult) -> float:
+                return v * m if not math.isnan(v) else v
 
             last_eur   = x(last)
-            prev_eur   = x(prev)
-            prev5_eur  = x(prev5)
+            prev_eur   = x(prev, mult_prev)
+            prev5_eur  = x(prev5, mult_5d)
             dma50_eur  = x(dma50)
 
             # Kennzahlen
             chg_intraday = (last_eur - prev_eur) / prev_eur if (prev_eur and not math.isnan(prev_eur) and prev_eur != 0) else 0.0
             vs5d         = (last_eur - prev5_eur) / prev5_eur if (prev5_eur and not math.isnan(prev5_eur) and prev5_eur != 0) else 0.0
-            vol_x        = (vol / vol20) if vol20 else 0.0
-
-            rows.append({
-                "ticker": sym,
-                "last_eur": round(last_eur, 6),
-                "prevClose_eur": round(prev_eur, 6) if not math.isnan(prev_eur) else "",
-                "low5_eur": round(prev5_eur, 6) if not math.isnan(prev5_eur) else "",
-                "dma50_eur": round(dma50_eur, 6) if not math.isnan(dma50_eur) else "",
-                "change_intraday_pct": round(chg_intraday, 6),
-                "vs5d_pct": round(vs5d, 6),
-                "vol_x": round(vol_x, 3),
-                "currency": currency,
-                "as_of": now_utc(),
-            })
-
-            time.sleep(0.25)  # API freundlich behandeln
+
+            rows.append((sym, currency, mult, dict(
+                last_eur=last_eur,
+                prevClose_eur=prev_eur,
+                dma50_eur=dma50_eur,
+                change_intraday_pct=chg_intraday,
+                vs5d_pct=vs5d,
+                vol_x=vol_x,
+                vol_z=vol_z,
+                fx_eur=mult,
+                fx_eur_prev=mult_prev,
+                fx_eur_5d=mult_5d,
+            )))
+            frames.append(hist_long)
+
+            ok.inc()
+            FETCH_SECONDS.observe(time.perf_counter() - t0)
+            time.sleep(PAUSE_S)
         except Exception:
             # Einzelne Ausfälle nicht eskalieren
+            failed.inc()
+            FETCH_FAILURES.labels(sym).inc()
             continue
 
-    return pd.DataFrame(rows)
+    # LOW5 (Tief der 5 Vortage) und Swing-Pivots vektorisiert über alle Symbole
+    n = 60
+    lv = pivot_levels(stack_tail(frames, "High", n), stack_tail(frames, "Low", n), stack_tail(frames, "Close", n))
+
+    for j, (sym, currency, mult, vals) in enumerate(rows):
+        state.put(sym, currency=currency, **vals,
+                  low5_eur=lv["low5"][j] * mult,
+                  pivot_low_eur=lv["pivot_low"][j] * mult,
+                  pivot_high_eur=lv["pivot_high"][j] * mult)
+    return state
+
+def fetch_batch(tickers: List[str]) -> pd.DataFrame:
+    return fetch_state(tickers).to_frame()
 
 # --- Main --------------------------------------------------------------------
 def main():
     DATA.mkdir(parents=True, exist_ok=True)
     uni = load_universe()
-    df = fetch_batch(uni)
-    cols = [
-        "ticker","last_eur","prevClose_eur","low5_eur","dma50_eur",
-        "change_intraday_pct","vs5d_pct","vol_x","currency","as_of"
-    ]
-    if not df.empty:
-        df = df.reindex(columns=cols)
-    df.to_csv(OUT, index=False)
-    print(f"[OK] wrote {len(df)} rows to {OUT}")
+    base = None
+    if session_only():
+        # nur Märkte in Session (oder gerade geschlossen); übrige Zeilen bleiben aus dem letzten Snapshot
+        if not any_open(grace_min=grace_minutes()):
+            print("[calendar] kein Markt in Session – Snapshot unverändert")
+            return
+        active = filter_universe(uni)
+        print(f"[calendar] {len(active)}/{len(uni)} tickers in session")
+        uni = active
+        base = MarketState.from_snapshot_csv(OUT) if OUT.exists() else None
+    state = fetch_state(uni, base)
+    state.to_csv(OUT)
+    print(f"[OK] wrote {len(state)} rows to {OUT}")
+    UPSTREAM_CALLS.set(md_cache.metrics()["upstream_calls"])
+    om.export("live_data")
 
 if __name__ == "__main__":
     main()
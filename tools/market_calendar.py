@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/market_calendar.py
+Handelskalender für die Börsen im Universum, ohne Zusatz-Abhängigkeiten:
+- XETRA (.DE, .F, ISIN-Schlüssel), Euronext (.PA, .AS, .BR, .LS), US (ohne Suffix: NYSE/Nasdaq)
+- Feiertage (inkl. Ostern, US-"observed"-Regeln) und verkürzte Handelstage
+- Handelszeiten in Börsen-Ortszeit (zoneinfo), Sommerzeit automatisch
+- Scheduler-Helfer: nur Ticker, deren Markt offen ist oder gerade geschlossen
+  hat (meta.session_grace_minutes), werden aktualisiert/ausgewertet;
+  meta.session_only schaltet das ein, MARS_SESSION_ONLY=0 schaltet es ab
+
+    python -m tools.market_calendar                    # Status je Börse jetzt
+    python -m tools.market_calendar --at 2026-12-24T13:30Z NVDA SAP.DE
+    python -m tools.market_calendar gate               # open=true|false (auch nach $GITHUB_OUTPUT)
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from zoneinfo import ZoneInfo
+import argparse
+import json
+import os
+import re
+
+ROOT = Path(__file__).resolve().parents[1]
+CFG_FILE = ROOT / "data" / "alerts_config.json"
+
+DEFAULT_GRACE_MIN = 30
+
+@dataclass(frozen=True)
+class Exchange:
+    name: str
+    tz: str
+    open: dtime
+    close: dtime
+    half_close: dtime | None = None
+
+EXCHANGES = {
+    "XETRA":    Exchange("XETRA", "Europe/Berlin", dtime(9, 0), dtime(17, 30)),
+    "EURONEXT": Exchange("EURONEXT", "Europe/Paris", dtime(9, 0), dtime(17, 30), dtime(14, 5)),
+    "US":       Exchange("US", "America/New_York", dtime(9, 30), dtime(16, 0), dtime(13, 0)),
+}
+SUFFIX = {".DE": "XETRA", ".F": "XETRA",
+          ".PA": "EURONEXT", ".AS": "EURONEXT", ".BR": "EURONEXT", ".LS": "EURONEXT"}
+INDEX = {"^GDAXI": "XETRA", "^FCHI": "EURONEXT", "^AEX": "EURONEXT"}
+# ISIN-geführte Positionen (z.B. venus: IE00B4L5Y983) werden über Xetra gehandelt
+ISIN_RE = re.compile(r"^[A-Z]{2}[A-Z0-9]{9}\d$")
+
+def exchange_for(symbol: str) -> str | None:
+    """Börse aus dem Symbol; ISIN → XETRA; None für FX (=X) und nicht zuordenbare Namen."""
+    s = symbol.strip().upper()
+    if s.endswith("=X"):
+        return None
+    if s.startswith("^"):
+        return INDEX.get(s, "US")
+    if "." in s:
+        return SUFFIX.get(s[s.rindex("."):])
+    if ISIN_RE.match(s):
+        return "XETRA"
+    return "US" if s.isalnum() or "-" in s else None
+
+# ------------------------------------------------------------
+# Feiertage
+# ------------------------------------------------------------
+def easter(year: int) -> date:
+    """Ostersonntag (gregorianisch, anonymer Algorithmus)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-ter Wochentag im Monat (n=-1: letzter); weekday 0=Mo."""
+    if n > 0:
+        d = date(year, month, 1)
+        return d + timedelta(days=(weekday - d.weekday()) % 7 + 7 * (n - 1))
+    d = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return d - timedelta(days=(d.weekday() - weekday) % 7)
+
+def _observed(d: date) -> date:
+    return d - timedelta(days=1) if d.weekday() == 5 else d + timedelta(days=1) if d.weekday() == 6 else d
+
+@lru_cache(maxsize=64)
+def calendar(exchange: str, year: int) -> tuple[frozenset, dict]:
+    """(geschlossene Tage, {verkürzter Tag: Schlusszeit}) eines Jahres."""
+    ex = EXCHANGES[exchange]
+    e = easter(year)
+    closed: set[date] = set()
+    half: dict[date, dtime] = {}
+    if exchange == "XETRA":
+        closed |= {date(year, 1, 1), e - timedelta(days=2), e + timedelta(days=1), date(year, 5, 1),
+                   date(year, 12, 24), date(year, 12, 25), date(year, 12, 26), date(year, 12, 31)}
+    elif exchange == "EURONEXT":
+        closed |= {date(year, 1, 1), e - timedelta(days=2), e + timedelta(days=1), date(year, 5, 1),
+                   date(year, 12, 25), date(year, 12, 26)}
+        half = {date(year, 12, 24): ex.half_close, date(year, 12, 31): ex.half_close}
+    elif exchange == "US":
+        ny = date(year, 1, 1)
+        if ny.weekday() != 5:               # Samstag: kein Ersatz am 31.12. (NYSE-Regel)
+            closed.add(_observed(ny))
+        closed |= {
+            _nth_weekday(year, 1, 0, 3),    # Martin Luther King Jr. Day
+            _nth_weekday(year, 2, 0, 3),    # Presidents' Day
+            e - timedelta(days=2),          # Good Friday
+            _nth_weekday(year, 5, 0, -1),   # Memorial Day
+            _observed(date(year, 7, 4)),
+            _nth_weekday(year, 9, 0, 1),    # Labor Day
+            _nth_weekday(year, 11, 3, 4),   # Thanksgiving
+            _observed(date(year, 12, 25)),
+        }
+        if year >= 2022:
+            closed.add(_observed(date(year, 6, 19)))  # Juneteenth
+        for d in (date(year, 7, 3), _nth_weekday(year, 11, 3, 4) + timedelta(days=1), date(year, 12, 24)):
+            if d.weekday() < 5 and d not in closed:
+                half[d] = ex.half_close
+    return frozenset(closed), {d: t for d, t in half.items() if d not in closed}
+
+def session(exchange: str, day: date) -> tuple[datetime, datetime] | None:
+    """(Open, Close) in UTC oder None an Wochenenden/Feiertagen."""
+    if day.weekday() >= 5:
+        return None
+    closed, half = calendar(exchange, day.year)
+    if day in closed:
+        return None
+    ex = EXCHANGES[exchange]
+    tz = ZoneInfo(ex.tz)
+    o = datetime.combine(day, ex.open, tz)
+    c = datetime.combine(day, half.get(day, ex.close), tz)
+    return o.astimezone(timezone.utc), c.astimezone(timezone.utc)
+
+def _now(at: datetime | None) -> datetime:
+    at = at or datetime.now(timezone.utc)
+    return at if at.tzinfo else at.replace(tzinfo=timezone.utc)
+
+def status(exchange: str, at: datetime | None = None, grace_min: int = DEFAULT_GRACE_MIN) -> str:
+    """open | just_closed (innerhalb grace nach Schluss) | closed."""
+    at = _now(at)
+    local_day = at.astimezone(ZoneInfo(EXCHANGES[exchange].tz)).date()
+    s = session(exchange, local_day)
+    if s is None:
+        return "closed"
+    o, c = s
+    if o <= at < c:
+        return "open"
+    if c <= at < c + timedelta(minutes=grace_min):
+        return "just_closed"
+    return "closed"
+
+# ------------------------------------------------------------
+# Scheduler-Helfer
+# ------------------------------------------------------------
+def _meta(cfg: dict | None) -> dict:
+    if cfg is None:
+        try:
+            cfg = json.loads(CFG_FILE.read_text(encoding="utf-8"))
+        except Exception:
+            cfg = {}
+    return cfg.get("meta", cfg)
+
+def session_only(cfg: dict | None = None) -> bool:
+    env = os.getenv("MARS_SESSION_ONLY", "").strip().lower()
+    if env:
+        return env not in ("0", "false", "no")
+    return bool(_meta(cfg).get("session_only", False))
+
+def grace_minutes(cfg: dict | None = None) -> int:
+    return int(_meta(cfg).get("session_grace_minutes", DEFAULT_GRACE_MIN))
+
+def active_tickers(tickers: list[str], at: datetime | None = None, grace_min: int = DEFAULT_GRACE_MIN) -> list[str]:
+    """Ticker, deren Markt offen ist oder gerade geschlossen hat; nicht zuordenbare bleiben drin."""
+    st = {ex: status(ex, at, grace_min) != "closed" for ex in EXCHANGES}
+    return [t for t in tickers if st.get(exchange_for(t), True)]
+
+def any_open(exchanges=None, at: datetime | None = None, grace_min: int = DEFAULT_GRACE_MIN) -> bool:
+    return any(status(ex, at, grace_min) != "closed" for ex in (exchanges or EXCHANGES))
+
+def filter_universe(tickers: list[str], cfg: dict | None = None, at: datetime | None = None) -> list[str]:
+    """Wie active_tickers(), aber nur bei session_only; sonst unverändert."""
+    if not session_only(cfg):
+        return list(tickers)
+    return active_tickers(tickers, at, grace_minutes(cfg))
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def _parse_at(s: str | None) -> datetime | None:
+    if not s:
+        return None
+    return _now(datetime.fromisoformat(s.replace("Z", "+00:00")))
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="market_calendar")
+    ap.add_argument("args", nargs="*", help="'gate' oder Ticker")
+    ap.add_argument("--at", help="Zeitpunkt (ISO, Default: jetzt)")
+    ap.add_argument("--grace", type=int, help="Minuten nach Schluss, die noch zählen")
+    a = ap.parse_args(argv)
+
+    at = _parse_at(a.at)
+    grace = a.grace if a.grace is not None else grace_minutes()
+    if a.args[:1] == ["gate"]:
+        is_open = not session_only() or any_open(at=at, grace_min=grace)
+        line = f"open={'true' if is_open else 'false'}"
+        print(line)
+        if os.getenv("GITHUB_OUTPUT"):
+            with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        return 0
+
+    for ex in EXCHANGES:
+        at_ = _now(at)
+        s = session(ex, at_.astimezone(ZoneInfo(EXCHANGES[ex].tz)).date())
+        hours = f"{s[0]:%H:%M}–{s[1]:%H:%M} UTC" if s else "kein Handel"
+        print(f"[calendar] {ex:<9} {status(ex, at, grace):<12} {hours}")
+    for t in a.args:
+        ex = exchange_for(t)
+        print(f"  {t:<10} {ex or '?':<9} {status(ex, at, grace) if ex else 'unbekannt (immer aktiv)'}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
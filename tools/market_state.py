@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/market_state.py
+Zentraler, spaltenorientierter Markt-State (ein Eintrag je Ticker):
+- Spalten als float64-Arrays (auch Quoten/Ratios: Regeln vergleichen exakt gegen
+  runde Schwellen wie -0.06/-0.12, float32 würde 100→94 auf -0.0599999987 runden)
+- Ticker → Index über internierte Strings, Währung als uint8-Code
+- TickerView mit __slots__ für die wenigen Stellen, die ein Objekt je Ticker brauchen
+- liest/schreibt data/prices_eur_snapshot.csv ohne Dict-pro-Zeile-Umweg
+"""
+
+from __future__ import annotations
+from datetime import datetime, timezone
+from pathlib import Path
+import csv
+import math
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Spalte -> (dtype, Nachkommastellen in der CSV)
+COLUMNS = {
+    "last_eur":            (np.float64, 6),
+    "prevClose_eur":       (np.float64, 6),
+    "low5_eur":            (np.float64, 6),
+    "dma50_eur":           (np.float64, 6),
+    "pivot_low_eur":       (np.float64, 6),
+    "pivot_high_eur":      (np.float64, 6),
+    "change_intraday_pct": (np.float64, 6),
+    "vs5d_pct":            (np.float64, 6),
+    "vol_x":               (np.float64, 3),
+    "vol_z":               (np.float64, 2),   # robuster z-Wert (Median/MAD), tools/volume_anomaly.py
+    "fx_eur":              (np.float64, 8),   # Notierungswährung → EUR, aktuell
+    "fx_eur_prev":         (np.float64, 8),   # … zum Vortagesschluss
+    "fx_eur_5d":           (np.float64, 8),   # … vor 5 Sessions
+}
+CSV_COLS = ["ticker", *COLUMNS, "currency", "as_of"]
+_BLANK_IF_NAN = ("prevClose_eur", "low5_eur", "dma50_eur", "pivot_low_eur", "pivot_high_eur", "vol_z")
+
+class TickerView:
+    """Leichtgewichtige Sicht auf eine Zeile; liest direkt aus den Spalten-Arrays."""
+    __slots__ = ("_st", "_i")
+
+    def __init__(self, st: "MarketState", i: int):
+        self._st = st
+        self._i = i
+
+    @property
+    def ticker(self) -> str:
+        return self._st.tickers[self._i]
+
+    @property
+    def currency(self) -> str:
+        return self._st.currencies[self._st.ccy[self._i]]
+
+    def __getattr__(self, name: str) -> float:
+        try:
+            return float(self._st.cols[name][self._i])
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, name: str) -> float:
+        return self.__getattr__(name)
+
+    def __repr__(self) -> str:
+        vals = ", ".join(f"{k}={getattr(self, k):.6g}" for k in COLUMNS)
+        return f"TickerView({self.ticker}, {vals})"
+
+class MarketState:
+    __slots__ = ("tickers", "index", "cols", "ccy", "currencies", "as_of", "_n")
+
+    def __init__(self, capacity: int = 64):
+        capacity = max(1, capacity)
+        self.tickers: list[str] = []
+        self.index: dict[str, int] = {}
+        self.cols = {k: np.full(capacity, np.nan, dtype=dt) for k, (dt, _) in COLUMNS.items()}
+        self.ccy = np.zeros(capacity, dtype=np.uint8)
+        self.currencies: list[str] = ["EUR"]
+        self.as_of = np.full(capacity, np.nan, dtype=np.float64)  # Epoch-Sekunden UTC
+        self._n = 0
+
+    # --- Aufbau ---------------------------------------------------------------
+    def _grow(self, need: int) -> None:
+        cap = len(self.as_of)
+        if need <= cap:
+            return
+        new = max(need, cap * 2)
+        for k, a in self.cols.items():
+            b = np.full(new, np.nan, dtype=a.dtype)
+            b[:cap] = a
+            self.cols[k] = b
+        ccy = np.zeros(new, dtype=np.uint8)
+        ccy[:cap] = self.ccy
+        self.ccy = ccy
+        as_of = np.full(new, np.nan)
+        as_of[:cap] = self.as_of
+        self.as_of = as_of
+
+    def _ccy_code(self, currency: str) -> int:
+        cur = (currency or "USD").upper()
+        try:
+            return self.currencies.index(cur)
+        except ValueError:
+            self.currencies.append(sys.intern(cur))
+            return len(self.currencies) - 1
+
+    def slot(self, ticker: str) -> int:
+        """Index des Tickers; legt ihn bei Bedarf an."""
+        t = ticker.strip().upper()
+        i = self.index.get(t)
+        if i is None:
+            i = self._n
+            self._grow(i + 1)
+            t = sys.intern(t)
+            self.tickers.append(t)
+            self.index[t] = i
+            self._n += 1
+        return i
+
+    def put(self, ticker: str, currency: str | None = None, as_of: float | None = None, **values) -> int:
+        i = self.slot(ticker)
+        for k, v in values.items():
+            self.cols[k][i] = v
+        if currency is not None:
+            self.ccy[i] = self._ccy_code(currency)
+        self.as_of[i] = as_of if as_of is not None else datetime.now(timezone.utc).timestamp()
+        return i
+
+    # --- Zugriff --------------------------------------------------------------
+    def __len__(self) -> int:
+        return self._n
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.index
+
+    def __getitem__(self, ticker: str) -> TickerView:
+        return TickerView(self, self.index[ticker])
+
+    def get(self, ticker: str) -> TickerView | None:
+        i = self.index.get(ticker)
+        return None if i is None else TickerView(self, i)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.cols[name][:self._n]
+
+    def currency_of(self) -> np.ndarray:
+        return np.asarray(self.currencies)[self.ccy[:self._n]]
+
+    def nbytes(self) -> int:
+        arrays = sum(a.nbytes for a in self.cols.values()) + self.ccy.nbytes + self.as_of.nbytes
+        return arrays + sys.getsizeof(self.index) + sys.getsizeof(self.tickers)
+
+    # --- I/O ------------------------------------------------------------------
+    def to_frame(self) -> pd.DataFrame:
+        n = self._n
+        df = pd.DataFrame({"ticker": self.tickers})
+        for k, (_, nd) in COLUMNS.items():
+            df[k] = np.round(self.cols[k][:n].astype(np.float64), nd)
+        df["currency"] = self.currency_of()
+        ts = pd.to_datetime(self.as_of[:n], unit="s", utc=True)
+        df["as_of"] = ts.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        return df.reindex(columns=CSV_COLS)
+
+    def to_csv(self, path: Path) -> None:
+        self.to_frame().to_csv(path, index=False, na_rep="")
+
+    @classmethod
+    def from_snapshot_csv(cls, path: Path) -> "MarketState":
+        st = cls()
+        if not path.exists():
+            return st
+        with path.open("r", encoding="utf-8") as f:
+            rd = csv.reader(f)
+            header = next(rd, None)
+            if not header:
+                return st
+            pos = {h: j for j, h in enumerate(header)}
+            cols = [(k, pos[k]) for k in COLUMNS if k in pos]
+            jt, jc, ja = pos.get("ticker"), pos.get("currency"), pos.get("as_of")
+            if jt is None:
+                return st
+            for r in rd:
+                try:
+                    vals = {k: _num(r[j]) for k, j in cols}
+                    ts = _parse_ts(r[ja]) if ja is not None else math.nan
+                    cur = r[jc] if jc is not None else None
+                    st.put(r[jt], currency=cur, as_of=ts, **vals)
+                except (IndexError, ValueError):
+                    continue
+        return st
+
+def _num(s: str) -> float:
+    return float(s) if s not in ("", None) else math.nan
+
+def _parse_ts(s: str) -> float:
+    if not s:
+        return math.nan
+    return datetime.fromisoformat(s.replace("Z", "+00:00")).timestamp()
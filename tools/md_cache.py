@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/md_cache.py
+Lokaler Marktdaten-Cache vor dem Kurs-Provider (yfinance), ohne Zusatz-Abhängigkeiten:
+- Single-Flight: gleichzeitige Anfragen für denselben (kind, symbol, range, interval)
+  teilen sich genau einen Upstream-Call
+- TTL je Datentyp (Tageshistorie, Intraday, FX, Stammdaten)
+- Kennzahlen: hits / misses / upstream_calls / coalesced / errors (JSON unter /stats),
+  Upstream-Latenz je Datentyp als Histogramm (OpenMetrics unter /metrics)
+- optional als Dienst auf localhost (HTTP), damit mehrere Skripte eines Jobs
+  denselben Cache nutzen:
+
+    python -m tools.md_cache serve            # startet auf 127.0.0.1:8765
+    python -m tools.md_cache wait --url http://127.0.0.1:8765   # bis /stats antwortet (CI)
+    MARS_MD_CACHE_URL=http://127.0.0.1:8765 python tools/live_data.py
+    python -m tools.md_cache metrics
+    curl -s http://127.0.0.1:8765/metrics
+
+Ohne MARS_MD_CACHE_URL (oder wenn der Dienst nicht erreichbar ist) läuft
+derselbe Cache im Prozess – Aufrufer merken keinen Unterschied. Nach einem
+Verbindungsfehler wird der Dienst erst nach REMOTE_RETRY_S erneut versucht.
+"""
+
+from __future__ import annotations
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import pandas as pd
+
+from tools import metrics as om
+
+# TTL in Sekunden je Datentyp
+TTLS = {
+    "history":  900,     # Tageskerzen
+    "intraday": 60,      # Kerzen < 1d
+    "fx":       300,     # Devisenkurse
+    "meta":     86400,   # Währung & Stammdaten
+}
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = int(os.getenv("MARS_MD_CACHE_PORT", "8765"))
+
+UPSTREAM_SECONDS = om.histogram("mars_md_upstream_seconds", "Dauer eines Upstream-Calls", ("kind",))
+UPSTREAM_ERRORS = om.counter("mars_md_upstream_errors", "fehlgeschlagene Upstream-Calls", ("kind",))
+CACHE_EVENTS = om.counter("mars_md_cache_events", "Cache-Ereignisse (hit/miss/coalesced)", ("event",))
+
+# ------------------------------------------------------------
+# Provider (Upstream)
+# ------------------------------------------------------------
+class YahooProvider:
+    """Dünne Hülle um yfinance; einziger Ort mit Netzwerkzugriff."""
+
+    def history(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        import yfinance as yf
+        return yf.Ticker(symbol).history(period=period, interval=interval, auto_adjust=False)
+
+    def bulk_history(self, symbols: list[str], period: str, interval: str) -> dict[str, pd.DataFrame]:
+        """Ein Request für viele Symbole (yf.download); fehlende Symbole → leerer Frame."""
+        import yfinance as yf
+        df = yf.download(symbols, period=period, interval=interval, group_by="ticker",
+                         auto_adjust=False, progress=False, threads=True)
+        out = {}
+        for s in symbols:
+            try:
+                sub = df[s] if isinstance(df.columns, pd.MultiIndex) else df
+                out[s] = sub.dropna(how="all")
+            except KeyError:
+                out[s] = pd.DataFrame()
+        return out
+
+    def currency(self, symbol: str) -> str | None:
+        import yfinance as yf
+        t = yf.Ticker(symbol)
+        try:
+            cur = t.fast_info.currency
+            if cur:
+                return str(cur).upper()
+        except Exception:
+            pass
+        try:
+            cur = t.info.get("currency")
+            return str(cur).upper() if cur else None
+        except Exception:
+            return None
+
+# ------------------------------------------------------------
+# Cache mit Single-Flight
+# ------------------------------------------------------------
+class _Flight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: BaseException | None = None
+
+class MarketDataCache:
+    def __init__(self, provider=None, ttls: dict | None = None):
+        self.provider = provider or YahooProvider()
+        self.ttls = {**TTLS, **(ttls or {})}
+        self._lock = threading.Lock()
+        self._store: dict[tuple, tuple[float, object]] = {}
+        self._inflight: dict[tuple, _Flight] = {}
+        self.stats = {"hits": 0, "misses": 0, "upstream_calls": 0, "coalesced": 0, "errors": 0}
+
+    def _get(self, key: tuple, ttl: float, load):
+        now = time.monotonic()
+        with self._lock:
+            hit = self._store.get(key)
+            if hit is not None and hit[0] > now:
+                self.stats["hits"] += 1
+                return hit[1]
+            self.stats["misses"] += 1
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            with self._lock:
+                self.stats["upstream_calls"] += 1
+            with UPSTREAM_SECONDS.labels(key[0]).time():
+                flight.value = load()
+            with self._lock:
+                self._store[key] = (time.monotonic() + ttl, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self.stats["errors"] += 1
+            UPSTREAM_ERRORS.labels(key[0]).inc()
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def history(self, symbol: str, period: str = "90d", interval: str = "1d") -> pd.DataFrame:
+        kind = "history" if interval.endswith(("d", "wk", "mo")) else "intraday"
+        key = (kind, symbol, period, interval)
+        return self._get(key, self.ttls[kind], lambda: self.provider.history(symbol, period, interval))
+
+    def bulk_history(self, symbols: list[str], period: str = "5d", interval: str = "1d") -> dict[str, pd.DataFrame]:
+        """
+        Wie history(), aber alle Cache-Misses eines Aufrufs gehen in EINEN Upstream-Call.
+        Symbole, die gerade ein anderer Aufrufer lädt, werden abgewartet (Single-Flight).
+        """
+        kind = "history" if interval.endswith(("d", "wk", "mo")) else "intraday"
+        out: dict[str, pd.DataFrame] = {}
+        lead: list[tuple[str, tuple, _Flight]] = []
+        follow: list[tuple[str, _Flight]] = []
+        now = time.monotonic()
+        with self._lock:
+            for s in dict.fromkeys(symbols):
+                key = (kind, s, period, interval)
+                hit = self._store.get(key)
+                if hit is not None and hit[0] > now:
+                    self.stats["hits"] += 1
+                    out[s] = hit[1]
+                    continue
+                self.stats["misses"] += 1
+                flight = self._inflight.get(key)
+                if flight is None:
+                    flight = self._inflight[key] = _Flight()
+                    lead.append((s, key, flight))
+                else:
+                    self.stats["coalesced"] += 1
+                    follow.append((s, flight))
+
+        if lead:
+            try:
+                with self._lock:
+                    self.stats["upstream_calls"] += 1
+                with UPSTREAM_SECONDS.labels(kind).time():
+                    got = self.provider.bulk_history([s for s, _, _ in lead], period, interval)
+                expires = time.monotonic() + self.ttls[kind]
+                with self._lock:
+                    for s, key, flight in lead:
+                        flight.value = got.get(s, pd.DataFrame())
+                        self._store[key] = (expires, flight.value)
+                        out[s] = flight.value
+            except BaseException as e:
+                with self._lock:
+                    self.stats["errors"] += 1
+                UPSTREAM_ERRORS.labels(kind).inc()
+                for _, _, flight in lead:
+                    flight.error = e
+                raise
+            finally:
+                with self._lock:
+                    for _, key, _ in lead:
+                        self._inflight.pop(key, None)
+                for _, _, flight in lead:
+                    flight.event.set()
+
+        for s, flight in follow:
+            flight.event.wait()
+            if flight.error is None:
+                out[s] = flight.value
+        return out
+
+    def fx_history(self, pair: str, period: str = "1d", interval: str = "1d") -> pd.DataFrame:
+        key = ("fx", pair, period, interval)
+        return self._get(key, self.ttls["fx"], lambda: self.provider.history(pair, period, interval))
+
+    def currency(self, symbol: str) -> str | None:
+        key = ("meta", symbol, "currency", "")
+        return self._get(key, self.ttls["meta"], lambda: self.provider.currency(symbol))
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._store), "inflight": len(self._inflight)}
+
+# ------------------------------------------------------------
+# HTTP-Dienst (localhost)
+# ------------------------------------------------------------
+def _df_to_json(df: pd.DataFrame) -> str:
+    """orient=split plus "tz" des Index: ISO-Zeitstempel verlieren sonst die Börsen-Zeitzone
+    (XETRA-Tageskerze 00:00 Berlin käme als 22:00 UTC des Vortags zurück)."""
+    tz = getattr(df.index, "tz", None)
+    out = json.loads(df.to_json(orient="split", date_format="iso", date_unit="s"))
+    out["tz"] = str(tz) if tz is not None else None
+    return json.dumps(out)
+
+def _df_from_json(s: str) -> pd.DataFrame:
+    raw = json.loads(s)
+    tz = raw.pop("tz", None)
+    df = pd.read_json(StringIO(json.dumps(raw)), orient="split", convert_dates=False)
+    if len(df.index):
+        idx = pd.to_datetime(df.index, utc=True)
+        df.index = idx.tz_convert(tz) if tz else idx.tz_localize(None)
+    return df
+
+def _openmetrics(cache: MarketDataCache) -> str:
+    st = cache.metrics()
+    for ev in ("hits", "misses", "coalesced"):
+        CACHE_EVENTS.labels(ev).set(st[ev])
+    om.gauge("mars_md_cache_entries", "Einträge im Cache").set(st["entries"])
+    om.gauge("mars_md_cache_inflight", "laufende Upstream-Calls").set(st["inflight"])
+    return om.render()
+
+def _make_handler(cache: MarketDataCache):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):  # ruhig im CI-Log
+            pass
+
+        def _send(self, code: int, body: str, ctype: str = "application/json"):
+            raw = body.encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_GET(self):
+            u = urllib.parse.urlparse(self.path)
+            q = {k: v[-1] for k, v in urllib.parse.parse_qs(u.query).items()}
+            try:
+                if u.path == "/stats":
+                    return self._send(200, json.dumps(cache.metrics()))
+                if u.path == "/metrics":
+                    return self._send(200, _openmetrics(cache), om.CONTENT_TYPE)
+                if u.path == "/history":
+                    df = cache.history(q["symbol"], q.get("period", "90d"), q.get("interval", "1d"))
+                    return self._send(200, _df_to_json(df))
+                if u.path == "/bulk":
+                    syms = [x for x in q["symbols"].split(",") if x]
+                    got = cache.bulk_history(syms, q.get("period", "5d"), q.get("interval", "1d"))
+                    return self._send(200, json.dumps({s: _df_to_json(df) for s, df in got.items()}))
+                if u.path == "/fx":
+                    df = cache.fx_history(q["pair"], q.get("period", "1d"), q.get("interval", "1d"))
+                    return self._send(200, _df_to_json(df))
+                if u.path == "/currency":
+                    return self._send(200, json.dumps({"currency": cache.currency(q["symbol"])}))
+                return self._send(404, json.dumps({"error": "not found"}))
+            except KeyError as e:
+                return self._send(400, json.dumps({"error": f"missing {e}"}))
+            except Exception as e:
+                return self._send(502, json.dumps({"error": str(e)}))
+
+    return Handler
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, cache: MarketDataCache | None = None):
+    srv = ThreadingHTTPServer((host, port), _make_handler(cache or MarketDataCache()))
+    srv.daemon_threads = True
+    return srv
+
+# ------------------------------------------------------------
+# Client-API (für live_data, run_report_json, ...)
+# ------------------------------------------------------------
+_LOCAL: MarketDataCache | None = None
+_REMOTE_DOWN_UNTIL = 0.0   # monotonic; bis dahin lokal statt Dienst
+REMOTE_RETRY_S = float(os.getenv("MARS_MD_CACHE_RETRY", "5"))
+
+def local_cache() -> MarketDataCache:
+    global _LOCAL
+    if _LOCAL is None:
+        _LOCAL = MarketDataCache()
+    return _LOCAL
+
+def set_provider(provider) -> MarketDataCache:
+    """Tauscht den Upstream des In-Prozess-Caches (z.B. Fake-Provider für lokale Läufe)."""
+    global _LOCAL
+    _LOCAL = MarketDataCache(provider)
+    return _LOCAL
+
+def _remote(path: str, **params) -> str | None:
+    global _REMOTE_DOWN_UNTIL
+    base = os.getenv("MARS_MD_CACHE_URL", "").rstrip("/")
+    if not base or time.monotonic() < _REMOTE_DOWN_UNTIL:
+        return None
+    url = f"{base}{path}?{urllib.parse.urlencode(params)}"
+    try:
+        with urllib.request.urlopen(url, timeout=60) as r:
+            return r.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        if e.code == 502:
+            raise RuntimeError(f"upstream failed for {params}") from e
+        raise
+    except OSError:
+        # Dienst nicht erreichbar (z.B. startet noch) → kurz lokal weiter, dann erneut versuchen
+        _REMOTE_DOWN_UNTIL = time.monotonic() + REMOTE_RETRY_S
+        return None
+
+def history(symbol: str, period: str = "90d", interval: str = "1d") -> pd.DataFrame:
+    body = _remote("/history", symbol=symbol, period=period, interval=interval)
+    if body is not None:
+        return _df_from_json(body)
+    return local_cache().history(symbol, period, interval)
+
+def bulk_history(symbols: list[str], period: str = "5d", interval: str = "1d") -> dict[str, pd.DataFrame]:
+    body = _remote("/bulk", symbols=",".join(symbols), period=period, interval=interval)
+    if body is not None:
+        return {s: _df_from_json(v) for s, v in json.loads(body).items()}
+    return local_cache().bulk_history(symbols, period, interval)
+
+def fx_history(pair: str, period: str = "1d", interval: str = "1d") -> pd.DataFrame:
+    body = _remote("/fx", pair=pair, period=period, interval=interval)
+    if body is not None:
+        return _df_from_json(body)
+    return local_cache().fx_history(pair, period, interval)
+
+def currency(symbol: str) -> str | None:
+    body = _remote("/currency", symbol=symbol)
+    if body is not None:
+        return json.loads(body).get("currency")
+    return local_cache().currency(symbol)
+
+def wait_ready(url: str, timeout: float = 30.0, interval: float = 0.25) -> bool:
+    """Pollt {url}/stats, bis der Dienst antwortet; False nach `timeout` Sekunden."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f"{url.rstrip('/')}/stats", timeout=2) as r:
+                if r.status == 200:
+                    return True
+        except OSError:
+            pass
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+def metrics() -> dict:
+    body = _remote("/stats")
+    if body is not None:
+        return json.loads(body)
+    return local_cache().metrics()
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="md_cache", description="Lokaler Marktdaten-Cache")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("serve")
+    s.add_argument("--host", default=DEFAULT_HOST)
+    s.add_argument("--port", type=int, default=DEFAULT_PORT)
+    sub.add_parser("metrics")
+    w = sub.add_parser("wait", help="bis der Dienst antwortet (Exit 1 nach --timeout)")
+    w.add_argument("--url", default=os.getenv("MARS_MD_CACHE_URL") or f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+    w.add_argument("--timeout", type=float, default=30.0)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "metrics":
+        print(json.dumps(metrics(), indent=2))
+        return 0
+    if args.cmd == "wait":
+        ok = wait_ready(args.url, args.timeout)
+        print(f"[md-cache] {args.url} {'bereit' if ok else f'nicht erreichbar nach {args.timeout:.0f}s'}")
+        return 0 if ok else 1
+
+    srv = serve(args.host, args.port)
+    print(f"[md-cache] listening on http://{args.host}:{args.port}", flush=True)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
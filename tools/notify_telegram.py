@@ -3,9 +3,14 @@ import os, json, pathlib, sys, time
 import urllib.parse
 import urllib.request
 
+from tools import metrics as om
+
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 ALERTS = ROOT / "data" / "alerts_out.json"
 
+SEND_SECONDS = om.histogram("mars_telegram_send_seconds", "Latenz sendMessage")
+MESSAGES = om.counter("mars_telegram_messages", "Telegram-Nachrichten", ("result",))
+
 BOT  = os.environ.get("TELEGRAM_BOT_TOKEN", "")
 CHAT = os.environ.get("TELEGRAM_CHAT_ID", "")
 
@@ -92,11 +97,17 @@ def main():
         if len(msg) > 3900:
             msg = msg[:3900] + " …"
         try:
-            send(msg)
+            with SEND_SECONDS.time():
+                send(msg)
+            MESSAGES.labels("ok").inc()
             time.sleep(0.7)
         except Exception:
             # niemals den Workflow hart fehlschlagen lassen
+            MESSAGES.labels("error").inc()
             continue
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        om.export("notify_telegram")
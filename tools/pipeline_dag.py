@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/pipeline_dag.py
+In-Prozess DAG-Runner für die gesamte Pipeline (statt Cron-Versatz :00/:02/:05/:06):
+- Stages deklarieren Inputs/Outputs; Abhängigkeiten ergeben sich daraus
+  (Stage B hängt von A ab, wenn B einen Output von A liest)
+- unabhängige Stages laufen parallel (eigene Prozesse)
+- Stage wird übersprungen, wenn der Hash ihrer Inputs seit dem letzten
+  erfolgreichen Lauf unverändert ist und ihre Outputs existieren;
+  marktabhängige Stages haben zusätzlich eine TTL
+- Zustand in data/state/dag_state.json
+
+    python -m tools.pipeline_dag                 # alles, so schnell wie möglich
+    python -m tools.pipeline_dag --force prices  # Stage trotz Cache neu rechnen
+    python -m tools.pipeline_dag --dry-run
+"""
+
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+STATE_FILE = ROOT / "data" / "state" / "dag_state.json"
+
+@dataclass
+class Stage:
+    name: str
+    cmd: list[str]
+    inputs: list[str] = field(default_factory=list)
+    outputs: list[str] = field(default_factory=list)
+    ttl: int | None = None          # Sekunden; None = nur Input-Hash zählt
+    stdout_to: str | None = None    # stdout des Skripts als Output-Datei
+
+PY = sys.executable
+
+STAGES = [
+    Stage("universe", [PY, "tools/auto_extend_universe.py"],
+          inputs=["data/portfolios.json", "data/alerts_config.json"],
+          outputs=["data/universe_core.txt", "data/universe_watch.txt"]),
+    Stage("prices", [PY, "tools/live_data.py"],
+          inputs=["data/universe_core.txt", "data/universe_watch.txt"],
+          outputs=["data/prices_eur_snapshot.csv"], ttl=15 * 60),
+    Stage("history", [PY, "-m", "tools.history_store", "refresh"],
+          inputs=["data/universe_core.txt", "data/universe_watch.txt"],
+          outputs=["data/history/panel.npz"], ttl=6 * 3600),
+    Stage("indicators", [PY, "-m", "tools.relative_strength", "--refresh"],
+          inputs=["data/history/panel.npz", "data/alerts_config.json"],
+          outputs=["data/state/relative_strength.npz"]),
+    Stage("extend", [PY, "tools/auto_extend.py"],
+          inputs=["data/portfolios.json", "data/universe_core.txt", "data/universe_watch.txt",
+                  "data/ex130.txt", "data/universe_ignore.txt"],
+          outputs=["data/extended_universe.txt"]),
+    Stage("screening", [PY, "-m", "tools.screening"],
+          inputs=["data/extended_universe.txt", "data/alerts_config.json", "data/history/panel.npz"],
+          outputs=["data/screening_out.json", "data/screening_snapshot.csv"], ttl=15 * 60),
+    Stage("alerts", [PY, "tools/run_alerts.py"],
+          inputs=["data/prices_eur_snapshot.csv", "data/fx_snapshot.csv",
+                  "data/alerts_config.json", "data/state/relative_strength.npz",
+                  "data/positions.json"],
+          outputs=["docs/alerts.json", "data/alerts_out.json", "docs/alerts/index.json"]),
+    Stage("report", [PY, "run_report_json.py"],
+          inputs=["data/history/panel.npz", "data/alerts_config.json", "data/portfolios.json",
+                  "data/fx_snapshot.csv"],
+          outputs=["docs/report.json"], stdout_to="docs/report.json"),
+    Stage("render_alerts", [PY, "tools/render_alerts_md.py"],
+          inputs=["docs/alerts.json"], outputs=["docs/alerts_brief.md"]),
+    Stage("render_portfolio", [PY, "tools/render_portfolio_md.py"],
+          inputs=["data/portfolios.json"], outputs=["docs/portfolio_overview.md"]),
+    Stage("notify", [PY, "tools/notify_telegram.py"],
+          inputs=["data/alerts_out.json"]),
+]
+
+# ------------------------------------------------------------
+# Hilfsfunktionen
+# ------------------------------------------------------------
+def _file_digest(p: Path) -> str:
+    if not p.exists():
+        return "missing"
+    h = hashlib.sha256()
+    with p.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def input_hash(stage: Stage, root: Path = ROOT) -> str:
+    h = hashlib.sha256(json.dumps(stage.cmd[1:]).encode())
+    for rel in sorted(stage.inputs):
+        h.update(rel.encode())
+        h.update(_file_digest(root / rel).encode())
+    return h.hexdigest()
+
+def dependencies(stages: list[Stage]) -> dict[str, set[str]]:
+    producer = {o: s.name for s in stages for o in s.outputs}
+    return {s.name: {producer[i] for i in s.inputs if i in producer and producer[i] != s.name}
+            for s in stages}
+
+def _load_state(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+def _save_state(path: Path, state: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+def is_fresh(stage: Stage, prev: dict | None, digest: str, root: Path = ROOT) -> bool:
+    if not prev or prev.get("hash") != digest:
+        return False
+    if not all((root / o).exists() for o in stage.outputs):
+        return False
+    if stage.ttl is not None and time.time() - prev.get("ok_at", 0) > stage.ttl:
+        return False
+    return True
+
+def _run_stage(stage: Stage, root: Path) -> tuple[int, float, str]:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(root), os.getenv("PYTHONPATH")]))}
+    t0 = time.perf_counter()
+    proc = subprocess.run(stage.cmd, cwd=root, env=env, capture_output=True, text=True)
+    dt = time.perf_counter() - t0
+    if proc.returncode == 0 and stage.stdout_to:
+        out = root / stage.stdout_to
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(proc.stdout, encoding="utf-8")
+    tail = (proc.stderr or proc.stdout or "").strip().splitlines()[-5:]
+    return proc.returncode, dt, "\n".join(tail)
+
+# ------------------------------------------------------------
+# Scheduler
+# ------------------------------------------------------------
+def run(stages: list[Stage] = STAGES, force: set[str] | None = None, dry_run: bool = False,
+        workers: int | None = None, root: Path = ROOT, state_file: Path = STATE_FILE) -> dict:
+    """
+    Führt den DAG aus. Rückgabe: {stage: status} mit status in
+    ok | skipped | failed | blocked (Upstream fehlgeschlagen) | planned (dry-run).
+    Eine Stage, deren Upstream neu gerechnet wurde, sieht geänderte Input-Hashes
+    und läuft dadurch automatisch mit.
+    """
+    force = force or set()
+    by_name = {s.name: s for s in stages}
+    deps = dependencies(stages)
+    state = _load_state(state_file)
+    status: dict[str, str] = {}
+    pending = set(by_name)
+    running = {}
+
+    def ready(name: str) -> bool:
+        return all(d in status for d in deps[name])
+
+    with ThreadPoolExecutor(max_workers=workers or len(stages)) as pool:
+        while pending or running:
+            for name in sorted(n for n in pending if ready(n)):
+                pending.discard(name)
+                st = by_name[name]
+                if any(status[d] in ("failed", "blocked") for d in deps[name]):
+                    status[name] = "blocked"
+                    print(f"[dag] {name:<16} blocked (upstream failed)")
+                    continue
+                digest = input_hash(st, root)
+                if name not in force and is_fresh(st, state.get(name), digest, root):
+                    status[name] = "skipped"
+                    print(f"[dag] {name:<16} skipped (inputs unchanged)")
+                    continue
+                if dry_run:
+                    status[name] = "planned"
+                    print(f"[dag] {name:<16} would run: {' '.join(st.cmd[1:])}")
+                    continue
+                print(f"[dag] {name:<16} started")
+                running[pool.submit(_run_stage, st, root)] = name
+
+            if not running:
+                if pending and not any(ready(n) for n in pending):
+                    raise RuntimeError(f"Zyklus im DAG: {sorted(pending)}")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                rc, dt, tail = fut.result()
+                if rc == 0:
+                    status[name] = "ok"
+                    # Hash nach dem Lauf: Inputs, die eine Stage selbst nicht ändert, bleiben gleich
+                    state[name] = {"hash": input_hash(by_name[name], root), "ok_at": time.time(),
+                                   "seconds": round(dt, 3)}
+                    _save_state(state_file, state)
+                    print(f"[dag] {name:<16} ok ({dt:.1f}s)")
+                else:
+                    status[name] = "failed"
+                    print(f"[dag] {name:<16} FAILED rc={rc} ({dt:.1f}s)" + (f"\n{tail}" if tail else ""))
+    return status
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="pipeline_dag")
+    ap.add_argument("--force", nargs="*", default=None, metavar="STAGE",
+                    help="Stages trotz unveränderter Inputs ausführen (ohne Namen: alle)")
+    ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--workers", type=int)
+    args = ap.parse_args(argv)
+
+    names = {s.name for s in STAGES}
+    force = names if args.force == [] else set(args.force or [])
+    unknown = force - names
+    if unknown:
+        ap.error(f"unbekannte Stages: {sorted(unknown)}")
+
+    t0 = time.perf_counter()
+    status = run(force=force, dry_run=args.dry_run, workers=args.workers)
+    counts = {k: sum(1 for v in status.values() if v == k) for k in sorted(set(status.values()))}
+    print(f"[dag] done in {time.perf_counter() - t0:.1f}s " + " ".join(f"{k}={v}" for k, v in counts.items()))
+    return 1 if "failed" in status.values() else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/pivots.py
+OHLC-Pivot-Engine (ersetzt die „Close vor 5 Tagen“-Näherung für LOW5):
+- RollingExtreme: gleitendes Min/Max je Ticker mit monotoner Deque, O(1) amortisiert je Kerze
+- rolling_min()/rolling_max(): dasselbe vektorisiert über (T, N) nach van Herk/Gil-Werman
+  (Präfix-/Suffix-Extrema je Block, unabhängig von der Fensterlänge)
+- Swing-Pivots: Tief/Hoch ist Extremum im Fenster ±k, bestätigt k Kerzen später
+- levels(): je Ticker LOW5/HIGH5 der Vortage, zuletzt bestätigtes Swing-Tief/-Hoch und
+  die Flags close_below_low5 / pivot_break / pivot_breakout für die Regel-Engine
+
+    python -m tools.pivots                    # Pivot-Brüche aus dem Historien-Speicher
+"""
+
+from __future__ import annotations
+from collections import deque
+import argparse
+import math
+
+import numpy as np
+
+from tools.relative_strength import ffill
+
+LOOKBACK = 5   # LOW5: Tief der 5 Sessions vor heute
+SWING_K = 3    # Swing-Pivot: Extremum in ±3 Kerzen
+
+# ------------------------------------------------------------
+# Streaming (je Ticker)
+# ------------------------------------------------------------
+class RollingExtreme:
+    """Min (mode="min") bzw. Max der letzten `window` Werte; NaN wird übersprungen."""
+    __slots__ = ("w", "_sign", "_dq", "_t")
+
+    def __init__(self, window: int = LOOKBACK, mode: str = "min"):
+        self.w = window
+        self._sign = 1.0 if mode == "min" else -1.0
+        self._dq: deque = deque()   # (t, sign*x), Werte aufsteigend
+        self._t = 0
+
+    def push(self, x: float) -> float:
+        t, dq = self._t, self._dq
+        self._t += 1
+        if math.isfinite(x):
+            v = self._sign * x
+            while dq and dq[-1][1] >= v:
+                dq.pop()
+            dq.append((t, v))
+        while dq and dq[0][0] <= t - self.w:
+            dq.popleft()
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self._sign * self._dq[0][1] if self._dq else math.nan
+
+# ------------------------------------------------------------
+# Vektorisiert (Universum)
+# ------------------------------------------------------------
+def _vhgw(a: np.ndarray, w: int, op) -> np.ndarray:
+    """van Herk/Gil-Werman für op=np.minimum; a ohne NaN (bereits durch ±inf ersetzt)."""
+    T = a.shape[0]
+    out = np.full(a.shape, np.inf)
+    if w < 1 or T < w:
+        return out
+    blocks = -(-T // w)
+    pad = np.full((blocks * w,) + a.shape[1:], np.inf)
+    pad[:T] = a
+    b = pad.reshape((blocks, w) + a.shape[1:])
+    g = op.accumulate(b, axis=1).reshape(pad.shape)                       # Präfix je Block
+    h = op.accumulate(b[:, ::-1], axis=1)[:, ::-1].reshape(pad.shape)     # Suffix je Block
+    out[w - 1:] = op(h[:T - w + 1], g[w - 1:T])
+    return out
+
+def rolling_min(a: np.ndarray, window: int) -> np.ndarray:
+    """Min über a[t-window+1..t] je Spalte (NaN ignoriert); erste window-1 Zeilen NaN."""
+    a = np.asarray(a, dtype=np.float64)
+    out = _vhgw(np.where(np.isnan(a), np.inf, a), window, np.minimum)
+    return np.where(np.isinf(out), np.nan, out)
+
+def rolling_max(a: np.ndarray, window: int) -> np.ndarray:
+    a = np.asarray(a, dtype=np.float64)
+    out = -_vhgw(np.where(np.isnan(a), np.inf, -a), window, np.minimum)
+    return np.where(np.isinf(out), np.nan, out)
+
+def swing_pivots(high: np.ndarray, low: np.ndarray, k: int = SWING_K) -> tuple[np.ndarray, np.ndarray]:
+    """(Swing-Tief-Maske, Swing-Hoch-Maske) (T, N): Extremum im Fenster t-k..t+k."""
+    low = np.asarray(low, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    w = 2 * k + 1
+    is_low = np.zeros(low.shape, dtype=bool)
+    is_high = np.zeros(high.shape, dtype=bool)
+    if low.shape[0] >= w:
+        # Zentriertes Fenster um t = rollendes Fenster, das bei t+k endet
+        is_low[k:-k] = low[k:-k] == rolling_min(low, w)[w - 1:]
+        is_high[k:-k] = high[k:-k] == rolling_max(high, w)[w - 1:]
+    return is_low, is_high
+
+def confirmed_levels(values: np.ndarray, mask: np.ndarray, k: int = SWING_K) -> np.ndarray:
+    """Zu jedem Zeitpunkt das zuletzt bestätigte Pivot-Niveau (erst k Kerzen nach dem Pivot bekannt)."""
+    lv = np.full(values.shape, np.nan)
+    if values.shape[0] > k:
+        lv[k:] = np.where(mask[:-k] if k else mask, values[:-k] if k else values, np.nan)
+    return ffill(lv)
+
+def levels(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+           lookback: int = LOOKBACK, k: int = SWING_K) -> dict[str, np.ndarray]:
+    """Kennzahlen der letzten Zeile je Spalte; Eingaben (T, N), Zeitachse 0."""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    T, N = close.shape
+    nan = np.full(N, np.nan)
+    out = {"low5": nan.copy(), "high5": nan.copy(), "pivot_low": nan.copy(), "pivot_high": nan.copy()}
+    if T > lookback:
+        out["low5"] = rolling_min(low[-lookback - 1:-1], lookback)[-1]
+        out["high5"] = rolling_max(high[-lookback - 1:-1], lookback)[-1]
+    if T > 2 * k:
+        is_low, is_high = swing_pivots(high, low, k)
+        out["pivot_low"] = confirmed_levels(low, is_low, k)[-1]
+        out["pivot_high"] = confirmed_levels(high, is_high, k)[-1]
+    last = close[-1] if T else nan
+    with np.errstate(invalid="ignore"):
+        out["close_below_low5"] = last < out["low5"]
+        out["pivot_break"] = last < out["pivot_low"]
+        out["pivot_breakout"] = last > out["pivot_high"]
+    return out
+
+def stack_tail(frames: list, column: str, rows: int) -> np.ndarray:
+    """Letzte `rows` Werte einer Spalte je DataFrame, rechtsbündig gestapelt zu (rows, N)."""
+    out = np.full((rows, len(frames)), np.nan)
+    for j, df in enumerate(frames):
+        if df is None or column not in df:
+            continue
+        v = df[column].astype(float).to_numpy()[-rows:]
+        out[rows - len(v):, j] = v
+    return out
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    from tools.history_store import load_panel
+
+    ap = argparse.ArgumentParser(prog="pivots")
+    ap.add_argument("--lookback", type=int, default=LOOKBACK)
+    ap.add_argument("--k", type=int, default=SWING_K)
+    ap.add_argument("tickers", nargs="*", help="Auswahl (Default: alle Brüche)")
+    args = ap.parse_args(argv)
+
+    panel = load_panel()
+    if not len(panel.dates):
+        print("[pivots] keine Historie – erst `python -m tools.history_store refresh`")
+        return 1
+    lv = levels(panel.field("high"), panel.field("low"), panel.field("close"), args.lookback, args.k)
+    close = panel.field("close")[-1]
+    want = {t.upper() for t in args.tickers}
+    print(f"[pivots] {len(panel)} tickers, {panel.dates[-1]}: lookback={args.lookback} k={args.k}")
+    for i, t in enumerate(panel.tickers):
+        if want and t not in want:
+            continue
+        if want or lv["pivot_break"][i] or lv["close_below_low5"][i]:
+            print(f"  {t:<10} close={close[i]:10.2f} low5={lv['low5'][i]:10.2f} "
+                  f"pivot_low={lv['pivot_low'][i]:10.2f} "
+                  f"{'LOW5 ' if lv['close_below_low5'][i] else ''}{'PIVOT' if lv['pivot_break'][i] else ''}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/publish.py
+Veröffentlicht die Alert-Ausgabe unter docs/ in kleinen, cache-freundlichen Teilen
+(docs/alerts.json bleibt unverändert als Gesamtdokument bestehen):
+
+  docs/alerts.min.json(.gz|.br)         Gesamtdokument, minifiziert
+  docs/alerts/books/<book>.json(...)    ein Shard je Buch (mars/venus/family)
+  docs/alerts/days/<YYYY-MM-DD>.json    alle unterschiedlichen Alerts eines Tages
+  docs/alerts/delta.json(...)           nur Alerts, die seit dem letzten Lauf neu sind
+  docs/alerts/index.json                Manifest: Pfad -> sha256, Bytes, ETag (zuerst pollen)
+
+- Dateien werden nur neu geschrieben, wenn sich ihr Inhalt ändert (stabile
+  mtime/ETag, kleine Git-Diffs); gzip deterministisch (mtime=0)
+- brotli nur, wenn das Paket installiert ist
+- Identität eines Alerts: (Buch, Ticker bzw. Topic, Regel)
+
+    python -m tools.publish                   # aus docs/alerts.json
+"""
+
+from __future__ import annotations
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import gzip
+import hashlib
+import json
+
+try:
+    import brotli  # optional
+except ImportError:
+    brotli = None
+
+ROOT = Path(__file__).resolve().parents[1]
+DOCS = ROOT / "docs"
+SRC = DOCS / "alerts.json"
+OUT_DIR = DOCS / "alerts"
+
+BOOKS = ("mars", "venus", "family")
+KEEP_DAYS = 14
+MIN_COMPRESS_BYTES = 256   # darunter lohnt gzip/brotli nicht
+
+# ------------------------------------------------------------
+# Hilfsfunktionen
+# ------------------------------------------------------------
+def _minify(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+def _write_if_changed(path: Path, raw: bytes) -> bool:
+    if path.exists() and path.read_bytes() == raw:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(raw)
+    tmp.replace(path)
+    return True
+
+def _variants(path: Path, raw: bytes) -> dict[str, bytes]:
+    out = {path.name: raw}
+    if len(raw) >= MIN_COMPRESS_BYTES:
+        out[path.name + ".gz"] = gzip.compress(raw, compresslevel=9, mtime=0)
+        if brotli is not None:
+            out[path.name + ".br"] = brotli.compress(raw, quality=11)
+    return out
+
+def _alert_key(book: str, a: dict) -> str:
+    """Sektion|Ticker/Topic|Regel, dazu der Geltungsbereich (a["book"], z.B. Family-Breach
+    je mars/venus) – sonst fielen gleichartige Breaches verschiedener Bücher zusammen."""
+    who = str(a.get("ticker") or a.get("topic") or "").upper()
+    key = f"{book}|{who}|{a.get('type') or a.get('topic') or ''}"
+    scope = str(a.get("book") or "").lower()
+    return f"{key}|{scope}" if scope else key
+
+def _flatten(result: dict) -> dict[str, dict]:
+    """key -> {book, key, alert} über alle Bücher (Groß-/Kleinschreibung der Sektionen egal)."""
+    out = {}
+    for sec_name, sec in result.items():
+        book = str(sec_name).lower()
+        if book not in BOOKS or not isinstance(sec, dict):
+            continue
+        for a in sec.get("alerts") or []:
+            if isinstance(a, dict):
+                k = _alert_key(book, a)
+                out.setdefault(k, {"book": book, "key": k, **a})
+    return out
+
+def _read_json(path: Path, default):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return default
+
+# ------------------------------------------------------------
+# Publish
+# ------------------------------------------------------------
+def publish(result: dict, docs: Path = DOCS, keep_days: int = KEEP_DAYS) -> dict:
+    """Schreibt alle Teile; Rückgabe: das Manifest (index.json)."""
+    out_dir = docs / "alerts"
+    as_of = result.get("as_of_utc") or datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    day = str(as_of)[:10]
+    current = _flatten(result)
+
+    # Vorheriger Lauf: Schlüssel aus den bisherigen Buch-Shards
+    prev_keys = set()
+    for book in BOOKS:
+        for a in _read_json(out_dir / "books" / f"{book}.json", {}).get("alerts", []):
+            prev_keys.add(_alert_key(book, a))
+
+    docs_out: dict[Path, object] = {docs / "alerts.min.json": result}
+    for book in BOOKS:
+        sec = next((v for k, v in result.items() if str(k).lower() == book and isinstance(v, dict)), {})
+        # ohne Zeitstempel: unveränderte Bücher behalten Hash/ETag
+        docs_out[out_dir / "books" / f"{book}.json"] = {"book": book, "alerts": sec.get("alerts") or []}
+
+    new = [v for k, v in current.items() if k not in prev_keys]
+    docs_out[out_dir / "delta.json"] = {"as_of_utc": as_of, "new": new,
+                                        "gone": sorted(prev_keys - set(current))}
+
+    # Tages-Shard: Vereinigung aller Läufe des Tages, first_seen je Alert
+    day_path = out_dir / "days" / f"{day}.json"
+    seen = {a["key"]: a for a in _read_json(day_path, {}).get("alerts", []) if "key" in a}
+    for k, a in current.items():
+        seen.setdefault(k, {**a, "first_seen": as_of})
+    docs_out[day_path] = {"day": day, "alerts": sorted(seen.values(), key=lambda a: a["key"])}
+
+    # Schreiben (+ komprimierte Varianten), Manifest sammeln
+    files = {}
+    for path, obj in docs_out.items():
+        variants = _variants(path, _minify(obj))
+        for ext in (".gz", ".br"):
+            stale = path.with_name(path.name + ext)
+            if stale.name not in variants and stale.exists():
+                stale.unlink()
+        for name, raw in variants.items():
+            p = path.with_name(name)
+            _write_if_changed(p, raw)
+            digest = hashlib.sha256(raw).hexdigest()
+            files[p.relative_to(docs).as_posix()] = {"sha256": digest, "bytes": len(raw),
+                                                     "etag": f'"{digest[:16]}"'}
+
+    # alte Tage entfernen
+    days = sorted(p.name[:10] for p in (out_dir / "days").glob("*.json"))
+    for d in days[:-keep_days] if keep_days else []:
+        for p in (out_dir / "days").glob(f"{d}.json*"):
+            p.unlink()
+    days = days[-keep_days:] if keep_days else days
+    for d in days:
+        p = out_dir / "days" / f"{d}.json"
+        rel = p.relative_to(docs).as_posix()
+        if rel not in files:
+            raw = p.read_bytes()
+            digest = hashlib.sha256(raw).hexdigest()
+            files[rel] = {"sha256": digest, "bytes": len(raw), "etag": f'"{digest[:16]}"'}
+
+    index = {
+        "as_of_utc": as_of,
+        "books": {b: {"alerts": len(docs_out[out_dir / "books" / f"{b}.json"]["alerts"]),
+                      "path": f"alerts/books/{b}.json"} for b in BOOKS},
+        "delta": {"new": len(new), "path": "alerts/delta.json"},
+        "days": days,
+        "files": dict(sorted(files.items())),
+    }
+    _write_if_changed(out_dir / "index.json", _minify(index))
+    return index
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="publish")
+    ap.add_argument("--src", type=Path, default=SRC)
+    ap.add_argument("--keep-days", type=int, default=KEEP_DAYS)
+    args = ap.parse_args(argv)
+
+    result = _read_json(args.src, None)
+    if result is None:
+        print(f"[publish] {args.src} fehlt oder ist ungültig")
+        return 1
+    idx = publish(result, keep_days=args.keep_days)
+    total = sum(f["bytes"] for n, f in idx["files"].items() if n.endswith(".json"))
+    print(f"[publish] {len(idx['files'])} files ({total} bytes json), "
+          f"delta new={idx['delta']['new']}, brotli={'yes' if brotli else 'no'}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/relative_strength.py
+Relative Stärke (RS) des gesamten Universums gegen konfigurierbare Benchmarks:
+- Benchmark je Ticker: explizit (Sektor-ETF) > Börsen-Suffix (.DE → DAX) > Default (NDX)
+- Mehrere Horizonte (z.B. 21/63/126 Sessions), gewichtet zu einem RS-Score
+- Querschnitts-Perzentil-Ränge je Datum in einem einzigen argsort über (T, N)
+- rs_weak = RS-Score < 0 und Rang im unteren Quantil (Default 30%)
+- Ergebnis liegt als Indikator-State unter data/state/relative_strength.npz;
+  Alert-Regeln und Reports lesen rs / rs_rank / rs_weak direkt daraus
+
+    python -m tools.relative_strength            # rechnet aus data/history/panel.npz
+    python -m tools.relative_strength --refresh  # fehlende Benchmarks vorher nachladen
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import json
+import time
+
+import numpy as np
+
+from tools.history_store import HistoryPanel, load_panel, refresh as refresh_history
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+STATE_DIR = DATA / "state"
+RS_STATE = STATE_DIR / "relative_strength.npz"
+CFG_FILE = DATA / "alerts_config.json"
+
+DEFAULTS = {
+    "benchmarks": {
+        "default": "^NDX",
+        "suffix": {".DE": "^GDAXI", ".PA": "^FCHI", ".AS": "^AEX"},
+        "tickers": {},
+    },
+    "horizons": [21, 63, 126],
+    "weights": [0.5, 0.3, 0.2],
+    "weak_rank": 0.30,
+}
+
+# ------------------------------------------------------------
+# Konfiguration
+# ------------------------------------------------------------
+def rs_config(cfg: dict | None = None) -> dict:
+    """Liest meta.relative_strength aus alerts_config.json (oder übergebenem cfg)."""
+    if cfg is None:
+        cfg = json.loads(CFG_FILE.read_text(encoding="utf-8")) if CFG_FILE.exists() else {}
+    user = (cfg.get("meta") or {}).get("relative_strength") or {}
+    out = {**DEFAULTS, **user}
+    out["benchmarks"] = {**DEFAULTS["benchmarks"], **(user.get("benchmarks") or {})}
+    return out
+
+def benchmark_for(ticker: str, bcfg: dict) -> str:
+    t = ticker.upper()
+    if t in (bcfg.get("tickers") or {}):
+        return bcfg["tickers"][t]
+    for suffix, bench in (bcfg.get("suffix") or {}).items():
+        if t.endswith(suffix.upper()):
+            return bench
+    return bcfg.get("default", "^NDX")
+
+def benchmark_symbols(bcfg: dict) -> list[str]:
+    syms = {bcfg.get("default", "^NDX")}
+    syms.update((bcfg.get("suffix") or {}).values())
+    syms.update((bcfg.get("tickers") or {}).values())
+    return sorted(syms)
+
+# ------------------------------------------------------------
+# Vektorisierte Kerne
+# ------------------------------------------------------------
+def ffill(a: np.ndarray) -> np.ndarray:
+    """Forward-Fill entlang der Zeitachse (axis 0) für (T, N)."""
+    if a.size == 0:
+        return a
+    t = np.arange(a.shape[0])[:, None]
+    idx = np.where(np.isnan(a), 0, t)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return a[idx, np.arange(a.shape[1])[None, :]]
+
+def horizon_returns(close: np.ndarray, h: int) -> np.ndarray:
+    out = np.full(close.shape, np.nan, dtype=np.float64)
+    if 0 < h < close.shape[0]:
+        out[h:] = close[h:] / close[:-h] - 1.0
+    return out
+
+def cross_sectional_rank(x: np.ndarray) -> np.ndarray:
+    """
+    Perzentil-Rang je Zeile (0 = schwächster, 1 = stärkster), NaN bleibt NaN.
+    Ein argsort über die ganze Matrix statt einer Schleife je Datum/Ticker.
+    """
+    T, N = x.shape
+    if N == 0:
+        return np.empty_like(x, dtype=np.float64)
+    valid = np.isfinite(x)
+    order = np.argsort(np.where(valid, x, np.inf), axis=1, kind="stable")
+    ranks = np.empty((T, N), dtype=np.float64)
+    np.put_along_axis(ranks, order, np.broadcast_to(np.arange(N, dtype=np.float64), (T, N)), axis=1)
+    n = valid.sum(axis=1, keepdims=True)
+    pct = ranks / np.maximum(n - 1, 1)
+    return np.where(valid, pct, np.nan)
+
+# ------------------------------------------------------------
+# RS-State
+# ------------------------------------------------------------
+class RSState:
+    __slots__ = ("dates", "tickers", "benchmark", "horizons", "rs", "score", "rank", "weak", "index")
+
+    def __init__(self, dates, tickers, benchmark, horizons, rs, score, rank, weak):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.tickers = np.asarray(tickers, dtype=str)
+        self.benchmark = np.asarray(benchmark, dtype=str)
+        self.horizons = np.asarray(horizons, dtype=np.int32)
+        self.rs = rs          # (H, T, N) float32, RS je Horizont
+        self.score = score    # (T, N) float32, gewichteter RS-Score
+        self.rank = rank      # (T, N) float32, Perzentil-Rang 0..1
+        self.weak = weak      # (T, N) bool
+        self.index = {t: i for i, t in enumerate(self.tickers.tolist())}
+
+    def latest(self) -> dict:
+        """{ticker: {"rs": .., "rs_rank": .., "rs_weak": ..}} für das letzte Datum."""
+        if not len(self.dates):
+            return {}
+        sc, rk, wk = self.score[-1], self.rank[-1], self.weak[-1]
+        out = {}
+        for i, t in enumerate(self.tickers.tolist()):
+            if np.isfinite(sc[i]):
+                out[t] = {"rs": float(sc[i]), "rs_rank": float(rk[i]), "rs_weak": bool(wk[i]),
+                          "benchmark": str(self.benchmark[i])}
+        return out
+
+    def save(self, path: Path = RS_STATE) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez(tmp, dates=self.dates, tickers=self.tickers, benchmark=self.benchmark,
+                 horizons=self.horizons, rs=self.rs, score=self.score, rank=self.rank, weak=self.weak)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path = RS_STATE) -> "RSState":
+        with np.load(path, allow_pickle=False) as z:
+            return cls(z["dates"], z["tickers"], z["benchmark"], z["horizons"],
+                       z["rs"], z["score"], z["rank"], z["weak"])
+
+def compute(panel: HistoryPanel, cfg: dict | None = None) -> RSState:
+    rc = rs_config(cfg)
+    bcfg = rc["benchmarks"]
+    bench_syms = set(benchmark_symbols(bcfg))
+
+    tickers = [t for t in panel.tickers.tolist() if t not in bench_syms]
+    bench_of = [benchmark_for(t, bcfg) for t in tickers]
+    tickers = [t for t, b in zip(tickers, bench_of) if b in panel]
+    bench_of = [benchmark_for(t, bcfg) for t in tickers]
+
+    close = ffill(panel.field("close", eur=True).astype(np.float64))
+    cols = np.array([panel.index[t] for t in tickers], dtype=np.intp)
+    bcols = np.array([panel.index[b] for b in bench_of], dtype=np.intp)
+
+    horizons = [int(h) for h in rc["horizons"]]
+    weights = np.asarray(rc["weights"][:len(horizons)], dtype=np.float64)
+    T, N = len(panel.dates), len(tickers)
+    rs = np.full((len(horizons), T, N), np.nan, dtype=np.float64)
+    for k, h in enumerate(horizons):
+        r = horizon_returns(close, h)
+        rs[k] = (1.0 + r[:, cols]) / (1.0 + r[:, bcols]) - 1.0
+
+    # gewichteter Score über verfügbare Horizonte (junge Listings: nur kurze Horizonte)
+    w = np.where(np.isfinite(rs), weights[:, None, None], 0.0)
+    wsum = w.sum(axis=0)
+    score = np.where(wsum > 0, np.nansum(rs * w, axis=0) / np.where(wsum > 0, wsum, 1.0), np.nan)
+
+    rank = cross_sectional_rank(score)
+    weak = (score < 0) & (rank <= float(rc["weak_rank"]))
+    return RSState(panel.dates, tickers, bench_of, horizons, rs.astype(np.float32),
+                   score.astype(np.float32), rank.astype(np.float32), weak)
+
+def load_latest(path: Path = RS_STATE) -> dict:
+    """Bequemer Zugriff für Regeln/Reports; fehlt der State → {}."""
+    if not path.exists():
+        return {}
+    try:
+        return RSState.load(path).latest()
+    except Exception:
+        return {}
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="relative_strength")
+    ap.add_argument("--refresh", action="store_true", help="fehlende Benchmarks in den Historien-Speicher laden")
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    panel = load_panel()
+    if args.refresh:
+        missing = [b for b in benchmark_symbols(rs_config()["benchmarks"]) if b not in panel]
+        if missing:
+            panel = refresh_history(missing)
+    st = compute(panel)
+    st.save()
+    latest = st.latest()
+    print(f"[rs] {len(st.tickers)} tickers × {len(st.dates)} sessions → {RS_STATE} "
+          f"({(time.perf_counter() - t0) * 1000:.0f} ms)")
+    ordered = sorted(latest.items(), key=lambda kv: kv[1]["rs_rank"])
+    for t, d in ordered[:args.top]:
+        flag = " rs_weak" if d["rs_weak"] else ""
+        print(f"  {t:<10} rs={d['rs']:+.3f} rank={d['rs_rank']:.2f} vs {d['benchmark']}{flag}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
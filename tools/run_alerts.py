@@ -8,16 +8,25 @@ Erzeugt die Alert-Ausgabe für mars / venus / family auf Basis von data/alerts_c
 - nutzt die Engine in tools/alerts_engine.py
 - schreibt nach docs/alerts.json (für den Report-Workflow)
 - spiegelt zusätzlich nach data/alerts_out.json (Debug/Archiv)
+- hängt jeden Lauf an das Alert-Archiv an (data/alerts_history.sqlite)
+- veröffentlicht Shards je Buch/Tag, Delta und komprimierte Varianten (tools/publish.py)
 - gibt das JSON auch auf STDOUT aus (für Logs)
+- meta.session_only: Lauf entfällt, wenn keine Börse offen ist (tools/market_calendar.py)
+- exportiert Laufzeit-Metriken nach data/state/metrics/run_alerts.om
 """
 
 from __future__ import annotations
 import json
+import sys
 from pathlib import Path
 from datetime import datetime, timezone
 
 # Import aus unserer Engine
 from tools.alerts_engine import run_alerts
+from tools.alerts_history import append_run
+from tools.publish import publish
+from tools.market_calendar import any_open, grace_minutes, session_only
+from tools import metrics as om
 
 
 def load_config(cfg_path: Path) -> dict:
@@ -27,6 +36,40 @@ def load_config(cfg_path: Path) -> dict:
         return json.load(f)
 
 
+def write_outputs(result: dict, data_dir: Path, docs_dir: Path) -> None:
+    """docs/alerts.json, data/alerts_out.json, Archiv und docs/alerts/ (auch für tools/shard.py merge).
+    Statusmeldungen gehen nach stderr – stdout ist dem JSON des Laufs vorbehalten."""
+    out_data = data_dir / "alerts_out.json"   # Debug/Archiv
+    out_docs = docs_dir / "alerts.json"       # CI/Reports
+
+    # Verzeichnisse sicherstellen
+    docs_dir.mkdir(parents=True, exist_ok=True)
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    # 1) in docs/alerts.json (für Reports)
+    with out_docs.open("w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    # 2) zusätzlich nach data/alerts_out.json (Debug)
+    with out_data.open("w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    # 3) Archiv (indiziert, für `python -m tools.alerts_history query`)
+    try:
+        n = append_run(result)
+        print(f"[alerts-history] +{n} alerts archived", file=sys.stderr)
+    except Exception as e:
+        # Archiv darf den Lauf nie abbrechen
+        print(f"[alerts-history] skipped: {e}", file=sys.stderr)
+
+    # 3b) Shards/Delta/Manifest unter docs/alerts/
+    try:
+        idx = publish(result, docs_dir)
+        print(f"[publish] {len(idx['files'])} files, {idx['delta']['new']} new alerts", file=sys.stderr)
+    except Exception as e:
+        print(f"[publish] skipped: {e}", file=sys.stderr)
+
+
 def main() -> None:
     # Projekt-Root
     ROOT = Path(__file__).resolve().parents[1]
@@ -34,15 +77,17 @@ def main() -> None:
     docs_dir = ROOT / "docs"
 
     cfg_path = data_dir / "alerts_config.json"
-    out_data = data_dir / "alerts_out.json"   # Debug/Archiv
-    out_docs = docs_dir / "alerts.json"       # CI/Reports
 
     cfg = load_config(cfg_path)
+    if session_only(cfg) and not any_open(grace_min=grace_minutes(cfg)):
+        print("[calendar] kein Markt in Session – Lauf übersprungen")
+        return
 
-    # Konfig-Bäume (klein geschrieben, wie vereinbart)
-    cfg_mars   = cfg.get("mars",   {})
-    cfg_venus  = cfg.get("venus",  {})
-    cfg_family = cfg.get("family", {})
+    # Konfig-Bäume (klein geschrieben, wie vereinbart); meta gilt für alle Bücher
+    meta       = cfg.get("meta", {})
+    cfg_mars   = {"meta": meta, **cfg.get("mars",   {})}
+    cfg_venus  = {"meta": meta, **cfg.get("venus",  {})}
+    cfg_family = {"meta": meta, **cfg.get("family", {})}
 
     # Engine ausführen
     result = {
@@ -52,21 +97,17 @@ def main() -> None:
         "family": {"alerts": run_alerts("family", cfg_family)},
     }
 
-    # Verzeichnisse sicherstellen
-    docs_dir.mkdir(parents=True, exist_ok=True)
-    data_dir.mkdir(parents=True, exist_ok=True)
-
-    # 1) in docs/alerts.json (für Reports)
-    with out_docs.open("w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
-
-    # 2) zusätzlich nach data/alerts_out.json (Debug)
-    with out_data.open("w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    write_outputs(result, data_dir, docs_dir)
 
-    # 3) für Logs → stdout
+    # 4) für Logs → stdout
     print(json.dumps(result, ensure_ascii=False, indent=2))
 
+    # 5) Metriken (Regel-Laufzeit, Alerts je Regel, Upstream-Latenz)
+    for book in ("mars", "venus", "family"):
+        om.gauge("mars_alerts_last_run", "Alerts im letzten Lauf je Buch", ("book",)) \
+            .labels(book).set(len(result[book]["alerts"]))
+    om.export("run_alerts")
+
 
 if __name__ == "__main__":
     main()
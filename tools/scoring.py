@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/scoring.py
+Faktor-Scoring für das Universum (ersetzt die Zufalls-Scores in mars_hub):
+- Momentum (21/63 Sessions), Trend (Preis vs SMA20/SMA60/DMA50),
+  volatilitätsbereinigte Rendite, Volumen-Expansion, Drawdown vom 60d-Hoch
+- jeder Faktor wird im Querschnitt z-standardisiert (winsorisiert auf ±3)
+- gewichtete Summe → Score; Beiträge je Faktor bleiben für den Report erhalten
+- Top-k per argpartition, nur die k Gewinner werden sortiert
+- Gewichte: meta.scoring.weights in alerts_config.json (sonst DEFAULT_WEIGHTS)
+
+    python -m tools.scoring --top 15
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import json
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from tools.history_store import HistoryPanel, load_panel
+from tools.relative_strength import ffill
+
+ROOT = Path(__file__).resolve().parents[1]
+CFG_FILE = ROOT / "data" / "alerts_config.json"
+
+FACTORS = ("momentum", "trend", "vol_adj_return", "volume_expansion", "drawdown")
+DEFAULT_WEIGHTS = {
+    "momentum": 0.30,
+    "trend": 0.25,
+    "vol_adj_return": 0.20,
+    "volume_expansion": 0.10,
+    "drawdown": 0.15,
+}
+MIN_SESSIONS = 21
+
+# ------------------------------------------------------------
+# Hilfsfunktionen (alle über die Ticker-Achse vektorisiert)
+# ------------------------------------------------------------
+def _tail_mean(a: np.ndarray, w: int) -> np.ndarray:
+    return np.nanmean(a[-w:], axis=0) if a.shape[0] >= w else np.full(a.shape[1], np.nan)
+
+def _ret(close: np.ndarray, h: int) -> np.ndarray:
+    if close.shape[0] <= h:
+        return np.full(close.shape[1], np.nan)
+    return close[-1] / close[-1 - h] - 1.0
+
+def zscore(x: np.ndarray, clip: float = 3.0) -> np.ndarray:
+    """Querschnitts-z-Score; Mittel/Streuung nur über endliche Werte (ein ±inf darf den
+    Faktor nicht für das ganze Universum auslöschen), NaN → 0 (neutral)."""
+    x = np.asarray(x, dtype=np.float64)
+    fin = np.isfinite(x)
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mu = x[fin].mean() if fin.any() else 0.0
+        sd = x[fin].std() if fin.any() else 0.0
+        z = (x - mu) / sd if sd > 0 else np.zeros_like(x)
+    return np.clip(np.nan_to_num(z, nan=0.0, posinf=clip, neginf=-clip), -clip, clip)
+
+def weights_from_config(cfg: dict | None = None) -> dict:
+    if cfg is None:
+        cfg = json.loads(CFG_FILE.read_text(encoding="utf-8")) if CFG_FILE.exists() else {}
+    user = ((cfg.get("meta") or {}).get("scoring") or {}).get("weights") or {}
+    return {f: float(user.get(f, DEFAULT_WEIGHTS[f])) for f in FACTORS}
+
+# ------------------------------------------------------------
+# Faktoren
+# ------------------------------------------------------------
+def raw_factors(close: np.ndarray, volume: np.ndarray) -> dict[str, np.ndarray]:
+    """close/volume: (T, N), Rückgabe je Faktor (N,) für das letzte Datum."""
+    close = ffill(close.astype(np.float64))
+    volume = volume.astype(np.float64)
+    last = close[-1]
+
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)  # leere Spalten (neue Listings)
+        mom = np.nanmean(np.vstack([_ret(close, 21), _ret(close, 63)]), axis=0)
+
+        trend = np.nanmean(np.vstack([
+            np.log(last / _tail_mean(close, 20)),
+            np.log(last / _tail_mean(close, 50)),
+            np.log(last / _tail_mean(close, 60)),
+        ]), axis=0)
+
+        w = min(63, close.shape[0] - 1)
+        daily = np.diff(np.log(close[-w - 1:]), axis=0) if w > 1 else np.full((1, close.shape[1]), np.nan)
+        sd = np.nanstd(daily, axis=0) * np.sqrt(max(w, 1))
+        vadj = _ret(close, w) / np.where(sd > 0, sd, np.nan)
+
+        # ohne Umsatz (Indizes, ETFs ohne Prints) kein Faktorwert statt log(0) = -inf
+        v5, v60 = _tail_mean(volume, 5), _tail_mean(volume, 60)
+        vexp = np.where((v5 > 0) & (v60 > 0), np.log(np.where(v60 > 0, v5 / v60, 1.0)), np.nan)
+
+        hh60 = np.nanmax(close[-60:], axis=0)
+        dd = last / hh60 - 1.0
+
+    return {"momentum": mom, "trend": trend, "vol_adj_return": vadj,
+            "volume_expansion": vexp, "drawdown": dd}
+
+class ScoreResult:
+    __slots__ = ("tickers", "score", "contributions", "raw")
+
+    def __init__(self, tickers, score, contributions, raw):
+        self.tickers = np.asarray(tickers, dtype=str)
+        self.score = score                  # (N,) gewichtete Summe der z-Scores
+        self.contributions = contributions  # {faktor: (N,)} Gewicht × z
+        self.raw = raw                      # {faktor: (N,)} Rohwerte
+
+    def top_idx(self, k: int) -> np.ndarray:
+        n = len(self.score)
+        k = min(k, n)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        part = np.argpartition(-self.score, k - 1)[:k] if k < n else np.arange(n)
+        return part[np.argsort(-self.score[part], kind="stable")]
+
+    def top(self, k: int) -> list[dict]:
+        return [self.row(i) for i in self.top_idx(k)]
+
+    def row(self, i: int) -> dict:
+        return {
+            "ticker": str(self.tickers[i]),
+            "score": round(float(self.score[i]), 4),
+            "factors": {f: round(float(c[i]), 4) for f, c in self.contributions.items()},
+        }
+
+    def to_series(self) -> pd.Series:
+        """Absteigend sortiert – passt zu run_report_json (scores.head(15))."""
+        order = self.top_idx(len(self.score))
+        return pd.Series(self.score[order], index=self.tickers[order], name="score")
+
+    def factor_map(self) -> dict:
+        return {r["ticker"]: r["factors"] for r in (self.row(i) for i in range(len(self.score)))}
+
+def score_arrays(tickers, close: np.ndarray, volume: np.ndarray, weights: dict | None = None) -> ScoreResult:
+    weights = weights or dict(DEFAULT_WEIGHTS)
+    tickers = np.asarray(tickers, dtype=str)
+    if close.shape[0] < MIN_SESSIONS or close.shape[1] == 0:
+        z = np.zeros(close.shape[1])
+        return ScoreResult(tickers, z, {f: z for f in FACTORS}, {f: z for f in FACTORS})
+
+    return score_from_raw(tickers, raw_factors(close, volume), weights)
+
+def score_from_raw(tickers, raw: dict[str, np.ndarray], weights: dict | None = None) -> ScoreResult:
+    """Querschnitts-Schritt allein (z-Scores + Gewichte), z.B. nach dem Zusammenführen von Shards."""
+    weights = weights or dict(DEFAULT_WEIGHTS)
+    norm = sum(abs(w) for w in weights.values()) or 1.0
+    contrib = {f: weights.get(f, 0.0) / norm * zscore(raw[f]) for f in FACTORS}
+    score = np.sum(np.vstack(list(contrib.values())), axis=0)
+    return ScoreResult(np.asarray(tickers, dtype=str), score, contrib, raw)
+
+def score_panel(panel: HistoryPanel, weights: dict | None = None, lookback: int = 130) -> ScoreResult:
+    close = panel.field("close", eur=True)[-lookback:]
+    volume = panel.field("volume")[-lookback:]
+    return score_arrays(panel.tickers, close, volume, weights or weights_from_config())
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="scoring")
+    ap.add_argument("--top", type=int, default=15)
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    res = score_panel(load_panel())
+    dt = (time.perf_counter() - t0) * 1000
+    print(f"[scoring] {len(res.tickers)} tickers in {dt:.0f} ms")
+    for r in res.top(args.top):
+        parts = " ".join(f"{k[:4]}={v:+.2f}" for k, v in r["factors"].items())
+        print(f"  {r['ticker']:<10} {r['score']:+.3f}  {parts}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
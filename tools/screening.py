@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/screening.py
+Zweistufiger Screening-Trichter für das erweiterte Universum (extended_universe.txt):
+1) Grobfilter: ein Bulk-Request (letzte Kerzen) je Batch von Symbolen plus gecachte
+   Indikatoren aus dem Historien-Speicher → Bewegung, Volumen-Spike, Nähe zu DMA50/SMA20
+   bzw. 60d-Hoch. Alles in Listing-Währung, daher ohne FX.
+2) Nur die Überlebenden: volle Historie, EUR-Umrechnung (live_data) und Regel-Auswertung
+   (alerts_engine, Core/Growth-Schwellen).
+- je Stufe: Anzahl verarbeiteter Symbole und Laufzeit
+- Ergebnis nach data/screening_out.json, Snapshot der Überlebenden nach
+  data/screening_snapshot.csv
+
+    python -m tools.screening
+    python -m tools.screening --rebuild --batch-size 300
+"""
+
+from __future__ import annotations
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import json
+import time
+import warnings
+
+import numpy as np
+
+from tools import md_cache
+from tools.alerts_engine import run_alerts
+from tools.auto_extend import read_lines
+from tools.history_store import load_panel
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+EXTENDED = DATA / "extended_universe.txt"
+CFG_FILE = DATA / "alerts_config.json"
+OUT_JSON = DATA / "screening_out.json"
+OUT_SNAP = DATA / "screening_snapshot.csv"
+
+DEFAULTS = {
+    "batch_size": 200,
+    "min_move": 0.03,        # |Tagesbewegung| ab 3%
+    "near_sma": 0.015,       # Kurs innerhalb ±1,5% um DMA50/SMA20
+    "near_high": 0.02,       # Kurs innerhalb 2% unter dem 60d-Hoch
+}
+
+# ------------------------------------------------------------
+# Stufe 1: Grobfilter
+# ------------------------------------------------------------
+def bulk_quotes(symbols: list[str], batch_size: int) -> dict[str, np.ndarray]:
+    """last/prev/vol/vol_base je Symbol aus einem Bulk-Request pro Batch (5 Tageskerzen)."""
+    n = len(symbols)
+    q = {k: np.full(n, np.nan) for k in ("last", "prev", "vol", "vol_base")}
+    for start in range(0, n, batch_size):
+        batch = symbols[start:start + batch_size]
+        try:
+            got = md_cache.bulk_history(batch, period="5d", interval="1d")
+        except Exception:
+            continue
+        for j, s in enumerate(batch, start):
+            df = got.get(s)
+            if df is None or df.empty or "Close" not in df:
+                continue
+            c = df["Close"].astype(float).to_numpy()
+            q["last"][j] = c[-1]
+            q["prev"][j] = c[-2] if len(c) >= 2 else np.nan
+            if "Volume" in df:
+                v = df["Volume"].astype(float).to_numpy()
+                q["vol"][j] = v[-1]
+                q["vol_base"][j] = np.median(v[:-1]) if len(v) >= 2 else np.nan
+    return q
+
+def cached_indicators(symbols: list[str]) -> dict[str, np.ndarray]:
+    """DMA50/SMA20/60d-Hoch/Median-Volumen20 aus dem lokalen Historien-Speicher (ohne Netz)."""
+    n = len(symbols)
+    ind = {k: np.full(n, np.nan) for k in ("dma50", "sma20", "hh60", "vol20")}
+    panel = load_panel()
+    have = [(j, panel.index[s]) for j, s in enumerate(symbols) if s in panel]
+    if not have or len(panel.dates) < 20:
+        return ind
+    rows = np.array([j for j, _ in have])
+    cols = np.array([i for _, i in have])
+    close = panel.field("close")[:, cols].astype(np.float64)
+    high = panel.field("high")[:, cols].astype(np.float64)
+    vol = panel.field("volume")[:, cols].astype(np.float64)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # Spalten ohne Daten
+        ind["dma50"][rows] = np.nanmean(close[-50:], axis=0)
+        ind["sma20"][rows] = np.nanmean(close[-20:], axis=0)
+        ind["hh60"][rows] = np.nanmax(high[-60:], axis=0)
+        ind["vol20"][rows] = np.nanmedian(vol[-20:], axis=0)
+    return ind
+
+def coarse_filter(q: dict, ind: dict, params: dict, volume_spike_x: float) -> tuple[np.ndarray, dict]:
+    """Bool-Maske der Überlebenden + Trefferzahl je Kriterium."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        move = np.abs(q["last"] / q["prev"] - 1.0)
+        base = np.where(np.isfinite(ind["vol20"]), ind["vol20"], q["vol_base"])
+        vol_x = q["vol"] / base
+        near_sma = np.fmin(np.abs(q["last"] / ind["dma50"] - 1.0),
+                           np.abs(q["last"] / ind["sma20"] - 1.0)) <= params["near_sma"]
+        near_high = q["last"] >= ind["hh60"] * (1.0 - params["near_high"])
+        crit = {
+            "move": move >= params["min_move"],
+            "volume_spike": vol_x >= volume_spike_x,
+            "near_sma": near_sma,
+            "near_high": near_high,
+        }
+    mask = np.zeros(len(q["last"]), dtype=bool)
+    for m in crit.values():
+        mask |= m
+    return mask, {k: int(m.sum()) for k, m in crit.items()}
+
+# ------------------------------------------------------------
+# Trichter
+# ------------------------------------------------------------
+def _load_cfg() -> dict:
+    return json.loads(CFG_FILE.read_text(encoding="utf-8")) if CFG_FILE.exists() else {}
+
+def screen(symbols: list[str], cfg: dict | None = None, batch_size: int | None = None):
+    """Rückgabe: (Ergebnis-Dict für JSON, MarketState der Überlebenden)."""
+    from tools.live_data import fetch_state
+
+    cfg = cfg if cfg is not None else _load_cfg()
+    meta = cfg.get("meta", {})
+    params = {**DEFAULTS, **(meta.get("screening") or {})}
+    if batch_size:
+        params["batch_size"] = batch_size
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+
+    # Stufe 1
+    t0 = time.perf_counter()
+    q = bulk_quotes(symbols, int(params["batch_size"]))
+    ind = cached_indicators(symbols)
+    mask, hits = coarse_filter(q, ind, params, float(meta.get("volume_spike_x", 1.5)))
+    survivors = [s for s, m in zip(symbols, mask) if m]
+    t1 = time.perf_counter()
+
+    # Stufe 2
+    state = fetch_state(survivors)
+    mars = {"meta": meta, **cfg.get("mars", {})}
+    mars["core_growth"] = {**mars.get("core_growth", {}), "tickers": list(state.tickers)}
+    alerts = run_alerts("mars", mars, px=state) if len(state) else []
+    t2 = time.perf_counter()
+
+    quoted = int(np.isfinite(q["last"]).sum())
+    return {
+        "as_of_utc": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "stages": [
+            {"stage": "coarse", "symbols_in": len(symbols), "quoted": quoted,
+             "batches": -(-len(symbols) // int(params["batch_size"])),
+             "survivors": len(survivors), "criteria_hits": hits, "seconds": round(t1 - t0, 3)},
+            {"stage": "full", "symbols_in": len(survivors), "evaluated": len(state),
+             "alerts": len(alerts), "seconds": round(t2 - t1, 3)},
+        ],
+        "survivors": survivors,
+        "alerts": alerts,
+    }, state
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="screening")
+    ap.add_argument("--rebuild", action="store_true", help="extended_universe.txt vorher neu bauen")
+    ap.add_argument("--batch-size", type=int)
+    ap.add_argument("--max-n", type=int, default=5000)
+    args = ap.parse_args(argv)
+
+    if args.rebuild or not EXTENDED.exists():
+        from tools.auto_extend import main as rebuild
+        rebuild(max_n=args.max_n)
+    symbols = read_lines(EXTENDED)[:args.max_n]
+
+    res, state = screen(symbols, batch_size=args.batch_size)
+    state.to_csv(OUT_SNAP)
+    OUT_JSON.write_text(json.dumps(res, ensure_ascii=False, indent=2), encoding="utf-8")
+    for st in res["stages"]:
+        extra = " ".join(f"{k}={v}" for k, v in st.items() if k not in ("stage", "seconds"))
+        print(f"[screening] {st['stage']:<6} {extra} ({st['seconds']:.2f}s)")
+    print(f"[screening] wrote {OUT_JSON}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
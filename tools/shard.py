@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/shard.py
+Sharding für Abruf, Indikatoren und Regel-Auswertung:
+- Universum → K Shards über einen stabilen Hash des Symbols (blake2b, unabhängig von
+  PYTHONHASHSEED, Reihenfolge und Universumsgröße)
+- je Shard (eigener Prozess bzw. CI-Matrix-Job): live_data.fetch_state, Roh-Faktoren
+  (tools/scoring.py) und die Buch-Regeln mars/venus; Ergebnis spaltenorientiert nach
+  data/shards/shard-<i>-of-<K>.npz
+- merge: Shards zusammenführen, dann die globalen Schritte – Querschnitts-z-Scores +
+  Top-k, Perzentil-Ränge, Family-Limits (tools/exposure.py) und Kürzung je Buch
+- lokal: Prozess-Pool über alle Shards; --synthetic N nutzt einen Fake-Provider
+  mit simulierter Latenz (kein Netz), --compare misst zusätzlich K=1
+
+    python -m tools.shard plan --k 4                   # Shard-Größen (+ matrix nach $GITHUB_OUTPUT)
+    python -m tools.shard run --shard 0 --k 4          # ein Shard
+    python -m tools.shard merge --k 4 --publish        # zusammenführen (+ Snapshot/docs wie run_alerts)
+    python -m tools.shard local --k 4 --synthetic 400 --compare
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+DOCS = ROOT / "docs"
+CFG_FILE = DATA / "alerts_config.json"
+SHARD_DIR = DATA / "shards"
+
+DEFAULT_K = 4
+TOP_K = 15
+MAX_ALERTS = 20          # je Buch nach dem Merge (höchster Score zuerst)
+HIST_ROWS = 90           # Kerzen je Symbol für die Roh-Faktoren
+
+# ------------------------------------------------------------
+# Partitionierung
+# ------------------------------------------------------------
+def shard_of(symbol: str, k: int) -> int:
+    h = hashlib.blake2b(symbol.strip().upper().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(h, "big") % k
+
+def partition(tickers, k: int) -> list[list[str]]:
+    out: list[list[str]] = [[] for _ in range(k)]
+    for t in dict.fromkeys(s.strip().upper() for s in tickers if s.strip()):
+        out[shard_of(t, k)].append(t)
+    return out
+
+def shard_path(i: int, k: int, out_dir: Path = SHARD_DIR) -> Path:
+    return out_dir / f"shard-{i:02d}-of-{k:02d}.npz"
+
+# ------------------------------------------------------------
+# Fake-Provider (lokale Verifikation)
+# ------------------------------------------------------------
+class SyntheticProvider:
+    """Deterministische Random-Walk-Kerzen je Symbol; latency simuliert den Upstream."""
+
+    def __init__(self, latency: float = 0.02, sessions: int = 260):
+        self.latency = latency
+        self.sessions = sessions
+
+    def history(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        time.sleep(self.latency)
+        if not interval.endswith("d"):
+            return pd.DataFrame()
+        n = self.sessions
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        idx = pd.bdate_range(end=pd.Timestamp.now(tz="UTC").normalize(), periods=n)
+        if symbol.endswith("=X"):
+            c = np.full(n, 1.08) * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+        else:
+            c = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, n)))
+        hi, lo = c * (1 + np.abs(rng.normal(0, 0.01, n))), c * (1 - np.abs(rng.normal(0, 0.01, n)))
+        return pd.DataFrame({"Open": c, "High": hi, "Low": lo, "Close": c,
+                             "Volume": rng.lognormal(13, 0.5, n)}, index=idx)
+
+    def bulk_history(self, symbols: list[str], period: str, interval: str) -> dict[str, pd.DataFrame]:
+        return {s: self.history(s, period, interval) for s in symbols}
+
+    def currency(self, symbol: str) -> str | None:
+        return "EUR" if symbol.endswith((".DE", ".PA", ".AS")) else "USD"
+
+def _set_provider(spec: str | None) -> None:
+    """spec: None (Standard), "synthetic[:latency]" oder "modul:Klasse"."""
+    if not spec:
+        return
+    from tools import md_cache
+    if spec.startswith("synthetic"):
+        _, _, lat = spec.partition(":")
+        md_cache.set_provider(SyntheticProvider(float(lat) if lat else 0.02))
+        return
+    mod, _, attr = spec.partition(":")
+    md_cache.set_provider(getattr(importlib.import_module(mod), attr or "Provider")())
+
+# ------------------------------------------------------------
+# Shard-Lauf
+# ------------------------------------------------------------
+def _load_cfg() -> dict:
+    return json.loads(CFG_FILE.read_text(encoding="utf-8")) if CFG_FILE.exists() else {}
+
+def _book_cfg(cfg: dict, book: str) -> dict:
+    return {"meta": cfg.get("meta", {}), **cfg.get(book, {})}
+
+def run_shard(i: int, k: int, tickers: list[str], out_dir: Path = SHARD_DIR,
+              provider: str | None = None) -> dict:
+    """Abruf + Roh-Faktoren + Regeln für die Ticker des Shards i; schreibt die Teil-Ergebnisse."""
+    # Import erst im Worker: Provider und Metriken gehören dem Prozess
+    _set_provider(provider)
+    from tools import md_cache
+    from tools.alerts_engine import run_alerts
+    from tools.live_data import fetch_state
+    from tools.market_state import COLUMNS
+    from tools.pivots import stack_tail
+    from tools.scoring import FACTORS, raw_factors
+
+    t0 = time.perf_counter()
+    mine = [t for t in tickers if shard_of(t, k) == i]
+    state = fetch_state(mine)
+    n = len(state)
+    frames = [md_cache.history(t, period="90d", interval="1d") for t in state.tickers]
+    fx = state.column("fx_eur").astype(np.float64)
+    close = stack_tail(frames, "Close", HIST_ROWS) * np.where(np.isfinite(fx), fx, 1.0)[None, :]
+    volume = stack_tail(frames, "Volume", HIST_ROWS)
+    raw = raw_factors(close, volume) if n else {f: np.empty(0) for f in FACTORS}
+
+    cfg = _load_cfg()
+    alerts = {b: run_alerts(b, _book_cfg(cfg, b), state) for b in ("mars", "venus")}
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = shard_path(i, k, out_dir)
+    tmp = path.with_suffix(".tmp.npz")
+    np.savez(tmp, tickers=np.asarray(state.tickers, dtype=str), currency=state.currency_of().astype(str),
+             as_of=state.as_of[:n], alerts=np.array(json.dumps(alerts, ensure_ascii=False, default=float)),
+             **{f"c_{c}": state.column(c) for c in COLUMNS}, **{f"f_{f}": raw[f] for f in FACTORS})
+    tmp.replace(path)
+    return {"shard": i, "tickers": n, "assigned": len(mine), "seconds": round(time.perf_counter() - t0, 3),
+            "path": str(path)}
+
+# ------------------------------------------------------------
+# Merge
+# ------------------------------------------------------------
+def merge(k: int, out_dir: Path = SHARD_DIR, top: int = TOP_K, max_alerts: int = MAX_ALERTS) -> tuple[dict, object]:
+    """Teil-Ergebnisse zusammenführen + globale Schritte; Rückgabe (Ergebnis, MarketState)."""
+    from tools.alerts_engine import run_alerts
+    from tools.market_state import COLUMNS, MarketState
+    from tools.relative_strength import cross_sectional_rank
+    from tools.scoring import FACTORS, score_from_raw, weights_from_config
+
+    parts, missing = [], []
+    for i in range(k):
+        p = shard_path(i, k, out_dir)
+        if not p.exists():
+            missing.append(i)
+            continue
+        with np.load(p, allow_pickle=False) as z:
+            parts.append({name: z[name] for name in z.files})
+
+    tickers = np.concatenate([p["tickers"] for p in parts]) if parts else np.empty(0, dtype=str)
+    state = MarketState(capacity=len(tickers))
+    for p in parts:
+        cols = {c: p[f"c_{c}"] for c in COLUMNS if f"c_{c}" in p}
+        for j, t in enumerate(p["tickers"]):
+            state.put(str(t), currency=str(p["currency"][j]), as_of=float(p["as_of"][j]),
+                      **{c: v[j] for c, v in cols.items()})
+
+    cfg = _load_cfg()
+    raw = {f: np.concatenate([p[f"f_{f}"] for p in parts]) if parts else np.empty(0) for f in FACTORS}
+    res = score_from_raw(tickers, raw, weights_from_config(cfg))
+    ranks = cross_sectional_rank(res.score[None, :])[0] if len(tickers) else np.empty(0)
+
+    books = {"mars": [], "venus": []}
+    for p in parts:
+        for b, lst in json.loads(str(p["alerts"])).items():
+            books.setdefault(b, []).extend(lst)
+    books["family"] = run_alerts("family", _book_cfg(cfg, "family"), state)
+    truncated = {}
+    for b, lst in books.items():
+        lst.sort(key=lambda a: -float(a.get("score", 0)))
+        truncated[b] = max(0, len(lst) - max_alerts)
+        books[b] = lst[:max_alerts]
+
+    result = {
+        "as_of_utc": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        **{b: {"alerts": lst} for b, lst in books.items()},
+        "shards": {"k": k, "merged": k - len(missing), "missing": missing, "tickers": int(len(tickers)),
+                   "truncated": truncated},
+        "scores_top": [{**res.row(i), "rank": round(float(ranks[i]), 4)} for i in res.top_idx(top)],
+    }
+    return result, state
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def _universe(args) -> list[str]:
+    if args.synthetic:
+        return [f"S{i:05d}" for i in range(args.synthetic)]
+    if args.universe:
+        return [ln.split()[0] for ln in Path(args.universe).read_text(encoding="utf-8").splitlines()
+                if ln.strip() and not ln.startswith("#")]
+    from tools.live_data import load_universe
+    return load_universe()
+
+def _provider(args) -> str | None:
+    return f"synthetic:{args.latency}" if args.synthetic else args.provider
+
+def _local(args, k: int, tickers: list[str]) -> float:
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=k) as pool:
+        futs = [pool.submit(run_shard, i, k, tickers, args.out, _provider(args)) for i in range(k)]
+        stats = [f.result() for f in futs]
+    for s in stats:
+        print(f"  shard {s['shard']}: {s['tickers']}/{s['assigned']} tickers in {s['seconds']}s")
+    result, _ = merge(k, args.out, args.top)
+    dt = time.perf_counter() - t0
+    n_alerts = sum(len(result[b]["alerts"]) for b in ("mars", "venus", "family"))
+    print(f"[shard] k={k}: {result['shards']['tickers']} tickers, {n_alerts} alerts, wall {dt:.2f}s")
+    return dt
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="shard")
+    ap.add_argument("cmd", choices=["plan", "run", "merge", "local"])
+    ap.add_argument("--k", type=int, default=int(os.getenv("MARS_SHARDS", DEFAULT_K)))
+    ap.add_argument("--shard", type=int, default=0)
+    ap.add_argument("--universe", help="Datei mit einem Ticker je Zeile (Default: core + watch)")
+    ap.add_argument("--provider", help="modul:Klasse als Upstream (z.B. Fake für Tests)")
+    ap.add_argument("--synthetic", type=int, default=0, help="N synthetische Symbole + Fake-Provider")
+    ap.add_argument("--latency", type=float, default=0.02, help="simulierte Upstream-Latenz (s)")
+    ap.add_argument("--out", type=Path, default=SHARD_DIR)
+    ap.add_argument("--top", type=int, default=TOP_K)
+    ap.add_argument("--publish", action="store_true", help="merge: Snapshot + docs/alerts.json schreiben")
+    ap.add_argument("--compare", action="store_true", help="local: zusätzlich K=1 messen")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "plan":
+        sizes = [len(p) for p in partition(_universe(args), args.k)]
+        print(f"[shard] k={args.k} sizes={sizes}")
+        if os.getenv("GITHUB_OUTPUT"):
+            with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+                f.write(f"matrix={json.dumps(list(range(args.k)))}\n")
+        return 0
+
+    if args.cmd == "run":
+        s = run_shard(args.shard, args.k, _universe(args), args.out, _provider(args))
+        print(f"[shard] {s['shard']}/{args.k}: {s['tickers']}/{s['assigned']} tickers in {s['seconds']}s → {s['path']}")
+        return 0
+
+    if args.cmd == "merge":
+        result, state = merge(args.k, args.out, args.top)
+        sh = result["shards"]
+        (args.out / "merged.json").write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[shard] merged {sh['merged']}/{sh['k']} shards, {sh['tickers']} tickers"
+              + (f", fehlend: {sh['missing']}" if sh["missing"] else ""))
+        if args.publish and sh["missing"]:
+            print("[shard] unvollständig – nicht veröffentlicht")
+        elif args.publish:
+            from tools.run_alerts import write_outputs
+            state.to_csv(DATA / "prices_eur_snapshot.csv")
+            write_outputs({b: result[b] for b in ("as_of_utc", "mars", "venus", "family")}, DATA, DOCS)
+        return 1 if sh["missing"] else 0
+
+    # local: Prozess-Pool über alle Shards, danach Merge
+    if args.synthetic:
+        os.environ.setdefault("MARS_FETCH_PAUSE", "0")
+        os.environ.setdefault("MARS_SESSION_ONLY", "0")
+    tickers = _universe(args)
+    dt_k = _local(args, args.k, tickers)
+    if args.compare and args.k > 1:
+        dt_1 = _local(args, 1, tickers)
+        print(f"[shard] speedup {dt_1 / dt_k:.2f}x bei k={args.k} (ideal {args.k}x)")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
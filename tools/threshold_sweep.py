@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/threshold_sweep.py
+Schwellen-Optimierung für die handgesetzten Alert-Parameter:
+  trim_stretch, trim_rsi, drawdown20, breakout_move_vol (run_report_json)
+  tp_gain_intraday, trim_drop_5d (alerts_engine, core_growth)
+- Indikatoren (SMA20/60, RSI14, Stretch, 20d-Drawdown, Volumen-Ratio, 5d-Rendite,
+  Forward-Rendite) werden EINMAL aus der Historie berechnet und als ein Block in
+  Shared Memory gelegt; die Worker lesen ihn nur
+- jeder Gitterpunkt kostet damit nur noch eine Masken-Auswertung
+- je Buch (Mars/Venus, Ticker aus portfolios.json) und Regel: Trefferquote,
+  Ø Forward-Rendite nach dem Alert (in Regelrichtung) und Alert-Häufigkeit
+
+    python -m tools.threshold_sweep --horizon 5
+    python -m tools.threshold_sweep --workers 4 --min-alerts 10
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import shared_memory
+from pathlib import Path
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+
+from tools.history_store import HistoryPanel, load_panel
+from tools.relative_strength import ffill
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / "data"
+PORTF = DATA / "portfolios.json"
+OUT = DATA / "threshold_sweep.json"
+
+PARALLEL_MIN_CELLS = 200_000_000   # Gitterpunkte × T × N, ab dann lohnt der Prozess-Pool
+
+# Regel -> (Parameter-Gitter, erwartete Richtung nach dem Alert: +1 steigt, -1 fällt)
+# Einheiten wie in der jeweiligen Konfiguration (Prozent bzw. Anteil).
+GRIDS = {
+    "trim": ({"trim_stretch": [6.0, 8.0, 10.0, 12.0], "trim_rsi": [65.0, 70.0, 72.0, 75.0, 80.0]}, -1),
+    "momentum_breakout": ({"breakout_move_vol": [0.5, 1.0, 1.5, 2.0, 3.0]}, +1),
+    "risk_drawdown": ({"drawdown20": [5.0, 6.0, 8.0, 10.0, 12.0, 15.0]}, -1),
+    "tp": ({"tp_gain_intraday": [0.05, 0.08, 0.10, 0.12, 0.15]}, -1),
+    "trim_drop_5d": ({"trim_drop_5d": [-0.06, -0.08, -0.10, -0.12, -0.15]}, -1),
+}
+IND_KEYS = ("ret1", "stretch", "rsi", "stall", "five_up", "dd20", "vol_x", "ma_up", "vs5d", "fwd")
+
+# ------------------------------------------------------------
+# Indikatoren (einmal, vektorisiert über (T, N))
+# ------------------------------------------------------------
+def _rolling_mean(a: np.ndarray, w: int) -> np.ndarray:
+    """Mittel über a[t-w+1..t]; NaN nur dort, wo das Fenster nicht vollständig endlich ist
+    (spät gelistete Ticker bekommen Werte ab ihrer w-ten Kerze)."""
+    out = np.full(a.shape, np.nan)
+    if a.shape[0] < w:
+        return out
+    ok = np.isfinite(a)
+    zero = np.zeros((1,) + a.shape[1:])
+    c = np.cumsum(np.vstack([zero, np.where(ok, a, 0.0)]), axis=0)
+    n = np.cumsum(np.vstack([zero, ok]), axis=0)
+    full = (n[w:] - n[:-w]) == w
+    out[w - 1:] = np.where(full, (c[w:] - c[:-w]) / w, np.nan)
+    return out
+
+def _rolling_max(a: np.ndarray, w: int) -> np.ndarray:
+    out = np.full(a.shape, np.nan)
+    if a.shape[0] < w:
+        return out
+    win = np.lib.stride_tricks.sliding_window_view(a, w, axis=0)
+    out[w - 1:] = win.max(axis=-1)
+    return out
+
+def _shift(a: np.ndarray, k: int) -> np.ndarray:
+    """a[t-k] (k>0) bzw. a[t+|k|] (k<0), Ränder NaN."""
+    out = np.full(a.shape, np.nan)
+    if k > 0:
+        out[k:] = a[:-k]
+    elif k < 0:
+        out[:k] = a[-k:]
+    else:
+        out[:] = a
+    return out
+
+def indicators(close: np.ndarray, volume: np.ndarray, horizon: int = 5) -> dict[str, np.ndarray]:
+    px = ffill(close.astype(np.float64))
+    vol = np.nan_to_num(volume.astype(np.float64))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ret1 = px / _shift(px, 1) - 1.0
+        sma20, sma60 = _rolling_mean(px, 20), _rolling_mean(px, 60)
+        delta = px - _shift(px, 1)
+        gain = _rolling_mean(np.nan_to_num(np.clip(delta, 0, None)), 14)
+        loss = _rolling_mean(np.nan_to_num(-np.clip(delta, None, 0)), 14)
+        rsi = 100 - 100 / (1 + gain / (loss + 1e-9))
+        vol20 = _rolling_mean(vol, 20)
+        ind = {
+            "ret1": ret1,
+            "stretch": (px - sma20) / (sma20 + 1e-9),
+            "rsi": rsi,
+            "stall": (px <= _shift(px, 1)).astype(np.float64),
+            "five_up": (px / _shift(px, 5) - 1 >= 0.10).astype(np.float64),
+            "dd20": 1.0 - px / (_rolling_max(px, 20) + 1e-9),
+            "vol_x": np.where(vol20 > 0, vol / vol20, np.nan),
+            "ma_up": (px > np.fmax(sma20, sma60)).astype(np.float64),
+            "vs5d": px / _shift(px, 5) - 1.0,
+            "fwd": _shift(px, -horizon) / px - 1.0,
+        }
+    return ind
+
+# ------------------------------------------------------------
+# Masken je Regel (gleiche Logik wie run_report_json / alerts_engine)
+# ------------------------------------------------------------
+def rule_mask(rule: str, p: dict, ind: dict, cols: np.ndarray) -> np.ndarray:
+    g = {k: ind[k][:, cols] for k in IND_KEYS}
+    with np.errstate(invalid="ignore"):
+        if rule == "trim":
+            return (g["stretch"] >= p["trim_stretch"] / 100) & (g["rsi"] >= p["trim_rsi"]) \
+                & ((g["stall"] > 0) | (g["five_up"] > 0))
+        if rule == "momentum_breakout":
+            return (g["ma_up"] > 0) & (g["ret1"] >= p["breakout_move_vol"] / 100) & (g["vol_x"] > 1.5)
+        if rule == "risk_drawdown":
+            return g["dd20"] >= p["drawdown20"] / 100
+        if rule == "tp":
+            return g["ret1"] >= p["tp_gain_intraday"]
+        if rule == "trim_drop_5d":
+            return g["vs5d"] <= p["trim_drop_5d"]
+    raise ValueError(f"unbekannte Regel: {rule}")
+
+def evaluate(rule: str, params: dict, ind: dict, cols: np.ndarray) -> dict:
+    direction = GRIDS[rule][1]
+    fwd = ind["fwd"][:, cols]
+    known = np.isfinite(fwd)
+    m = rule_mask(rule, params, ind, cols) & known
+    n = int(m.sum())
+    sessions = int(known.sum())
+    edge = direction * fwd[m]
+    return {
+        "rule": rule, "params": params, "alerts": n,
+        "hit_rate": round(float((edge > 0).mean()), 4) if n else None,
+        "avg_fwd_edge": round(float(edge.mean()), 5) if n else None,
+        "alerts_per_ticker_year": round(n / sessions * 252, 3) if sessions else None,
+    }
+
+# ------------------------------------------------------------
+# Shared Memory + Prozess-Pool
+# ------------------------------------------------------------
+_IND: dict | None = None
+_SHM: shared_memory.SharedMemory | None = None
+
+def _attach(name: str, shape: tuple) -> None:
+    global _IND, _SHM
+    _SHM = shared_memory.SharedMemory(name=name)
+    if mp.get_start_method() != "fork":
+        # eigener Resource-Tracker (spawn): Block gehört dem Parent, der ihn auch freigibt
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(_SHM._name, "shared_memory")
+    block = np.ndarray(shape, dtype=np.float32, buffer=_SHM.buf)
+    block.flags.writeable = False
+    _IND = {k: block[i] for i, k in enumerate(IND_KEYS)}
+
+def _eval_task(task) -> dict:
+    book, rule, params, cols = task
+    return {"book": book, **evaluate(rule, params, _IND, cols)}
+
+def grid_tasks(books: dict[str, np.ndarray]) -> list[tuple]:
+    tasks = []
+    for book, cols in books.items():
+        for rule, (grid, _) in GRIDS.items():
+            keys = list(grid)
+            for combo in product(*(grid[k] for k in keys)):
+                tasks.append((book, rule, dict(zip(keys, combo)), cols))
+    return tasks
+
+def sweep(ind: dict, books: dict[str, np.ndarray], workers: int | None = None) -> list[dict]:
+    tasks = grid_tasks(books)
+    workers = workers or os.cpu_count() or 1
+    block = np.stack([ind[k] for k in IND_KEYS]).astype(np.float32)
+    cells = len(tasks) * ind["fwd"].shape[0] * max((len(c) for c in books.values()), default=0)
+    if workers <= 1 or cells < PARALLEL_MIN_CELLS:
+        local = {k: block[i] for i, k in enumerate(IND_KEYS)}
+        return [{"book": b, **evaluate(r, p, local, c)} for b, r, p, c in tasks]
+
+    shm = shared_memory.SharedMemory(create=True, size=block.nbytes)
+    try:
+        np.ndarray(block.shape, dtype=np.float32, buffer=shm.buf)[:] = block
+        del block
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(shm.name, (len(IND_KEYS),) + ind["fwd"].shape)) as pool:
+            return list(pool.map(_eval_task, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
+    finally:
+        shm.close()
+        shm.unlink()
+
+def rank(results: list[dict], min_alerts: int = 5) -> dict:
+    """Je (Buch, Regel): Gitterpunkte mit ≥ min_alerts, sortiert nach Trefferquote, dann Edge."""
+    out: dict = {}
+    for r in results:
+        if r["alerts"] < min_alerts:
+            continue
+        out.setdefault(r["book"], {}).setdefault(r["rule"], []).append(r)
+    for rules in out.values():
+        for rule, rows in rules.items():
+            rows.sort(key=lambda r: (r["hit_rate"], r["avg_fwd_edge"]), reverse=True)
+            for row in rows:
+                row.pop("book", None)
+    return out
+
+# ------------------------------------------------------------
+# Bücher
+# ------------------------------------------------------------
+def book_columns(panel: HistoryPanel, portfolios: dict | None = None) -> dict[str, np.ndarray]:
+    if portfolios is None:
+        portfolios = json.loads(PORTF.read_text(encoding="utf-8")) if PORTF.exists() else {}
+    books = {}
+    for book in ("mars", "venus"):
+        ticks = set()
+        for v in (portfolios.get(book) or {}).values():
+            if isinstance(v, list):
+                ticks.update(str(t).upper() for t in v)
+        cols = sorted(panel.index[t] for t in ticks if t in panel)
+        if cols:
+            books[book.capitalize()] = np.asarray(cols, dtype=np.intp)
+    return books
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="threshold_sweep")
+    ap.add_argument("--horizon", type=int, default=5, help="Forward-Rendite nach n Sessions")
+    ap.add_argument("--workers", type=int)
+    ap.add_argument("--min-alerts", type=int, default=5)
+    ap.add_argument("--top", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    panel = load_panel()
+    books = book_columns(panel)
+    if not books:
+        print("[sweep] keine Historie für die Buch-Ticker – erst `python -m tools.history_store refresh`")
+        return 1
+    t0 = time.perf_counter()
+    ind = indicators(panel.field("close", eur=True), panel.field("volume"), args.horizon)
+    t1 = time.perf_counter()
+    results = sweep(ind, books, args.workers)
+    t2 = time.perf_counter()
+    ranked = rank(results, args.min_alerts)
+    OUT.write_text(json.dumps({"horizon": args.horizon, "ranked": ranked}, ensure_ascii=False, indent=2),
+                   encoding="utf-8")
+    print(f"[sweep] indicators {t1 - t0:.2f}s, {len(results)} grid points {t2 - t1:.2f}s → {OUT}")
+    for book, rules in ranked.items():
+        for rule, rows in rules.items():
+            for r in rows[:args.top]:
+                print(f"  {book:<6} {rule:<18} {r['params']}  hit={r['hit_rate']:.2f} "
+                      f"edge={r['avg_fwd_edge'] * 100:+.2f}% n={r['alerts']} "
+                      f"freq={r['alerts_per_ticker_year']}/yr")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+tools/volume_anomaly.py
+Robuste Volumen-Anomalien (Median/MAD statt 20d-Mittel, das ein einzelner
+Block-Trade verzerrt):
+- RollingMedianMAD: gleitendes Fenster je Ticker als sortierte Order-Statistik;
+  Einfügen/Entfernen per bisect, Median O(1), MAD als k-kleinster Abstand
+  zweier sortierter Folgen in O(log w)
+- LiveBaselines: je Symbol eine RollingMedianMAD für den Live-Pfad (live_data), pro
+  neuer Session ein Update, der heutige Wert wird nur bewertet
+- rolling_median_mad()/daily_scores(): dasselbe vektorisiert über (T, N) (Historie, CLI)
+- Intraday: Tageszeit-Profile (Anteil des Tagesvolumens bis zum jeweiligen
+  Bucket, Median über die Vortage) → hochgerechnetes Tagesvolumen, damit
+  vol_x auch während der Session vergleichbar ist
+- Gate/Bonus aus meta.volume_min_x / meta.volume_spike_x; der Spike-Bonus verlangt
+  zusätzlich z ≥ meta.volume_spike_z (ohne z-Wert zählt nur vol_x)
+
+    python -m tools.volume_anomaly            # Top-Anomalien aus dem Historien-Speicher
+"""
+
+from __future__ import annotations
+from bisect import bisect_left, insort
+from collections import deque
+import argparse
+import math
+import warnings
+
+import numpy as np
+import pandas as pd
+
+MAD_SCALE = 1.4826   # MAD → σ bei Normalverteilung
+DEFAULT_WINDOW = 20
+DEFAULT_SPIKE_Z = 3.0
+
+# ------------------------------------------------------------
+# Streaming (je Ticker)
+# ------------------------------------------------------------
+class RollingMedianMAD:
+    __slots__ = ("w", "_fifo", "_sorted")
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.w = window
+        self._fifo: deque = deque()
+        self._sorted: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def update(self, x: float) -> None:
+        if not math.isfinite(x):
+            return
+        if len(self._fifo) == self.w:
+            old = self._fifo.popleft()
+            del self._sorted[bisect_left(self._sorted, old)]
+        self._fifo.append(x)
+        insort(self._sorted, x)
+
+    def median(self) -> float:
+        s, n = self._sorted, len(self._sorted)
+        if not n:
+            return math.nan
+        return s[n // 2] if n % 2 else 0.5 * (s[n // 2 - 1] + s[n // 2])
+
+    def _kth_dev(self, k: int, m: float, split: int) -> float:
+        """k-kleinster Abstand |x-m| (0-basiert): links absteigend, rechts aufsteigend sortiert."""
+        s = self._sorted
+        nl, nr = split, len(s) - split
+        left = lambda i: m - s[split - 1 - i]      # noqa: E731  aufsteigend in i
+        right = lambda j: s[split + j] - m         # noqa: E731
+        lo, hi = max(0, k + 1 - nr), min(k + 1, nl)  # i = Anzahl aus links
+        while lo < hi:
+            i = (lo + hi) // 2
+            j = k + 1 - i
+            if j > 0 and i < nl and right(j - 1) > left(i):
+                lo = i + 1
+            else:
+                hi = i
+        i, j = lo, k + 1 - lo
+        cands = []
+        if i > 0:
+            cands.append(left(i - 1))
+        if j > 0:
+            cands.append(right(j - 1))
+        return max(cands)
+
+    def mad(self) -> float:
+        n = len(self._sorted)
+        if not n:
+            return math.nan
+        m = self.median()
+        split = bisect_left(self._sorted, m)
+        if n % 2:
+            return self._kth_dev(n // 2, m, split)
+        return 0.5 * (self._kth_dev(n // 2 - 1, m, split) + self._kth_dev(n // 2, m, split))
+
+    def score(self, x: float) -> tuple[float, float]:
+        """(vol_x, robuster z-Wert) von x gegen das aktuelle Fenster (x selbst nicht enthalten)."""
+        m, d = self.median(), self.mad()
+        vx = x / m if m > 0 else math.nan
+        z = (x - m) / (MAD_SCALE * d) if d > 0 else math.nan
+        return vx, z
+
+class LiveBaselines:
+    """
+    Live-Pfad: eine RollingMedianMAD je Symbol über die abgeschlossenen Sessions. Pro neuer
+    Session genau ein update() (O(log w)); der heutige (ggf. hochgerechnete) Wert wird nur
+    bewertet, nie eingefügt – wiederholte Abrufe im selben Prozess bauen nichts neu auf.
+    """
+    __slots__ = ("w", "_b")
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.w = window
+        self._b: dict[str, tuple[pd.Timestamp, RollingMedianMAD]] = {}
+
+    def score(self, symbol: str, sessions: pd.DatetimeIndex, volume: np.ndarray,
+              today: float | None = None) -> tuple[float, float]:
+        """(vol_x, z) der letzten Zeile (bzw. `today`) gegen die `w` Sessions davor."""
+        done, v = sessions[:-1], np.asarray(volume, dtype=np.float64)[:-1]
+        got = self._b.get(symbol)
+        if got is not None and got[0] in done:
+            r, new = got[1], v[done.get_loc(got[0]) + 1:]
+        else:
+            r, new = RollingMedianMAD(self.w), v[-self.w:]
+        for x in new:
+            r.update(float(x))
+        if len(done):
+            self._b[symbol] = (done[-1], r)
+        return r.score(float(volume[-1]) if today is None else float(today))
+
+# ------------------------------------------------------------
+# Vektorisiert (Universum)
+# ------------------------------------------------------------
+def _nanmedian_last(x: np.ndarray) -> np.ndarray:
+    """Median über die letzte Achse ohne NaN; per Sortierung (np.sort legt NaN ans Ende),
+    deutlich schneller als np.nanmedian auf großen Fenster-Views."""
+    s = np.sort(x, axis=-1)
+    n = np.isfinite(s).sum(axis=-1)
+    lo = np.maximum((n - 1) // 2, 0)[..., None]
+    hi = np.maximum(n // 2, 0)[..., None]
+    m = 0.5 * (np.take_along_axis(s, lo, -1) + np.take_along_axis(s, hi, -1))[..., 0]
+    return np.where(n > 0, m, np.nan)
+
+def rolling_median_mad(a: np.ndarray, window: int = DEFAULT_WINDOW) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Median/MAD der jeweils VORHERIGEN `window` Werte je Spalte: Zeile t nutzt t-window..t-1.
+    a: (T, N); NaN wird ignoriert. Rückgabe zwei (T, N) Arrays.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    T = a.shape[0]
+    med = np.full(a.shape, np.nan)
+    mad = np.full(a.shape, np.nan)
+    if T <= window:
+        return med, mad
+    win = np.lib.stride_tricks.sliding_window_view(a[:-1], window, axis=0)   # (T-w, N, w)
+    m = _nanmedian_last(win)
+    med[window:] = m
+    mad[window:] = _nanmedian_last(np.abs(win - m[..., None]))
+    return med, mad
+
+def daily_scores(volume: np.ndarray, window: int = DEFAULT_WINDOW) -> tuple[np.ndarray, np.ndarray]:
+    """(vol_x, z) der letzten Zeile gegen die `window` Sessions davor, je Spalte."""
+    v = np.asarray(volume, dtype=np.float64)
+    if v.shape[0] <= window:
+        n = v.shape[1] if v.ndim == 2 else 0
+        return np.full(n, np.nan), np.full(n, np.nan)
+    med, mad = rolling_median_mad(v[-(window + 1):], window)
+    m, d, x = med[-1], mad[-1], v[-1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vx = np.where(m > 0, x / m, np.nan)
+        z = np.where(d > 0, (x - m) / (MAD_SCALE * d), np.nan)
+    return vx, z
+
+# ------------------------------------------------------------
+# Intraday: Tageszeit-Profile
+# ------------------------------------------------------------
+def session_grid(bars: dict[str, pd.DataFrame], tz: str, bucket_min: int = 30):
+    """
+    Intraday-Kerzen mehrerer Symbole einer Börse → (days, buckets, V) mit
+    V: (N, D, B) Volumen je Tag und Tageszeit-Bucket (Ortszeit der Börse).
+    """
+    frames = []
+    for i, df in enumerate(bars.values()):
+        if df is None or df.empty or "Volume" not in df:
+            continue
+        idx = pd.DatetimeIndex(df.index)
+        idx = idx.tz_localize("UTC") if idx.tz is None else idx
+        idx = idx.tz_convert(tz)
+        minute = (idx.hour * 60 + idx.minute) // bucket_min * bucket_min
+        frames.append(pd.DataFrame({"sym": i, "day": idx.tz_localize(None).normalize(),
+                                    "m": minute, "v": df["Volume"].astype(float).to_numpy()}))
+    if not frames:
+        return np.array([]), np.array([]), np.zeros((len(bars), 0, 0))
+    f = pd.concat(frames, ignore_index=True)
+    days = np.sort(f["day"].unique())
+    buckets = np.sort(f["m"].unique())
+    V = np.full((len(bars), len(days), len(buckets)), np.nan)
+    g = f.groupby(["sym", "day", "m"], sort=False)["v"].sum().reset_index()
+    V[g["sym"].to_numpy(), np.searchsorted(days, g["day"].to_numpy()), np.searchsorted(buckets, g["m"].to_numpy())] = g["v"].to_numpy()
+    # Tage mit Daten: fehlende Buckets = 0 Volumen
+    have_day = np.isfinite(V).any(axis=2, keepdims=True)
+    V = np.where(have_day & np.isnan(V), 0.0, V)
+    return days, buckets, V
+
+def projected_day_volume(V: np.ndarray, upto_bucket: int, min_days: int = 3) -> np.ndarray:
+    """
+    Hochrechnung des heutigen Tagesvolumens je Symbol (letzter Tag in V = heute):
+    kumuliertes Volumen bis upto_bucket / Median-Anteil der Vortage bis zu diesem Bucket.
+    """
+    N = V.shape[0]
+    if V.ndim != 3 or V.shape[1] < min_days + 1 or V.shape[2] == 0:
+        return np.full(N, np.nan)
+    cum = np.cumsum(np.nan_to_num(V), axis=2)
+    past = cum[:, :-1, :]
+    full = past[:, :, -1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = np.where(full[..., None] > 0, past / full[..., None], np.nan)
+        frac = np.where(np.isfinite(V[:, :-1, :1]), frac, np.nan)     # Tage ohne Daten raus
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        prof = np.nanmedian(frac[:, :, upto_bucket], axis=1)           # (N,)
+    today = cum[:, -1, upto_bucket]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(prof > 0, today / prof, np.nan)
+
+# ------------------------------------------------------------
+# Gate & Bonus
+# ------------------------------------------------------------
+def volume_flags(vol_x: float, meta: dict, z: float | None = None) -> dict:
+    """
+    passed-Flags für alerts_engine: volume (vol_x ≥ volume_min_x), volume_spike
+    (vol_x ≥ volume_spike_x und z ≥ volume_spike_z – bei ruhigen Titeln ist 1.5× schon
+    auffällig, bei schwankenden Rauschen).
+    """
+    ok = vol_x is not None and math.isfinite(vol_x)
+    z_ok = z is None or not math.isfinite(z) or z >= float(meta.get("volume_spike_z", DEFAULT_SPIKE_Z))
+    return {
+        "volume": bool(ok and vol_x >= float(meta.get("volume_min_x", 1.3))),
+        "volume_spike": bool(ok and z_ok and vol_x >= float(meta.get("volume_spike_x", 1.5))),
+    }
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def main(argv: list[str] | None = None) -> int:
+    from tools.history_store import load_panel
+
+    ap = argparse.ArgumentParser(prog="volume_anomaly")
+    ap.add_argument("--window", type=int, default=DEFAULT_WINDOW)
+    ap.add_argument("--top", type=int, default=15)
+    args = ap.parse_args(argv)
+
+    panel = load_panel()
+    if not len(panel.dates):
+        print("[volume] keine Historie – erst `python -m tools.history_store refresh`")
+        return 1
+    vx, z = daily_scores(panel.field("volume"), args.window)
+    order = np.argsort(np.where(np.isfinite(z), -z, np.inf))[:args.top]
+    print(f"[volume] {len(panel)} tickers, {panel.dates[-1]}: window={args.window}")
+    for i in order:
+        if np.isfinite(z[i]):
+            print(f"  {panel.tickers[i]:<10} vol_x={vx[i]:5.2f}  z={z[i]:+6.2f}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())